@@ -33,6 +33,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # brotli or gzip for dynamic responses; above everything that edits the body
+    'tracker.compression.CompressionMiddleware',
+    'tracker.middleware.QueryTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -70,9 +73,77 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # seconds to keep a connection (and its page cache) for later
+        # requests. Only set DB_CONN_MAX_AGE (e.g. 600) for a WSGI
+        # deployment: under ASGI (async views, the live event stream) each
+        # request may run in a different thread, so persistent connections
+        # are never reused and pile up until file-handle limits are hit
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # take the write lock when a transaction starts: upgrading a
+            # read lock mid-transaction fails at once with "database is
+            # locked" instead of waiting out the busy timeout
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# SQLite connection profile (tracker.sqlite), applied to every new
+# connection. Compare against Django's defaults with `manage.py bench_sqlite`
+# and keep planner statistics fresh with `manage.py optimize_db` (e.g. hourly
+# from cron).
+SQLITE_PROFILE = {
+    'synchronous': 'NORMAL',         # fsync at WAL checkpoints only; safe with WAL
+    'busy_timeout': 5000,            # ms to wait for a lock before "database is locked"
+    'cache_size': -65536,            # page cache per connection, in KiB when negative
+    'mmap_size': 268435456,          # read the first 256 MiB through the OS page cache
+    'temp_store': 'MEMORY',          # sorts and temp b-trees stay off disk
+}
+# WAL lets readers and the writer stop blocking each other. The mode is
+# stored in the database file, so it is not set per connection: apply it
+# once per deploy with `manage.py sqlite_journal_mode`; `manage.py check
+# --deploy` warns while the file is in another mode.
+SQLITE_JOURNAL_MODE = 'WAL'
+
+
+# Request instrumentation (tracker.middleware.QueryTimingMiddleware)
+# Server-Timing headers expose query counts and database time, so they go
+# to staff users only unless QUERY_TIMING_HEADER is on (the default under
+# DEBUG). Set QUERY_TIMING_LOG to also log one JSON line per request on
+# the "tracker.timing" logger.
+QUERY_TIMING_HEADER = DEBUG
+QUERY_TIMING_LOG = os.environ.get('QUERY_TIMING_LOG') == '1'
+# Identical SQL repeated this many times in one request is reported as N+1
+QUERY_TIMING_REPEAT_THRESHOLD = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'tracker.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+
+# Live dashboard updates (tracker.events, served at /api/events/)
+# Off by default, and only used when the site is served through ASGI
+# (expense_tracker/asgi.py, e.g. under uvicorn or daphne). Under WSGI
+# Django buffers the async stream: every open dashboard would hold a
+# worker for LIVE_EVENTS_MAX_DURATION and receive nothing until it ended.
+# While it is off, writes record no ChangeEvent rows either.
+LIVE_EVENTS_ENABLED = False
+# Each open stream polls the ChangeEvent table this often (seconds) and
+# ends after LIVE_EVENTS_MAX_DURATION; the browser then reconnects and
+# resumes from its Last-Event-ID. Events older than the retention window
+# are pruned, and a browser that was away longer is told to reload.
+LIVE_EVENTS_POLL_INTERVAL = 1.0
+LIVE_EVENTS_MAX_DURATION = 300
+LIVE_EVENTS_RETENTION = 24 * 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -112,6 +183,17 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# collectstatic writes content-hashed copies plus .br/.gz variants
+# (tracker.staticfiles). In production the web server or CDN in front of
+# Django serves STATIC_ROOT; with SERVE_STATIC_FILES on (the default under
+# DEBUG), expense_tracker.urls serves them through Django instead, with a
+# year-long immutable Cache-Control
+SERVE_STATIC_FILES = DEBUG
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'tracker.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
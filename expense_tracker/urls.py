@@ -1,7 +1,10 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from tracker.staticfiles import serve as serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -9,5 +12,10 @@ urlpatterns = [
     path('projections/', include('projections.urls')),
     path('papers/', include('papers.urls')),
 ]
-if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+# collected static files, when no front-end server handles them (see
+# settings); under DEBUG, runserver serves them from the app directories
+# before this pattern is reached
+if settings.SERVE_STATIC_FILES:
+    urlpatterns += [
+        re_path(rf'^{re.escape(settings.STATIC_URL.lstrip("/"))}(?P<path>.+)$', serve_static),
+    ]
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import projection_dashboard, archive_project, project_detail
+from .views import projection_dashboard, archive_project, project_detail, api_records
 
 app_name = 'projections'
 
@@ -7,4 +7,5 @@ urlpatterns = [
     path('', projection_dashboard, name='dashboardpro'),
     path('archive/<int:pk>/', archive_project, name='archive_project'),
     path('project/<int:pk>/', project_detail, name='project_detail'),
+    path('api/records/', api_records, name='api_records'),
 ]
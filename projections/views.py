@@ -1,10 +1,14 @@
 from datetime import date
 
+from django.http import HttpResponseBadRequest
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Sum
+from django.db.models import Q, Sum
+from django.utils.html import json_script
 from django.views.decorators.http import require_http_methods, require_POST
 from django.contrib import messages
 
+from tracker.encoders import DecimalJSONEncoder, json_response
+
 from .models import ProjectRecord
 
 
@@ -60,11 +64,7 @@ def projection_dashboard(request):
     # HANDLE DISPLAY (GET)
     # =========================
 
-    records = (
-        ProjectRecord.objects
-        .filter(is_active=True)
-        .order_by("-project_date")
-    )
+    records = filter_records(request.GET)
 
     # Distinct companies for dropdown
     companies = (
@@ -84,49 +84,72 @@ def projection_dashboard(request):
         .order_by("-year")
     )
 
-    # Filters
-    company = request.GET.get("company")
-    status = request.GET.get("status")
-    year = request.GET.get("year")
+    totals = record_totals(records)
 
-    if company:
-        records = records.filter(company=company)
+    return render(request, "projections/dashboard.html", {
+        # plain rows: the table reads fields only
+        "records": records.values(*RECORD_FIELDS),
+        "companies": companies,
+        "years": years,
+        "company_totals": totals["company_totals"],
+        "chart_script": json_script(
+            {
+                "labels": [row["company"] for row in totals["company_totals"]],
+                "data": [row["total"] for row in totals["company_totals"]],
+            },
+            "company-chart-data",
+            encoder=DecimalJSONEncoder,
+        ),
+        "total_won": totals["total_won"],
+        "total_lost": totals["total_lost"],
+    })
 
-    if status:
-        records = records.filter(status=status)
 
-    if year:
-        records = records.filter(year=year)
+RECORD_FIELDS = ("id", "title", "company", "customer", "amount", "project_date", "status")
 
-    # =========================
-    # AGGREGATES
-    # =========================
-    total_won = (
-        records.filter(status="WON")
-        .aggregate(total=Sum("amount"))
-        .get("total") or 0
-    )
 
-    total_lost = (
-        records.filter(status="LOST")
-        .aggregate(total=Sum("amount"))
-        .get("total") or 0
-    )
+def filter_records(params):
+    """Active records, newest first, narrowed by the dashboard's company/status/year filters."""
+    records = ProjectRecord.objects.filter(is_active=True).order_by("-project_date")
+    if params.get("company"):
+        records = records.filter(company=params["company"])
+    if params.get("status"):
+        records = records.filter(status=params["status"])
+    if params.get("year"):
+        records = records.filter(year=params["year"])
+    return records
+
 
-    company_totals = (
+def record_totals(records):
+    """Won and lost amounts plus won amount per company, in two queries."""
+    totals = records.aggregate(
+        total_won=Sum("amount", filter=Q(status="WON")),
+        total_lost=Sum("amount", filter=Q(status="LOST")),
+    )
+    company_totals = list(
         records.filter(status="WON")
         .values("company")
         .annotate(total=Sum("amount"))
         .order_by("-total")
     )
-
-    return render(request, "projections/dashboard.html", {
-        "records": records,
-        "companies": companies,
-        "years": years,
+    return {
+        "total_won": totals["total_won"] or 0,
+        "total_lost": totals["total_lost"] or 0,
         "company_totals": company_totals,
-        "total_won": total_won,
-        "total_lost": total_lost,
+    }
+
+
+def api_records(request):
+    """
+    The dashboard's records and totals as JSON, with the same filters.
+    Rows are read with values() and encoded by tracker.encoders.
+    """
+    if request.GET.get("year") and not request.GET["year"].isdigit():
+        return HttpResponseBadRequest("Invalid year")
+    records = filter_records(request.GET)
+    return json_response({
+        "records": list(records.values(*RECORD_FIELDS)),
+        **record_totals(records),
     })
 
 
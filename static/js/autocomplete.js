@@ -0,0 +1,60 @@
+// Typeahead for the inputs rendered by tracker.widgets.AutocompleteInput:
+// fetch matches into the input's <datalist> as the user types, and keep
+// the hidden input (the submitted value) in step with the chosen label.
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('input[data-autocomplete-url]').forEach(function (input) {
+        const target = document.getElementById(input.dataset.autocompleteTarget);
+        const list = document.getElementById(input.getAttribute('list'));
+        const forward = input.dataset.autocompleteForward && input.form
+            ? input.form.elements[input.dataset.autocompleteForward] : null;
+        let timer = null;
+        let controller = null;
+
+        function choose() {
+            const option = Array.from(list.options).find(opt => opt.value === input.value);
+            const value = option ? option.dataset.id : '';
+            if (target.value !== value) {
+                target.value = value;
+                target.dispatchEvent(new Event('change', { bubbles: true }));
+            }
+        }
+
+        async function lookup() {
+            const params = new URLSearchParams({ q: input.value });
+            if (forward && forward.value) params.set(forward.name, forward.value);
+            if (controller) controller.abort();
+            controller = new AbortController();
+            try {
+                const resp = await fetch(`${input.dataset.autocompleteUrl}?${params}`, { signal: controller.signal });
+                if (!resp.ok) return;
+                const data = await resp.json();
+                list.replaceChildren(...data.results.map(function (result) {
+                    const option = document.createElement('option');
+                    option.value = result.label;
+                    option.dataset.id = result.id;
+                    return option;
+                }));
+                choose();
+            } catch (err) {
+                if (err.name !== 'AbortError') console.error(err);
+            }
+        }
+
+        input.addEventListener('input', function () {
+            choose();
+            clearTimeout(timer);
+            timer = setTimeout(lookup, 150);
+        });
+        input.addEventListener('focus', function () {
+            if (!list.options.length) lookup();
+        });
+        // a choice made under another company no longer applies
+        if (forward) {
+            forward.addEventListener('change', function () {
+                input.value = '';
+                list.replaceChildren();
+                choose();
+            });
+        }
+    });
+});
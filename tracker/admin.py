@@ -1,7 +1,13 @@
+from datetime import MAXYEAR, MINYEAR, date
+from decimal import Decimal
+
 from django.contrib import admin
-from django.db.models import Sum
+from django.db.models import F, Q
 from django.utils.html import format_html
-from .models import Company, Tender, Expense
+from .bulk import reconcile_payment_status
+from .models import Company, Tender, Expense, ExpenseCategory
+from .pagination import EstimatedCountPaginator
+from .search import search_expenses, search_tenders
 
 
 class ExpenseInline(admin.TabularInline):
@@ -12,10 +18,69 @@ class ExpenseInline(admin.TabularInline):
     readonly_fields = ('date',)
 
 
+class NameRangeFilter(admin.SimpleListFilter):
+    """
+    Initial-letter ranges instead of one filter entry per company name:
+    a fixed sidebar and plain range comparisons on the name column.
+    """
+    title = 'name'
+    parameter_name = 'name_range'
+    RANGES = (('A', 'F'), ('G', 'L'), ('M', 'R'), ('S', 'Z'))
+
+    def lookups(self, request, model_admin):
+        return [(f'{first}-{last}', f'{first}–{last}') for first, last in self.RANGES] + [('other', 'Other')]
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value is None:
+            return queryset
+        ranges = Q()
+        for first, last in self.RANGES:
+            # names are compared case-sensitively; cover both cases
+            span = (Q(name__gte=first, name__lt=chr(ord(last) + 1))
+                    | Q(name__gte=first.lower(), name__lt=chr(ord(last.lower()) + 1)))
+            if value == f'{first}-{last}':
+                return queryset.filter(span)
+            ranges |= span
+        if value == 'other':
+            return queryset.exclude(ranges)
+        return queryset
+
+
+class TenderValueFilter(admin.SimpleListFilter):
+    """Buckets of total tender value, filtered on the with_totals() annotation."""
+    title = 'total tender value'
+    parameter_name = 'tender_value'
+    BUCKETS = {
+        'none': (None, 0),
+        'under-100k': (0, 100_000),
+        '100k-1m': (100_000, 1_000_000),
+        'over-1m': (1_000_000, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [
+            ('none', 'No tenders'),
+            ('under-100k', 'Under $100k'),
+            ('100k-1m', '$100k – $1M'),
+            ('over-1m', '$1M and over'),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.BUCKETS:
+            return queryset
+        if self.value() == 'none':
+            return queryset.filter(tender_total=0)
+        low, high = self.BUCKETS[self.value()]
+        queryset = queryset.filter(tender_total__gt=0, tender_value_sum__gte=low)
+        return queryset if high is None else queryset.filter(tender_value_sum__lt=high)
+
+
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
-    list_display = ('name', 'phone', 'email', 'tender_count', 'total_tender_value')
-    list_filter = ('name',)
+    list_display = ('name', 'phone', 'email', 'tender_count', 'total_tender_value',
+                    'total_paid', 'outstanding')
+    list_filter = (NameRangeFilter, TenderValueFilter)
     search_fields = ('name', 'address', 'email')
     fieldsets = (
         ('Basic Information', {
@@ -26,15 +91,30 @@ class CompanyAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def get_queryset(self, request):
+        # every column below comes from this one grouped query
+        return super().get_queryset(request).with_totals()
     
     def tender_count(self, obj):
-        return obj.tenders.count()
+        return obj.tender_total
     tender_count.short_description = 'Total Tenders'
+    tender_count.admin_order_field = 'tender_total'
     
     def total_tender_value(self, obj):
-        total = obj.tenders.aggregate(total=Sum('total_value'))['total'] or 0
-        return f"${total:,.2f}"
+        return f"${obj.tender_value_sum:,.2f}"
     total_tender_value.short_description = 'Total Tender Value'
+    total_tender_value.admin_order_field = 'tender_value_sum'
+
+    def total_paid(self, obj):
+        return f"${obj.paid_sum:,.2f}"
+    total_paid.short_description = 'Total Paid'
+    total_paid.admin_order_field = 'paid_sum'
+
+    def outstanding(self, obj):
+        return f"${obj.outstanding_amount:,.2f}"
+    outstanding.short_description = 'Outstanding'
+    outstanding.admin_order_field = 'outstanding_amount'
 
 
 @admin.register(Tender)
@@ -66,6 +146,7 @@ class TenderAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = (
+        'payment_status',
         'total_expenses_display',
         'profit_display',
         'profit_margin'
@@ -98,20 +179,53 @@ class TenderAdmin(admin.ModelAdmin):
     )
     
     inlines = [ExpenseInline]
+    actions = ['reconcile_payment_status']
+
+    def get_queryset(self, request):
+        # one query for the changelist: totals come annotated and the
+        # company (used by __str__ and the company column) joined in
+        return super().get_queryset(request).select_related('company').with_totals()
+
+    def get_search_results(self, request, queryset, search_term):
+        # served from the FTS5 index instead of icontains scans over search_fields
+        if not search_term.strip():
+            return queryset, False
+        queryset, _ranks = search_tenders(queryset, search_term)
+        return queryset, False
     
+    @admin.action(description='Recompute payment status from payments')
+    def reconcile_payment_status(self, request, queryset):
+        # the selection without the changelist's annotations and joins
+        changed = reconcile_payment_status(Tender.objects.filter(pk__in=queryset.order_by().values('pk')))
+        self.message_user(request, f"Payment status updated on {len(changed)} of {queryset.count()} tender(s).")
+
     # Custom methods for display
     def total_value_formatted(self, obj):
         return f"${obj.total_value:,.2f}"
     total_value_formatted.short_description = 'Total Value'
     total_value_formatted.admin_order_field = 'total_value'
     
+    @staticmethod
+    def _expenses(obj):
+        # instances from get_queryset carry the annotations; the add form's does not
+        if hasattr(obj, 'total_expenses_sum'):
+            return obj.total_expenses_sum
+        return obj.total_expenses() if obj.pk else Decimal('0.00')
+
+    @staticmethod
+    def _profit(obj):
+        if hasattr(obj, 'profit_amount'):
+            return obj.profit_amount
+        return (obj.total_value or Decimal('0.00')) - TenderAdmin._expenses(obj)
+
     def total_expenses_display(self, obj):
-        expenses = obj.total_expenses()
+        expenses = self._expenses(obj)
         return f"${expenses:,.2f}"
     total_expenses_display.short_description = 'Total Expenses'
+    total_expenses_display.admin_order_field = 'total_expenses_sum'
     
     def profit_display(self, obj):
-        profit = obj.profit()
+        profit = self._profit(obj)
         color = 'green' if profit >= 0 else 'red'
         # Use string formatting before passing to format_html
         profit_str = f"${profit:,.2f}"
@@ -121,10 +235,11 @@ class TenderAdmin(admin.ModelAdmin):
             profit_str
         )
     profit_display.short_description = 'Profit/Loss'
+    profit_display.admin_order_field = 'profit_amount'
     
     def profit_margin(self, obj):
-        if obj.total_value > 0:
-            margin = (obj.profit() / obj.total_value) * 100
+        if obj.total_value and obj.total_value > 0:
+            margin = (self._profit(obj) / obj.total_value) * 100
             color = 'green' if margin >= 0 else 'red'
             # Use string formatting before passing to format_html
             margin_str = f"{margin:,.1f}%"
@@ -149,6 +264,7 @@ class TenderAdmin(admin.ModelAdmin):
             obj.payment_status  # This is a regular string, not formatted
         )
     payment_status_colored.short_description = 'Payment Status'
+    payment_status_colored.admin_order_field = 'payment_status'
     
     def duration_days(self, obj):
         if obj.start_date and obj.end_date:
@@ -156,6 +272,67 @@ class TenderAdmin(admin.ModelAdmin):
             return f"{duration} days"
         return "N/A"
     duration_days.short_description = 'Duration'
+    duration_days.admin_order_field = F('end_date') - F('start_date')
+
+
+class DateDrillDownFilter(admin.SimpleListFilter):
+    """
+    Year, then month, drill-down on Expense.date. Unlike date_hierarchy,
+    which collects the distinct dates of every matching row, the choices
+    come from two index lookups (first and last date) and each choice is a
+    date range the (date, id) index serves directly.
+    """
+    title = 'period'
+    parameter_name = 'period'
+
+    def selected(self):
+        value = self.value() or ''
+        try:
+            if len(value) == 4:
+                year, month = int(value), None
+            elif len(value) == 7 and value[4] == '-':
+                year, month = int(value[:4]), int(value[5:])
+            else:
+                return None, None
+        except ValueError:
+            return None, None
+        # Each range ends on 1 January of the following year, so the last
+        # year date() can represent has no usable upper bound.
+        if not MINYEAR <= year < MAXYEAR or (month is not None and not 1 <= month <= 12):
+            return None, None
+        return year, month
+
+    def lookups(self, request, model_admin):
+        dates = model_admin.model.objects.order_by().values_list('date', flat=True)
+        first, last = dates.order_by('date').first(), dates.order_by('-date').first()
+        if first is None:
+            return []
+        choices = []
+        year, _month = self.selected()
+        for y in range(last.year, first.year - 1, -1):
+            choices.append((str(y), str(y)))
+            if y == year:
+                choices += [
+                    (f'{y}-{m:02d}', f'\u2003{date(y, m, 1):%B %Y}')
+                    for m in range(12, 0, -1)
+                    if (y, m) <= (last.year, last.month) and (y, m) >= (first.year, first.month)
+                ]
+        return choices
+
+    def queryset(self, request, queryset):
+        year, month = self.selected()
+        if year is None:
+            return queryset
+        if month is None:
+            return queryset.filter(date__gte=date(year, 1, 1), date__lt=date(year + 1, 1, 1))
+        following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        return queryset.filter(date__gte=date(year, month, 1), date__lt=following)
+
+
+@admin.register(ExpenseCategory)
+class ExpenseCategoryAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
 
 
 @admin.register(Expense)
@@ -169,20 +346,39 @@ class ExpenseAdmin(admin.ModelAdmin):
     )
     
     list_filter = (
+        DateDrillDownFilter,
         'category',
         'date',
         'tender__company'
     )
     
     search_fields = (
-        'category',
+        'category__name',
         'description',
         'tender__tender_no',
         'tender__client_name'
     )
+
+    # large-table mode: no full-table COUNT, estimated page counts, an
+    # order the (date, id) index provides, and related rows prefetched
+    # rather than joined so that index drives the page scan
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_select_related = ()
+    ordering = ('-date', '-id')
+    raw_id_fields = ('tender',)
+    # auto_now_add makes the date non-editable; the change form failed without this
+    readonly_fields = ('date',)
     
-    date_hierarchy = 'date'
-    
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('tender__company', 'category')
+
+    def get_search_results(self, request, queryset, search_term):
+        # served from the FTS5 index instead of icontains scans over search_fields
+        if not search_term.strip():
+            return queryset, False
+        return search_expenses(queryset, search_term), False
+
     fieldsets = (
         ('Expense Details', {
             'fields': (
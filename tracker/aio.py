@@ -0,0 +1,46 @@
+"""
+Concurrency helpers for the async API views.
+
+Django's async ORM runs every query of a request one after another on that
+request's database thread. run_concurrently() instead hands independent,
+read-only query functions to a small thread pool where each worker has its
+own connection, so the database can work on them in parallel (SQLite
+allows concurrent readers, as do the server databases).
+
+A fresh connection cannot see rows the caller has not committed yet, so
+inside a transaction (including TestCase) the functions run in turn on
+the request's own connection instead.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections
+
+MAX_WORKERS = 4
+
+# loop.run_in_executor() does not copy the caller's context, so worker
+# threads get their own connections rather than sharing the request's
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='tracker-query')
+
+
+def _run_isolated(func):
+    try:
+        return func()
+    finally:
+        # CONN_MAX_AGE handling only runs on request threads; never leave
+        # a pooled worker holding a connection
+        connections.close_all()
+
+
+def _in_transaction():
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+async def run_concurrently(*funcs):
+    """Call each zero-argument function and return their results in order."""
+    # connections are per thread: ask the thread the async ORM uses
+    if await sync_to_async(_in_transaction)():
+        return [await sync_to_async(func)() for func in funcs]
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(_executor, _run_isolated, func) for func in funcs))
@@ -0,0 +1,176 @@
+"""
+Set-based writes for expenses and payments.
+
+bulk_create skips Model.save and the ledger signals, so everything here
+finishes with refresh_tenders(), which rebuilds the TenderLedger and
+MonthlyRollup rows and payment_status of the touched tenders once, bumps
+the data version and records the live change events.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from .models import DataVersion, Expense, ExpenseCategory, MonthlyRollup, Payment, Tender, TenderLedger
+
+KINDS = ('expense', 'payment')
+
+
+class RowError(ValueError):
+    pass
+
+
+def content_hash(kind, tender_id, amount, day, text):
+    """Stable fingerprint of an imported row; identical lines hash identically."""
+    raw = f"{kind}|{tender_id}|{amount}|{day.isoformat()}|{text or ''}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def resolve_tenders(refs):
+    """Map tender numbers and/or ids to tender primary keys in one query."""
+    numbers = {str(ref) for ref in refs if ref not in (None, '')}
+    ids = {int(ref) for ref in numbers if ref.isdigit()}
+    rows = Tender.objects.filter(tender_no__in=numbers).values_list('tender_no', 'pk')
+    found = {no: pk for no, pk in rows}
+    if ids:
+        for pk in Tender.objects.filter(pk__in=ids).values_list('pk', flat=True):
+            found.setdefault(str(pk), pk)
+    return found
+
+
+def _check_length(model, field, value, label):
+    # SQLite would store the overlong value; other backends fail the whole batch
+    max_length = model._meta.get_field(field).max_length
+    if len(value) > max_length:
+        raise RowError(f"{label} is longer than {max_length} characters")
+
+
+def build_row(data, tenders):
+    """
+    Validate one mapping (kind, tender, amount, date, category, description,
+    note) and return an unsaved Expense or Payment carrying its import_hash.
+    ``tenders`` is the lookup produced by resolve_tenders().
+    """
+    kind = (data.get('kind') or data.get('type') or '').strip().lower()
+    if kind not in KINDS:
+        raise RowError(f"kind must be one of {', '.join(KINDS)}")
+
+    tender_ref = str(data.get('tender') or data.get('tender_no') or '').strip()
+    tender_id = tenders.get(tender_ref)
+    if tender_id is None:
+        raise RowError(f"unknown tender {tender_ref!r}")
+
+    try:
+        amount = Decimal(str(data.get('amount'))).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError):
+        raise RowError(f"invalid amount {data.get('amount')!r}")
+    if not amount.is_finite() or abs(amount) >= Decimal('1e12'):
+        raise RowError(f"invalid amount {data.get('amount')!r}")
+
+    raw_date = data.get('date')
+    try:
+        day = date.fromisoformat(str(raw_date)) if raw_date else timezone.localdate()
+    except ValueError:
+        raise RowError(f"invalid date {raw_date!r}")
+
+    if kind == 'expense':
+        category = str(data.get('category') or '').strip()
+        if not category:
+            raise RowError("category is required for expenses")
+        _check_length(ExpenseCategory, 'name', category, 'category')
+        description = str(data.get('description') or '') or None
+        # an unsaved category carrying the name; insert_rows() resolves it
+        obj = Expense(tender_id=tender_id, category=ExpenseCategory(name=category),
+                      description=description, amount=amount, date=day)
+        obj.import_hash = content_hash(kind, tender_id, amount, day, f"{category}|{description or ''}")
+    else:
+        note = str(data.get('note') or '') or None
+        if note:
+            _check_length(Payment, 'note', note, 'note')
+        obj = Payment(tender_id=tender_id, amount=amount, date=day, note=note)
+        obj.import_hash = content_hash(kind, tender_id, amount, day, note)
+    return obj
+
+
+def _resolve_categories(expenses):
+    """Point expenses built with an unsaved ExpenseCategory at the stored one."""
+    pending = [obj for obj in expenses if obj.category_id is None]
+    if not pending:
+        return
+    ids = ExpenseCategory.objects.ids_for(obj.category.name for obj in pending)
+    for obj in pending:
+        name = obj.category.name
+        obj.category = ExpenseCategory(pk=ids[name], name=name)
+
+
+def insert_rows(objs):
+    """
+    bulk_create a list of unsaved Expense/Payment objects, skipping any whose
+    import_hash already exists (in the database or earlier in ``objs``).
+    Objects with no import_hash are always written.
+    Returns the objects that were written. Must run inside a transaction.
+    """
+    written = []
+    _resolve_categories([obj for obj in objs if isinstance(obj, Expense)])
+    for model in (Expense, Payment):
+        rows = [obj for obj in objs if isinstance(obj, model)]
+        if not rows:
+            continue
+        hashes = [obj.import_hash for obj in rows if obj.import_hash]
+        existing = set(model.objects.filter(import_hash__in=hashes).values_list('import_hash', flat=True))
+        fresh = []
+        for obj in rows:
+            if obj.import_hash is None:
+                fresh.append(obj)
+            elif obj.import_hash not in existing:
+                existing.add(obj.import_hash)
+                fresh.append(obj)
+        if not fresh:
+            continue
+
+        # date is auto_now_add, so bulk_create stamps today's date; write the
+        # real dates back with one UPDATE per distinct date (statement lines
+        # share few dates, and this is far cheaper than bulk_update's CASE)
+        dates = [obj.date for obj in fresh]
+        model.objects.bulk_create(fresh)
+        by_date = defaultdict(list)
+        for obj, day in zip(fresh, dates):
+            obj.date = day
+            by_date[day].append(obj.pk)
+        for day, pks in by_date.items():
+            model.objects.filter(pk__in=pks).update(date=day)
+        written.extend(fresh)
+    return written
+
+
+def refresh_tenders(tender_ids):
+    """Bring ledger and rollup rows and payment_status of ``tender_ids`` up to date."""
+    tender_ids = list(tender_ids)
+    if not tender_ids:
+        return
+    with transaction.atomic():
+        TenderLedger.objects.rebuild(tender_ids=tender_ids)
+        MonthlyRollup.objects.rebuild(tender_ids=tender_ids)
+        Tender.objects.filter(pk__in=tender_ids).refresh_payment_status()
+        DataVersion.objects.bump()
+        events.tenders_changed(tender_ids)
+
+
+def reconcile_payment_status(tenders=None, from_payments=True):
+    """
+    Recompute the stored payment_status of ``tenders`` (default: every
+    tender) from what they have been paid, in one UPDATE of the stale rows.
+    Returns the ``(tender id, new status)`` pairs that changed.
+    """
+    tenders = Tender.objects.all() if tenders is None else tenders
+    with transaction.atomic():
+        changed = list(tenders.stale_payment_status(from_payments).values_list('pk', 'expected_status'))
+        if changed:
+            tenders.refresh_payment_status(from_payments)
+            DataVersion.objects.bump()
+            events.tenders_changed(pk for pk, status in changed)
+    return changed
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+from django.db import connection
+
+from .sqlite import journal_mode
+
+
+# untagged: checks tagged 'database' only run with --database, and this one is a read
+@register(deploy=True)
+def check_journal_mode(app_configs, **kwargs):
+    """``check --deploy``: the SQLite file should be in SQLITE_JOURNAL_MODE (see tracker.sqlite)."""
+    if connection.vendor != 'sqlite':
+        return []
+    wanted = settings.SQLITE_JOURNAL_MODE.lower()
+    current = journal_mode()
+    if current == wanted:
+        return []
+    return [Warning(
+        f"The SQLite database is in journal mode {current!r}, not SQLITE_JOURNAL_MODE {wanted!r}.",
+        hint="Run `manage.py sqlite_journal_mode` once during the deploy.",
+        id='tracker.W001',
+    )]
@@ -0,0 +1,148 @@
+"""
+Response compression.
+
+CompressionMiddleware negotiates Content-Encoding for dynamic responses:
+brotli when the client accepts it and the ``brotli`` package is installed,
+otherwise gzip through Django's GZipMiddleware (which also adds its random
+padding against BREACH-style attacks). HTML pages, which carry CSRF tokens
+next to reflected input, always take the padded gzip path: a brotli stream
+has no header field to hide the padding in. Already-compressed formats
+such as PDFs and images and the live event stream are passed through
+untouched.
+
+Static files are compressed once at ``collectstatic`` time instead (see
+tracker.staticfiles); the same helpers pick the variant to send.
+"""
+import gzip
+import re
+
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# brotli quality for responses built per request; static files use the
+# slowest, smallest setting since they are compressed once
+DYNAMIC_QUALITY = 5
+STATIC_QUALITY = 11
+
+MIN_SIZE = 200
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/(?!event-stream)|application/(json|javascript|xml|manifest\+json)|image/svg\+xml)'
+)
+CODING = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$')
+
+
+def available_encodings():
+    """Encodings this server can produce, most preferred first."""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def accepted_encodings(header, offered=None):
+    """
+    The encodings of ``offered`` (default: available_encodings()) that an
+    Accept-Encoding header allows, best first: by q-value, then by server
+    preference. An explicit ``q=0`` refuses a coding, including via ``*``.
+    """
+    offered = available_encodings() if offered is None else offered
+    weights = {}
+    for part in (header or '').split(','):
+        match = CODING.match(part)
+        if not match:
+            continue
+        try:
+            weights[match[1].lower()] = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+    ranked = []
+    for preference, encoding in enumerate(offered):
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > 0:
+            ranked.append((-q, preference, encoding))
+    return [encoding for q, preference, encoding in sorted(ranked)]
+
+
+def is_compressible(content_type):
+    return bool(COMPRESSIBLE_TYPES.match(content_type or ''))
+
+
+def is_html(content_type):
+    return (content_type or '').split(';')[0].strip().lower() == 'text/html'
+
+
+def compress(data, encoding, quality=DYNAMIC_QUALITY):
+    """``data`` compressed with ``encoding`` ('br' or 'gzip')."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=quality)
+    return gzip.compress(data, compresslevel=9 if quality == STATIC_QUALITY else 6, mtime=0)
+
+
+def brotli_sequence(chunks):
+    """Compress a streamed body, sending output as the compressor fills blocks (like compress_sequence)."""
+    compressor = brotli.Compressor(quality=DYNAMIC_QUALITY)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def abrotli_sequence(chunks):
+    # async streams are flushed per chunk, as Django's gzip does for them
+    compressor = brotli.Compressor(quality=DYNAMIC_QUALITY)
+    async for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware plus brotli. Put it near the top of MIDDLEWARE so it
+    compresses the finished response; it sets ``Vary: Accept-Encoding``
+    and weakens strong ETags, which the conditional APIs still match.
+    """
+
+    def process_response(self, request, response):
+        if not is_compressible(response.get('Content-Type')):
+            return response
+        encodings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if is_html(response.get('Content-Type')):
+            # BREACH: only gzip gets GZipMiddleware's length padding
+            encodings = [encoding for encoding in encodings if encoding != 'br']
+        if not encodings:
+            # e.g. "gzip;q=0": nothing acceptable, but the body still depends on the header
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        if encodings[0] == 'gzip':
+            return super().process_response(request, response)
+
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = abrotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content, 'br')
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,57 @@
+"""
+JSON encoding for the API payloads.
+
+Rows are built from ``values()`` / ``values_list()`` tuples and keep the
+Decimals the database returns; encoding turns them into JSON numbers, so
+no view converts money fields one by one. ``dumps`` uses orjson when it is
+installed and the standard library otherwise; both produce the same
+document (orjson keeps datetime microseconds, which the APIs do not send).
+"""
+import json
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # standard library encoder only
+    orjson = None
+
+
+class DecimalJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, except that Decimals become numbers rather than strings."""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+def _orjson_default(o):
+    if isinstance(o, Decimal):
+        return float(o)
+    # lazy translations and the like
+    return DecimalJSONEncoder().default(o)
+
+
+def dumps_stdlib(data):
+    return json.dumps(data, cls=DecimalJSONEncoder, separators=(',', ':')).encode()
+
+
+def dumps_orjson(data):
+    return orjson.dumps(data, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# name -> bytes encoder, for comparisons (see bench_payloads)
+ENCODERS = {'json': dumps_stdlib}
+if orjson:
+    ENCODERS['orjson'] = dumps_orjson
+
+dumps = dumps_orjson if orjson else dumps_stdlib
+
+
+def json_response(data, **kwargs):
+    """Like JsonResponse(data), encoded with dumps()."""
+    kwargs.setdefault('content_type', 'application/json')
+    return HttpResponse(dumps(data), **kwargs)
@@ -0,0 +1,127 @@
+"""
+Live change events for the dashboard, delivered as Server-Sent Events.
+
+While LIVE_EVENTS_ENABLED is on, the signal handlers in tracker.signals
+record a ChangeEvent row in the same transaction as each tender, expense
+or payment write:
+
+  tender          the tender's dashboard row after its totals changed
+  tender_removed  {"id": ...} of a deleted tender
+  expense         a new expense, shaped like an /api/expenses/ row
+  status          {"id", "tender_no", "previous", "payment_status"}
+  reload          too much changed at once (bulk import, company delete,
+                  expired Last-Event-ID); clients should refetch
+
+stream() polls that table from an async view. Polling a table rather than
+an in-process broker works across worker processes, and lets a browser
+that reconnects resume from its Last-Event-ID without losing events.
+"""
+import asyncio
+import json
+from functools import wraps
+
+from django.conf import settings
+
+from .models import ChangeEvent, Tender
+from .serializers import TENDER_FIELDS, expense_row, tender_row
+
+# above this many tenders in one bulk write, send "reload" instead of rows
+MAX_TENDER_EVENTS = 50
+BATCH_SIZE = 100
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+
+
+def recorder(func):
+    """Make ``func`` a no-op while LIVE_EVENTS_ENABLED is off: nothing would read its rows."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if settings.LIVE_EVENTS_ENABLED:
+            func(*args, **kwargs)
+    return wrapper
+
+
+@recorder
+def tenders_changed(tender_ids):
+    tender_ids = sorted(set(tender_ids))
+    if not tender_ids:
+        return
+    if len(tender_ids) > MAX_TENDER_EVENTS:
+        ChangeEvent.objects.record('reload', {'tenders': len(tender_ids)})
+        return
+    rows = Tender.objects.with_totals().filter(pk__in=tender_ids).order_by('pk').values_list(*TENDER_FIELDS)
+    ChangeEvent.objects.bulk_create(
+        [ChangeEvent(kind='tender', payload=tender_row(row)) for row in rows]
+    )
+
+
+@recorder
+def tender_removed(tender_id):
+    ChangeEvent.objects.record('tender_removed', {'id': tender_id})
+
+
+@recorder
+def expense_added(expense):
+    ChangeEvent.objects.record('expense', expense_row(expense))
+
+
+@recorder
+def status_changed(tender, previous):
+    ChangeEvent.objects.record('status', {
+        'id': tender.pk,
+        'tender_no': tender.tender_no,
+        'previous': previous,
+        'payment_status': tender.payment_status,
+    })
+
+
+@recorder
+def reload(reason):
+    ChangeEvent.objects.record('reload', {'reason': reason})
+
+
+def format_event(kind, payload, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {kind}", f"data: {json.dumps(payload, separators=(',', ':'))}"]
+    return '\n'.join(lines) + '\n\n'
+
+
+async def stream(last_event_id=None):
+    """
+    Yield SSE messages for every event after ``last_event_id`` (or after
+    the newest existing event when it is None) until
+    LIVE_EVENTS_MAX_DURATION has passed.
+    """
+    loop = asyncio.get_running_loop()
+    started = last_sent = loop.time()
+
+    if last_event_id is None:
+        newest = await ChangeEvent.objects.order_by('-pk').values_list('pk', flat=True).afirst()
+        last_event_id = newest or 0
+    else:
+        oldest = await ChangeEvent.objects.order_by('pk').values_list('pk', flat=True).afirst()
+        if oldest is not None and oldest > last_event_id + 1:
+            # events the client has not seen were already pruned
+            yield format_event('reload', {'reason': 'expired'})
+    yield f"retry: {RETRY_MILLISECONDS}\n\n"
+
+    while True:
+        events = [
+            event async for event in
+            ChangeEvent.objects.filter(pk__gt=last_event_id).order_by('pk')[:BATCH_SIZE]
+        ]
+        for event in events:
+            yield format_event(event.kind, event.payload, event.pk)
+            last_event_id = event.pk
+        now = loop.time()
+        if events:
+            last_sent = now
+            if len(events) == BATCH_SIZE:
+                continue
+        elif now - last_sent >= HEARTBEAT_SECONDS:
+            # keeps proxies from closing an idle connection
+            yield ": keep-alive\n\n"
+            last_sent = now
+        if now - started >= settings.LIVE_EVENTS_MAX_DURATION:
+            return
+        await asyncio.sleep(settings.LIVE_EVENTS_POLL_INTERVAL)
@@ -1,5 +1,6 @@
 from django import forms
-from .models import Company, Tender, Expense
+from .models import Company, Tender, Expense, ExpenseCategory
+from .widgets import company_picker, tender_picker
 
 class CompanyForm(forms.ModelForm):
     class Meta:
@@ -10,11 +11,29 @@ class TenderForm(forms.ModelForm):
     class Meta:
         model = Tender
         fields = '__all__'
+        widgets = {'company': company_picker(attrs={'class': 'form-control', 'placeholder': 'Company name'})}
 
 class ExpenseForm(forms.ModelForm):
+    # typed as free text (surrounding spaces stripped); unknown names
+    # become new categories on save
+    category = forms.CharField(max_length=255)
+
     class Meta:
         model = Expense
-        fields = '__all__'
+        exclude = ['category']
+        widgets = {'tender': tender_picker(attrs={'class': 'form-control', 'placeholder': 'Tender number'})}
+
+    field_order = ['tender', 'category', 'description', 'amount']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.category_id:
+            self.initial['category'] = self.instance.category.name
+
+    def save(self, commit=True):
+        # created only now, so a form that fails validation adds nothing
+        self.instance.category = ExpenseCategory.objects.for_name(self.cleaned_data['category'])
+        return super().save(commit)
 
 # tracker/forms.py (append)
 from django import forms
@@ -0,0 +1,239 @@
+import asyncio
+import http.client
+import io
+import itertools
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from .bench_endpoints import percentile
+
+HOST = 'localhost'
+
+
+def dashboard_requests(deployment):
+    """The API calls one dashboard load makes, against the sync or async views."""
+    suffix = '_async' if deployment == 'asgi' else ''
+    today = timezone.localdate()
+    return [
+        (reverse(f'tracker:api_tenders{suffix}'),
+         urlencode({'date_from': today - timedelta(days=30), 'date_to': today})),
+        (reverse(f'tracker:api_tenders_by_company{suffix}'), 'top=20'),
+        (reverse(f'tracker:api_summary{suffix}'), ''),
+        (reverse(f'tracker:api_expenses{suffix}'), 'limit=100'),
+    ]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def add(self, started, status):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.latencies.append(elapsed)
+            if status != 200:
+                self.errors += 1
+
+    def summary(self, elapsed):
+        samples = self.latencies or [0.0]
+        return {
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'rps': round(len(self.latencies) / elapsed, 1),
+            'mean_ms': round(statistics.fmean(samples), 2),
+            'p50_ms': round(percentile(samples, 50), 2),
+            'p95_ms': round(percentile(samples, 95), 2),
+            'p99_ms': round(percentile(samples, 99), 2),
+            'max_ms': round(max(samples), 2),
+        }
+
+
+# ----- In-process drivers -----
+
+def wsgi_get(app, path, query):
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+               'HTTP_HOST': HOST, 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    status = []
+    body = app(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        b''.join(body)
+    finally:
+        body.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_get(app, path, query):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query.encode(), 'headers': [(b'host', HOST.encode())],
+        'server': (HOST, 80), 'client': ('127.0.0.1', 50000),
+    }
+    request_sent = False
+    status = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # the client stays connected; Django stops listening once it has responded
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def run_threads(concurrency, duration, call, requests):
+    """``concurrency`` threads each issue ``call(path, query)`` in a loop until time is up."""
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def user(offset):
+        for n in itertools.count():
+            if time.perf_counter() >= deadline:
+                return
+            path, query = requests[(offset + n) % len(requests)]
+            started = time.perf_counter()
+            recorder.add(started, call(path, query))
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.perf_counter() - started)
+
+
+async def run_tasks(concurrency, duration, app, requests):
+    """The asyncio counterpart of run_threads() for an in-process ASGI application."""
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    async def user(offset):
+        n = 0
+        while time.perf_counter() < deadline:
+            path, query = requests[(offset + n) % len(requests)]
+            started = time.perf_counter()
+            recorder.add(started, await asgi_get(app, path, query))
+            n += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+# ----- HTTP driver for real servers -----
+
+class HttpCaller:
+    """One keep-alive connection per load thread against a running server."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.local = threading.local()
+
+    def __call__(self, path, query):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            conn.request('GET', f"{self.prefix}{path}?{query}" if query else f"{self.prefix}{path}")
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self.local.conn = None
+            return 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI deployment (sync API views) with the ASGI deployment (async API views) "
+        "under concurrent dashboard load: requests per second and p50/p95/p99 latency per "
+        "concurrency level. Runs both Django handlers in-process by default, or drives running "
+        "servers given with --wsgi-url/--asgi-url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32],
+                            help="Simultaneous dashboard users to simulate (default: 1 8 32).")
+        parser.add_argument('--duration', type=float, default=10.0,
+                            help="Seconds of load per deployment and concurrency level (default: 10).")
+        parser.add_argument('--wsgi-workers', type=int, default=4,
+                            help="Worker threads of the in-process WSGI server; extra users queue "
+                                 "for a free worker, as with a fixed gunicorn pool (default: 4).")
+        parser.add_argument('--wsgi-url', help="Base URL of a running WSGI server (e.g. gunicorn).")
+        parser.add_argument('--asgi-url', help="Base URL of a running ASGI server (e.g. uvicorn).")
+        parser.add_argument('--output', type=Path, default=Path('bench-report-asgi.json'))
+
+    def handle(self, *args, **options):
+        if bool(options['wsgi_url']) != bool(options['asgi_url']):
+            raise CommandError("Give both --wsgi-url and --asgi-url, or neither")
+        if min(options['concurrency']) < 1 or options['wsgi_workers'] < 1:
+            raise CommandError("--concurrency and --wsgi-workers must be at least 1")
+        over_http = bool(options['wsgi_url'])
+
+        results = []
+        for concurrency in options['concurrency']:
+            for deployment in ('wsgi', 'asgi'):
+                requests = dashboard_requests(deployment)
+                if over_http:
+                    caller = HttpCaller(options[f'{deployment}_url'])
+                    result = run_threads(concurrency, options['duration'], caller, requests)
+                elif deployment == 'wsgi':
+                    result = run_threads(concurrency, options['duration'],
+                                         self.wsgi_pool(options['wsgi_workers']), requests)
+                else:
+                    result = asyncio.run(run_tasks(concurrency, options['duration'], ASGIHandler(), requests))
+                result.update(deployment=deployment, concurrency=concurrency)
+                results.append(result)
+                self.stdout.write(
+                    f"{deployment:4s} x{concurrency:<4d} {result['rps']:8.1f} req/s  "
+                    f"p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  "
+                    f"p99 {result['p99_ms']:8.1f} ms  {result['errors']} errors"
+                )
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'mode': 'http' if over_http else 'in-process',
+            'duration': options['duration'],
+            'wsgi_workers': None if over_http else options['wsgi_workers'],
+            'results': results,
+        }
+        options['output'].write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+
+    @staticmethod
+    def wsgi_pool(workers):
+        # requests beyond the worker count wait in a FIFO queue, like a server's backlog
+        app = WSGIHandler()
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wsgi-worker')
+
+        def call(path, query):
+            return pool.submit(wsgi_get, app, path, query).result()
+        return call
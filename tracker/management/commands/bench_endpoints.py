@@ -0,0 +1,277 @@
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from papers.models import PaperEntry
+from projections.models import ProjectRecord
+from tracker.models import Company, Expense, Payment, Tender
+from tracker.pagination import encode_cursor
+
+
+def percentile(samples, pct):
+    """Linearly interpolated percentile (1-99) of a list of timings."""
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def endpoints():
+    """
+    (name, url name, args, query string) for every GET endpoint worth timing.
+    Sample rows are picked from the middle of each table so lookups are not
+    served from the first page of the index.
+    """
+    def middle(qs):
+        count = qs.count()
+        return qs[count // 2] if count else None
+
+    company = middle(Company.objects.order_by('pk'))
+    tender = middle(Tender.objects.order_by('pk'))
+    expense = middle(Expense.objects.order_by('-date', '-id'))
+    project = middle(ProjectRecord.objects.filter(is_active=True).order_by('pk'))
+    entry = middle(PaperEntry.objects.order_by('pk'))
+    cursor = encode_cursor('next', expense.date, expense.pk) if expense else None
+
+    rows = [
+        ('dashboard', 'tracker:dashboard', (), {}),
+        ('company_add', 'tracker:company_add', (), {}),
+        ('tender_add', 'tracker:tender_add', (), {}),
+        ('expense_add', 'tracker:expense_add', (), {}),
+        ('expense_list', 'tracker:expense_list', (), {}),
+        ('api_tenders', 'tracker:api_tenders', (), {}),
+        ('api_tenders?status', 'tracker:api_tenders', (), {'status': 'Partially Paid'}),
+        ('api_tenders?q', 'tracker:api_tenders', (), {'q': 'cement'}),
+        ('api_tenders?columnar', 'tracker:api_tenders', (), {'format': 'columnar'}),
+        ('api_tenders_by_company', 'tracker:api_tenders_by_company', (), {}),
+        ('api_tenders_by_company?top', 'tracker:api_tenders_by_company', (), {'top': 20}),
+        ('api_summary', 'tracker:api_summary', (), {}),
+        ('api_bootstrap', 'tracker:api_bootstrap', (), {}),
+        ('api_expenses', 'tracker:api_expenses', (), {'limit': 100}),
+        ('api_expenses?columnar', 'tracker:api_expenses', (), {'limit': 100, 'format': 'columnar'}),
+        ('projections_dashboard', 'projections:dashboardpro', (), {}),
+        ('projections_dashboard?status', 'projections:dashboardpro', (), {'status': 'WON'}),
+        ('paper_list', 'paper_list', (), {}),
+        ('paper_create', 'paper_create', (), {}),
+    ]
+    if company:
+        rows += [
+            ('company_edit', 'tracker:company_edit', (company.pk,), {}),
+            ('api_tenders?company', 'tracker:api_tenders', (), {'company': company.pk}),
+            ('expense_list?company', 'tracker:expense_list', (), {'company': company.pk}),
+            ('autocomplete_companies', 'tracker:autocomplete_companies', (), {'q': company.name[:3]}),
+        ]
+    if tender:
+        rows += [
+            ('tender_edit', 'tracker:tender_edit', (tender.pk,), {}),
+            ('api_expenses?tender', 'tracker:api_expenses', (), {'tender': tender.pk, 'limit': 100}),
+            ('expense_export?tender', 'tracker:expense_export', (), {'tender': tender.pk}),
+            ('autocomplete_tenders', 'tracker:autocomplete_tenders', (), {'q': tender.tender_no[:-2]}),
+        ]
+    if expense:
+        rows += [
+            ('expense_edit', 'tracker:expense_edit', (expense.pk,), {}),
+            ('expense_list?cursor', 'tracker:expense_list', (), {'cursor': cursor}),
+            ('api_expenses?cursor', 'tracker:api_expenses', (), {'cursor': cursor, 'limit': 100}),
+        ]
+    if project:
+        rows.append(('project_detail', 'projections:project_detail', (project.pk,), {}))
+    if entry:
+        paper = (entry.pk, 'invoice')
+        rows += [
+            ('paper_preview', 'paper_preview', paper, {}),
+            ('paper_pdf', 'paper_pdf', paper, {}),
+        ]
+    return rows
+
+
+def parse_server_timing(header):
+    """``db;dur=1.5;desc="2 queries", tpl;dur=0.3`` -> {'db': 1.5, 'tpl': 0.3}"""
+    durations = {}
+    for metric in filter(None, (part.strip() for part in header.split(','))):
+        name, *params = metric.split(';')
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'dur':
+                durations[name.strip()] = float(value)
+    return durations
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every tracker, projections and papers page and API endpoint against the current "
+        "database and write a JSON report (p50/p95/p99 latency, query count, peak memory)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=Path, default=Path('bench-report.json'),
+                            help="Where to write the JSON report (default: bench-report.json).")
+        parser.add_argument('--repeat', type=int, default=20,
+                            help="Timed requests per endpoint (default: 20).")
+        parser.add_argument('--warmup', type=int, default=2,
+                            help="Untimed requests per endpoint before measuring (default: 2).")
+        parser.add_argument('--only', action='append', default=[],
+                            help="Only run endpoints whose name contains this text (repeatable).")
+        parser.add_argument('--compare', type=Path,
+                            help="A previous report to print p50/p95 deltas against.")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(options['compare'].read_text())['endpoints']
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        # repeated-query warnings would be logged on every timed request
+        timing_logger = logging.getLogger('tracker.timing')
+        timing_logger.disabled = True
+        try:
+            # db/template times are read from the Server-Timing header
+            with override_settings(QUERY_TIMING_HEADER=True):
+                results = self.run_endpoints(options, baseline or {})
+        finally:
+            timing_logger.disabled = False
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': {'vendor': connection.vendor, 'name': str(connection.settings_dict['NAME'])},
+            'debug': settings.DEBUG,
+            'repeat': options['repeat'],
+            'rows': {
+                'companies': Company.objects.count(),
+                'tenders': Tender.objects.count(),
+                'expenses': Expense.objects.count(),
+                'payments': Payment.objects.count(),
+                'projects': ProjectRecord.objects.count(),
+                'paper_entries': PaperEntry.objects.count(),
+            },
+            'endpoints': results,
+        }
+        options['output'].write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+
+    def run_endpoints(self, options, baseline):
+        client = Client()
+        results = {}
+        for name, url_name, args, params in endpoints():
+            if options['only'] and not any(part in name for part in options['only']):
+                continue
+            try:
+                url = reverse(url_name, args=args)
+            except NoReverseMatch:
+                results[name] = {'skipped': f"{url_name} is not routed"}
+                self.stdout.write(f"{name:32s} skipped (not routed)")
+                continue
+            if params:
+                url = f"{url}?{urlencode(params)}"
+            try:
+                results[name] = self.measure(client, url, options['repeat'], options['warmup'])
+            except Exception as exc:
+                # e.g. a missing PDF renderer; keep going with the other endpoints
+                results[name] = {'url': url, 'error': f"{type(exc).__name__}: {exc}"}
+                self.stdout.write(self.style.WARNING(f"{name:32s} failed: {results[name]['error']}"))
+                continue
+            self.stdout.write(self.format_row(name, results[name], baseline.get(name)))
+        return results
+
+    def measure(self, client, url, repeat, warmup):
+        for _ in range(warmup):
+            self.fetch(client, url)
+
+        timings, db_times, template_times = [], [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response, size = self.fetch(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+            server_timing = parse_server_timing(response.get('Server-Timing', ''))
+            if 'db' in server_timing:
+                db_times.append(server_timing['db'])
+            if 'tpl' in server_timing:
+                template_times.append(server_timing['tpl'])
+
+        # queries and memory are measured on separate requests so their
+        # bookkeeping does not inflate the timings above
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            self.fetch(client, url)
+        tracemalloc.start()
+        try:
+            self.fetch(client, url)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            'url': url,
+            'status': response.status_code,
+            'bytes': size,
+            'queries': len(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'min_ms': round(min(timings), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'max_ms': round(max(timings), 2),
+        }
+        # split reported by QueryTimingMiddleware, when it is installed; its db
+        # time covers statement execution, not fetching the rows afterwards
+        if db_times:
+            result['db_p50_ms'] = round(percentile(db_times, 50), 2)
+        if template_times:
+            result['template_p50_ms'] = round(percentile(template_times, 50), 2)
+        return result
+
+    @staticmethod
+    def fetch(client, url):
+        response = client.get(url)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        return response, size
+
+    @staticmethod
+    def format_row(name, result, previous):
+        line = (f"{name:32s} p50 {result['p50_ms']:9.1f} ms  p95 {result['p95_ms']:9.1f} ms  "
+                f"p99 {result['p99_ms']:9.1f} ms  {result['queries']:4d} queries  "
+                f"{result['peak_memory_kb']:10.1f} KiB")
+        if previous and 'p50_ms' in previous:
+            line += (f"  (p50 {result['p50_ms'] - previous['p50_ms']:+.1f} ms, "
+                     f"p95 {result['p95_ms'] - previous['p95_ms']:+.1f} ms)")
+        return line
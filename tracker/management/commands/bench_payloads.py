@@ -0,0 +1,197 @@
+import gzip
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from tracker.encoders import ENCODERS, dumps
+from tracker.models import Expense, Tender
+from tracker.pagination import paginate_by_date
+from tracker.serializers import (
+    EXPENSE_FIELDS, TENDER_FIELDS, expense_columns, expense_rows, tender_columns, tender_label, tender_row,
+)
+from tracker.views import expense_labels
+
+from .bench_endpoints import percentile
+
+FORMATS = ('rows', 'columnar')
+
+
+def dumps_models(data):
+    # what the views did before the values() layer: floats and ISO strings
+    # converted per field, then DjangoJSONEncoder
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+def model_tender_row(tender):
+    """The row api_tenders built from a model instance, kept as the baseline."""
+    return {
+        'id': tender.id,
+        'tender_no': tender.tender_no,
+        'company': tender.company.name if tender.company else '',
+        'company_id': tender.company.id if tender.company else None,
+        'client_name': tender.client_name,
+        'total_value': float(tender.total_value or 0),
+        'total_expenses': float(tender.total_expenses_sum),
+        'total_paid': float(tender.total_paid_sum),
+        'balance': float(tender.balance_amount),
+        'profit': float(tender.profit_amount),
+        'expense_overrun': float(tender.overrun_amount),
+        'payment_status': tender.payment_status,
+        'start_date': tender.start_date.isoformat() if tender.start_date else None,
+        'end_date': tender.end_date.isoformat() if tender.end_date else None,
+        'expense_count': tender.expense_count,
+        'payment_count': tender.payment_count,
+    }
+
+
+def model_expense_row(expense):
+    """The row api_expenses built from a model instance, kept as the baseline."""
+    tender = expense.tender
+    return {
+        'id': expense.id,
+        'tender_id': tender.id,
+        'tender': tender_label(tender.tender_no, tender.company.name),
+        'category': expense.category.name,
+        'description': expense.description or '',
+        'amount': float(expense.amount),
+        'date': expense.date.isoformat(),
+    }
+
+
+def scenarios():
+    """(name, encoder) pairs: the model-instance baseline, then values() rows with each encoder, then columnar."""
+    return ([('models', dumps_models)] + [(f'values+{name}', encoder) for name, encoder in ENCODERS.items()]
+            + [('columnar', dumps)])
+
+
+def tender_stages(scenario):
+    """(fetch, serialize) for the whole api_tenders list."""
+    qs = Tender.objects.with_totals()
+    if scenario == 'models':
+        qs = qs.select_related('company')
+        # .all(): a fresh query on each run, not the first run's result cache
+        return lambda: list(qs.all()), lambda tenders: {'tenders': [model_tender_row(tender) for tender in tenders]}
+    fetch = lambda: list(qs.values_list(*TENDER_FIELDS))  # noqa: E731
+    if scenario == 'columnar':
+        return fetch, tender_columns
+    return fetch, lambda rows: {'tenders': [tender_row(row) for row in rows]}
+
+
+def expense_stages(scenario, limit):
+    """(fetch, serialize) for the first api_expenses page."""
+    if scenario == 'models':
+        qs = Expense.objects.prefetch_related('tender__company', 'category')
+        return (lambda: list(paginate_by_date(qs, per_page=limit)),
+                lambda expenses: {'expenses': [model_expense_row(expense) for expense in expenses]})
+
+    def fetch():
+        rows = paginate_by_date(Expense.objects.values_list(*EXPENSE_FIELDS, named=True), per_page=limit).rows
+        return (rows, *expense_labels(rows))
+    if scenario == 'columnar':
+        return fetch, lambda fetched: expense_columns(*fetched)
+    return fetch, lambda fetched: {'expenses': expense_rows(*fetched)}
+
+
+def per_10k(ms, rows):
+    return round(ms * 10000 / rows, 2) if rows else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how api_tenders and api_expenses turn rows into JSON: model instances with "
+        "per-field conversion (the baseline), values() rows with each available encoder, and "
+        "the columnar payload. Reports fetch and serialization time per 10k rows, response "
+        "bytes (plain and gzipped), and end-to-end latency of the row and columnar formats."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Timed runs per endpoint and scenario (default: 5).")
+        parser.add_argument('--expense-limit', type=int, default=1000,
+                            help="api_expenses page size (default and max: 1000).")
+        parser.add_argument('--output', type=Path, default=Path('bench-report-payloads.json'))
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+        limit = options['expense_limit']
+        if not 1 <= limit <= 1000:
+            raise CommandError("--expense-limit must be between 1 and 1000")
+
+        endpoints = [
+            ('api_tenders', reverse('tracker:api_tenders'), {}, tender_stages),
+            ('api_expenses', reverse('tracker:api_expenses'), {'limit': limit},
+             lambda scenario: expense_stages(scenario, limit)),
+        ]
+        results, requests = {}, {}
+        for name, path, params, stages in endpoints:
+            for scenario, encoder in scenarios():
+                result = self.measure_serialization(*stages(scenario), encoder, options['repeat'])
+                results[f'{name}:{scenario}'] = result
+                self.stdout.write(
+                    f"{name:13s} {scenario:14s} {result['bytes']:11,d} B  {result['gzip_bytes']:10,d} B gz  "
+                    f"fetch {result['fetch_ms_per_10k']:8.1f} ms/10k  "
+                    f"serialize {result['serialize_ms_per_10k']:8.1f} ms/10k"
+                )
+            for fmt in FORMATS:
+                url = f"{path}?{urlencode({**params, 'format': fmt})}"
+                requests[f'{name}?format={fmt}'] = result = self.measure_request(url, options['repeat'])
+                self.stdout.write(f"{name:13s} {fmt:14s} request p50 {result['request_p50_ms']:8.1f} ms")
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'repeat': options['repeat'],
+            'encoders': list(ENCODERS),
+            'rows': {'tenders': Tender.objects.count(), 'expenses': Expense.objects.count()},
+            'results': results,
+            'requests': requests,
+        }
+        options['output'].write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(results)} results and {len(requests)} requests to {options['output']}"
+        ))
+
+    @staticmethod
+    def measure_serialization(fetch, serialize, encoder, repeat):
+        fetch_times, serialize_times = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fetched = fetch()
+            fetch_times.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            body = encoder(serialize(fetched))
+            serialize_times.append((time.perf_counter() - started) * 1000)
+        # values() fetches return (rows, labels...) for expenses
+        count = len(fetched[0] if isinstance(fetched, tuple) else fetched)
+        return {
+            'rows': count,
+            'bytes': len(body),
+            'gzip_bytes': len(gzip.compress(body)),
+            'fetch_p50_ms': round(percentile(fetch_times, 50), 2),
+            'serialize_p50_ms': round(percentile(serialize_times, 50), 2),
+            'fetch_ms_per_10k': per_10k(percentile(fetch_times, 50), count),
+            'serialize_ms_per_10k': per_10k(percentile(serialize_times, 50), count),
+        }
+
+    @staticmethod
+    def measure_request(url, repeat):
+        client = Client()
+        request_times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            request_times.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+        return {
+            'url': url,
+            'bytes': len(response.content),
+            'request_p50_ms': round(percentile(request_times, 50), 2),
+        }
@@ -0,0 +1,194 @@
+import json
+import multiprocessing
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection, connections, transaction
+from django.utils import timezone
+
+from tracker.models import Expense, ExpenseCategory, Tender
+from tracker.sqlite import DJANGO_JOURNAL_MODE
+from tracker.views import SUMMARY_QUERIES, expenses_payload, summary_payload
+
+from .bench_endpoints import percentile
+
+
+def read(rng, tender_ids):
+    """What a dashboard load asks of the database."""
+    summary_payload(*(query() for query in SUMMARY_QUERIES))
+    expenses_payload({'limit': '100'})
+
+
+def write(rng, tender_ids):
+    """One clerk saving one expense, with the ledger and event writes it triggers."""
+    with transaction.atomic():
+        Expense.objects.create(
+            tender_id=rng.choice(tender_ids), category=ExpenseCategory.objects.for_name('Bench'),
+            amount=Decimal(rng.randrange(100, 100000)) / 100, date=timezone.localdate(),
+        )
+
+
+def worker(role, seed, profile, database, start, deadline, results):
+    """Runs in a forked process: repeat ``role`` against ``database`` until the deadline."""
+    latencies, errors = [], []
+    try:
+        work(role, seed, profile, database, start, deadline, latencies, errors)
+    except Exception as exc:
+        # report rather than die, or the parent would wait forever
+        errors.append(f"{type(exc).__name__}: {exc}")
+    finally:
+        results.put((role, latencies, errors))
+
+
+def work(role, seed, profile, database, start, deadline, latencies, errors):
+    db = connections['default']
+    db.close()
+    db.settings_dict.update(database)
+    settings.SQLITE_PROFILE = profile
+    operation = read if role == 'reader' else write
+    rng = random.Random(seed)
+    tender_ids = list(Tender.objects.values_list('pk', flat=True))
+    close_old_connections()
+
+    start.wait()
+    while time.time() < deadline.value:
+        started = time.perf_counter()
+        try:
+            operation(rng, tender_ids)
+        except OperationalError as exc:
+            errors.append(str(exc))
+        else:
+            latencies.append((time.perf_counter() - started) * 1000)
+        # the end of a request: closes the connection unless CONN_MAX_AGE keeps it
+        close_old_connections()
+    db.close()
+
+
+def summarize(latencies, errors, duration):
+    samples = latencies or [0.0]
+    return {
+        'ops': len(latencies),
+        'ops_per_second': round(len(latencies) / duration, 1),
+        'errors': len(errors),
+        'error_messages': sorted(set(errors))[:5],
+        'p50_ms': round(percentile(samples, 50), 2),
+        'p95_ms': round(percentile(samples, 95), 2),
+        'p99_ms': round(percentile(samples, 99), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure reader and writer throughput with several processes sharing the SQLite database, "
+        "once with Django's default connection settings and once with SQLITE_PROFILE and the "
+        "configured DATABASES options. Each run works on its own copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4,
+                            help="Reader processes, each loading the dashboard queries (default: 4).")
+        parser.add_argument('--writers', type=int, default=2,
+                            help="Writer processes, each saving expenses (default: 2).")
+        parser.add_argument('--duration', type=float, default=10.0,
+                            help="Seconds per run (default: 10).")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', type=Path, default=Path('bench-report-sqlite.json'))
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("bench_sqlite only applies to SQLite databases")
+        if options['readers'] < 0 or options['writers'] < 0 or not options['readers'] + options['writers']:
+            raise CommandError("Need at least one reader or writer process")
+        if not Tender.objects.exists():
+            raise CommandError("No tenders to write expenses against; run seed_bench first")
+
+        configured = connection.settings_dict
+        runs = [
+            ('django-defaults', {}, DJANGO_JOURNAL_MODE, {'CONN_MAX_AGE': 0, 'OPTIONS': {}}),
+            ('configured', settings.SQLITE_PROFILE, settings.SQLITE_JOURNAL_MODE,
+             {'CONN_MAX_AGE': configured['CONN_MAX_AGE'], 'OPTIONS': dict(configured['OPTIONS'])}),
+        ]
+        results = {}
+        scratch = Path(tempfile.mkdtemp(prefix='bench-sqlite-'))
+        try:
+            for name, profile, mode, database in runs:
+                copy = scratch / f'{name}.sqlite3'
+                self.copy_database(copy, mode)
+                database['NAME'] = str(copy)
+                results[name] = self.run(profile, database, options)
+                self.stdout.write(self.format_row(name, results[name]))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'sqlite': sqlite3.sqlite_version,
+            'readers': options['readers'],
+            'writers': options['writers'],
+            'duration': options['duration'],
+            'profiles': {name: {**profile, 'journal_mode': mode} for name, profile, mode, database in runs},
+            'results': results,
+        }
+        options['output'].write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    @staticmethod
+    def copy_database(target, journal_mode):
+        # the backup API takes a consistent snapshot, WAL contents included
+        connection.ensure_connection()
+        destination = sqlite3.connect(target)
+        try:
+            connection.connection.backup(destination)
+            # leaving WAL needs the only connection to the file, so switch
+            # before the workers open theirs
+            destination.execute(f"PRAGMA journal_mode = {journal_mode}")
+        finally:
+            destination.close()
+
+    def run(self, profile, database, options):
+        context = multiprocessing.get_context('fork')
+        start, results = context.Event(), context.Queue()
+        deadline = context.Value('d', 0.0)
+        roles = ['reader'] * options['readers'] + ['writer'] * options['writers']
+        # forked children must not share the parent's open connection
+        connections.close_all()
+        processes = [
+            context.Process(target=worker, args=(role, options['seed'] + n, profile, database,
+                                                 start, deadline, results))
+            for n, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        # give every child time to import and connect before the clock starts
+        time.sleep(0.5)
+        deadline.value = time.time() + options['duration']
+        start.set()
+
+        collected = {'reader': ([], []), 'writer': ([], [])}
+        for _ in processes:
+            role, latencies, errors = results.get()
+            collected[role][0].extend(latencies)
+            collected[role][1].extend(errors)
+        for process in processes:
+            process.join()
+        return {
+            role: summarize(latencies, errors, options['duration'])
+            for role, (latencies, errors) in collected.items()
+            if role in roles
+        }
+
+    @staticmethod
+    def format_row(name, result):
+        parts = [
+            f"{role}s {stats['ops_per_second']:7.1f} ops/s p50 {stats['p50_ms']:7.1f} ms "
+            f"p99 {stats['p99_ms']:8.1f} ms {stats['errors']:3d} errors"
+            for role, stats in result.items()
+        ]
+        return f"{name:16s} " + " | ".join(parts)
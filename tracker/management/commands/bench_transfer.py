@@ -0,0 +1,148 @@
+import json
+import logging
+import time
+from pathlib import Path
+from statistics import median
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from tracker.compression import available_encodings, is_compressible
+from tracker.staticfiles import HASHED_NAME, SUFFIXES, content_type
+
+from .bench_endpoints import endpoints
+
+DEFAULT_ENDPOINTS = [
+    'dashboard', 'company_add', 'tender_add', 'expense_add', 'expense_list',
+    'api_tenders', 'api_tenders?columnar', 'api_expenses', 'api_bootstrap', 'expense_export?tender',
+]
+
+# Chrome DevTools network throttling presets: (download kbit/s, round trip ms)
+LINKS = {
+    'fast-3g': (1600, 562.5),
+    'slow-3g': (400, 2000),
+}
+
+
+def load_time(link, server_ms, size):
+    """
+    Modeled time to load one response over ``link``: a round trip for the
+    request, the server's time, then the body at the link's bandwidth.
+    """
+    kbps, rtt = LINKS[link]
+    return rtt + server_ms + size * 8 / kbps
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure bytes on the wire for the tracker's pages and APIs with no compression, gzip "
+        "and brotli, and model their load time on throttled links (Fast/Slow 3G). Also sums "
+        "the collected static files and their precompressed variants, when collectstatic has run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', action='append', default=[],
+                            help="Endpoints whose name contains this text (repeatable; default: pages "
+                                 "and the dashboard APIs).")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Requests per endpoint and encoding; the median time is used (default: 3).")
+        parser.add_argument('--output', type=Path, default=Path('bench-report-transfer.json'))
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+        encodings = ('identity',) + available_encodings()
+
+        # repeated-query warnings would be logged on every request
+        timing_logger = logging.getLogger('tracker.timing')
+        timing_logger.disabled = True
+        try:
+            results = self.run_endpoints(options, encodings)
+        finally:
+            timing_logger.disabled = False
+
+        static = self.static_totals()
+        if static:
+            self.stdout.write(
+                f"{'static (hashed files)':26s} " + "  ".join(
+                    f"{encoding} {static[encoding]:>10,d} B" for encoding in encodings
+                )
+            )
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'links': {name: {'kbps': kbps, 'rtt_ms': rtt} for name, (kbps, rtt) in LINKS.items()},
+            'endpoints': results,
+            'static': static,
+        }
+        options['output'].write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+
+    def run_endpoints(self, options, encodings):
+        results = {}
+        client = Client()
+        for name, url_name, url_args, params in endpoints():
+            if options['only']:
+                if not any(part in name for part in options['only']):
+                    continue
+            elif name not in DEFAULT_ENDPOINTS:
+                continue
+            try:
+                url = reverse(url_name, args=url_args)
+            except NoReverseMatch:
+                continue
+            if params:
+                url = f"{url}?{urlencode(params)}"
+            results[name] = {'url': url}
+            for encoding in encodings:
+                results[name][encoding] = self.measure(client, url, encoding, options['repeat'])
+            self.stdout.write(self.format_row(name, results[name], encodings))
+        return results
+
+    @staticmethod
+    def measure(client, url, encoding, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            timings.append((time.perf_counter() - started) * 1000)
+        server_ms = median(timings)
+        return {
+            'status': response.status_code,
+            'content_encoding': response.get('Content-Encoding', 'identity'),
+            'bytes': len(body),
+            'server_ms': round(server_ms, 2),
+            **{f'{link}_ms': round(load_time(link, server_ms, len(body)), 1) for link in LINKS},
+        }
+
+    @staticmethod
+    def format_row(name, result, encodings):
+        parts = [
+            f"{encoding} {result[encoding]['bytes']:>10,d} B {result[encoding]['slow-3g_ms']:>9,.0f} ms"
+            for encoding in encodings
+        ]
+        return f"{name:26s} " + "  ".join(parts) + "  (slow-3g)"
+
+    @staticmethod
+    def static_totals():
+        """Bytes of the hashed, compressible files under STATIC_ROOT and of their .gz/.br variants."""
+        root = Path(settings.STATIC_ROOT)
+        files = [
+            path for path in root.rglob('*')
+            if path.is_file() and HASHED_NAME.search(path.name) and is_compressible(content_type(path.name))
+        ] if root.is_dir() else []
+        if not files:
+            return None
+        totals = {'files': len(files), 'identity': sum(path.stat().st_size for path in files)}
+        for encoding in available_encodings():
+            variants = [path.with_name(path.name + SUFFIXES[encoding]) for path in files]
+            # files that would not shrink are sent as they are
+            totals[encoding] = sum(
+                (variant if variant.is_file() else path).stat().st_size for path, variant in zip(files, variants)
+            )
+        return totals
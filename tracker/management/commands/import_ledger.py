@@ -0,0 +1,105 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tracker.bulk import RowError, build_row, insert_rows, refresh_tenders, resolve_tenders
+
+
+def read_rows(path):
+    """Yield (line number, mapping) pairs from a CSV or JSON-lines file."""
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        if path.suffix.lower() in ('.jsonl', '.ndjson'):
+            for lineno, line in enumerate(fh, start=1):
+                if line.strip():
+                    try:
+                        yield lineno, json.loads(line)
+                    except json.JSONDecodeError as exc:
+                        yield lineno, exc
+        else:
+            # header is line 1
+            for lineno, row in enumerate(csv.DictReader(fh), start=2):
+                yield lineno, row
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import expenses and payments from CSV or JSONL files. Columns: "
+        "kind (expense|payment), tender (number or id), amount, date (YYYY-MM-DD), "
+        "category, description, note. Rows already imported are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', type=Path)
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Rows validated and inserted per transaction (default: 2000).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Validate every row without writing anything.")
+        parser.add_argument('--strict', action='store_true',
+                            help="Abort on the first invalid row instead of skipping it.")
+
+    def handle(self, *args, **options):
+        for path in options['files']:
+            if not path.exists():
+                raise CommandError(f"{path} does not exist")
+
+        started = time.perf_counter()
+        seen = created = invalid = 0
+        touched = set()
+        tenders = {}
+
+        for path in options['files']:
+            rows = read_rows(path)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                seen += len(batch)
+
+                refs = {str(r.get('tender') or r.get('tender_no') or '').strip()
+                        for _, r in batch if isinstance(r, dict)}
+                missing = refs - tenders.keys()
+                if missing:
+                    tenders.update(resolve_tenders(missing))
+
+                objs = []
+                for lineno, data in batch:
+                    try:
+                        if not isinstance(data, dict):
+                            raise RowError(f"unreadable line ({data})")
+                        objs.append(build_row(data, tenders))
+                    except RowError as exc:
+                        invalid += 1
+                        message = f"{path}:{lineno}: {exc}"
+                        if options['strict']:
+                            raise CommandError(message)
+                        self.stderr.write(message)
+
+                if options['dry_run']:
+                    continue
+                # refreshed in the same transaction: a later batch may abort the
+                # command, and a re-run skips these rows as already imported
+                with transaction.atomic():
+                    written = insert_rows(objs)
+                    batch_tenders = {obj.tender_id for obj in written}
+                    refresh_tenders(batch_tenders)
+                created += len(written)
+                touched.update(batch_tenders)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Validated {seen} rows (dry run): {seen - invalid} valid, {invalid} invalid"
+            ))
+            return
+
+        elapsed = time.perf_counter() - started
+        rate = seen / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {seen} rows in {elapsed:.2f}s ({rate:,.0f} rows/s): {created} created, "
+            f"{seen - created - invalid} duplicates skipped, {invalid} invalid; "
+            f"{len(touched)} tender(s) refreshed"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tracker.sqlite import current_profile, optimize
+
+
+class Command(BaseCommand):
+    help = (
+        "Periodic SQLite maintenance: refresh the query planner's statistics (PRAGMA optimize, or "
+        "a full ANALYZE with --full), merge the search index segments and checkpoint the WAL. "
+        "Cheap enough to run hourly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Run a complete ANALYZE, e.g. after a large import.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("optimize_db only applies to SQLite databases")
+        for name, seconds in optimize(full=options['full']):
+            self.stdout.write(f"{name:16s} {seconds:8.3f}s")
+        profile = ', '.join(f"{name}={value}" for name, value in current_profile().items())
+        self.stdout.write(self.style.SUCCESS(f"Done ({profile})"))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tracker.models import TenderLedger
+
+
+class Command(BaseCommand):
+    help = "Recompute the TenderLedger rollup from the Expense and Payment tables and verify it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help="Only compare the ledger with live aggregates, do not rewrite it.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Rows per INSERT ... ON CONFLICT batch (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            started = time.perf_counter()
+            with transaction.atomic():
+                written = TenderLedger.objects.rebuild(batch_size=options['batch_size'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Rebuilt {written} ledger rows in {elapsed:.2f}s")
+
+        mismatched = list(TenderLedger.objects.mismatches())
+        if mismatched:
+            sample = ', '.join(str(pk) for pk in mismatched[:20])
+            raise CommandError(f"{len(mismatched)} tender(s) disagree with live aggregates: {sample}")
+        self.stdout.write(self.style.SUCCESS("Ledger matches live aggregates"))
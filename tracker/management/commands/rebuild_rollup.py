@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tracker.models import MonthlyRollup
+
+
+def describe_level(company_id, tender_id):
+    if tender_id is not None:
+        return f"tender {tender_id}"
+    if company_id is not None:
+        return f"company {company_id}"
+    return "all companies"
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill the company/tender/category/month MonthlyRollup from the Expense and Payment "
+        "tables and verify it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help="Only compare the rollup with live aggregates, do not rewrite it.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Rows per INSERT batch (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            started = time.perf_counter()
+            with transaction.atomic():
+                written = MonthlyRollup.objects.rebuild(batch_size=options['batch_size'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Rebuilt {written} rollup rows in {elapsed:.2f}s")
+
+        mismatched = MonthlyRollup.objects.mismatches()
+        if mismatched:
+            sample = ', '.join(
+                f"{describe_level(company_id, tender_id)} {category or 'payments'} {month:%Y-%m}"
+                for company_id, tender_id, category, month in mismatched[:20]
+            )
+            raise CommandError(f"{len(mismatched)} rollup cell(s) disagree with live aggregates: {sample}")
+        self.stdout.write(self.style.SUCCESS("Rollup matches live aggregates"))
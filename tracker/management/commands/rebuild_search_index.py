@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tracker.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Repopulate the FTS5 tender search index from the tender, company and expense tables."
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            raise CommandError("The FTS5 search index is only available on SQLite")
+        started = time.perf_counter()
+        with transaction.atomic():
+            rows = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {rows} rows in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,42 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from tracker.bulk import reconcile_payment_status
+from tracker.models import Tender
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every tender's stored payment_status from its payments in one set-based "
+        "UPDATE, writing only the tenders whose status is stale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report the stale tenders, do not update them.",
+        )
+        parser.add_argument(
+            '--from-ledger', action='store_true',
+            help="Read paid totals from the TenderLedger rollup instead of summing the payments.",
+        )
+
+    def handle(self, *args, **options):
+        from_payments = not options['from_ledger']
+        started = time.perf_counter()
+        if options['dry_run']:
+            changed = list(Tender.objects.stale_payment_status(from_payments).values_list('pk', 'expected_status'))
+        else:
+            changed = reconcile_payment_status(from_payments=from_payments)
+        elapsed = time.perf_counter() - started
+
+        verb = "would change" if options['dry_run'] else "changed"
+        counts = Counter(status for pk, status in changed)
+        breakdown = ', '.join(f"{count} to {status}" for status, count in sorted(counts.items()))
+        self.stdout.write(f"{len(changed)} tender(s) {verb}" + (f": {breakdown}" if changed else ""))
+        if changed and options['dry_run']:
+            sample = ', '.join(str(pk) for pk, status in changed[:20])
+            self.stdout.write(f"Stale tenders: {sample}")
+        self.stdout.write(self.style.SUCCESS(f"Done in {elapsed:.2f}s"))
@@ -0,0 +1,313 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from papers.models import Client as PaperClient, Company as PaperCompany, PaperEntry, PaperItem
+from projections.models import ProjectRecord
+from tracker.bulk import insert_rows
+from tracker.models import Company, DataVersion, Expense, ExpenseCategory, MonthlyRollup, Payment, Tender, TenderLedger
+
+CENT = Decimal('0.01')
+
+PREFIXES = ['Northern', 'Copperbelt', 'Lusaka', 'Zambezi', 'Kafue', 'Luangwa', 'Eastern', 'Great',
+            'Summit', 'Pioneer', 'Sunrise', 'Delta', 'Unity', 'Prime', 'Atlas', 'Granite']
+TRADES = ['Construction', 'Engineering', 'Supplies', 'Logistics', 'Electrical', 'Builders',
+          'Contractors', 'Roads', 'Water Works', 'Civil Works', 'Trading', 'Projects']
+SUFFIXES = ['Ltd', 'Limited', 'Enterprises', 'Group', 'Holdings']
+CLIENTS = ['Ministry of Health', 'Ministry of Education', 'Road Development Agency', 'Lusaka City Council',
+           'ZESCO', 'Rural Electrification Authority', 'Kitwe City Council', 'Ndola District Hospital',
+           'University of Zambia', 'Zambia Police Service', 'Ministry of Agriculture', 'Water Utility Board']
+SITES = ['Namwala', 'Choma', 'Mongu', 'Kasama', 'Solwezi', 'Chipata', 'Mansa', 'Kabwe', 'Livingstone',
+         'Mazabuka', 'Chingola', 'Mufulira', 'Kapiri', 'Petauke', 'Sesheke']
+# (category, relative frequency, example descriptions)
+CATEGORIES = [
+    ('Materials', 30, ['Cement', 'Steel bars', 'River sand', 'Roofing sheets', 'PVC pipes', 'Bricks']),
+    ('Labour', 22, ['Casual workers', 'Site foreman', 'Masons', 'Welders']),
+    ('Transport', 15, ['Truck hire', 'Delivery', 'Bus fares']),
+    ('Fuel', 12, ['Diesel', 'Petrol', 'Generator fuel']),
+    ('Equipment', 9, ['Excavator hire', 'Concrete mixer', 'Scaffolding']),
+    ('Permits', 4, ['Council permit', 'Inspection fee', 'EIA fee']),
+    ('Catering', 8, ['Site lunch', 'Water and drinks']),
+]
+PAPER_SLUGS = ['solid_connections', 'raised_right', 'universal_general', 'cmm_chronos']
+PAPER_ITEMS = ['Supply of cement', 'Installation of cables', 'Delivery of sand', 'Consultancy services',
+               'Plumbing works', 'Electrical fittings', 'Printing services', 'Office furniture']
+
+
+def money(value):
+    return Decimal(str(value)).quantize(CENT)
+
+
+def spread(total, weights):
+    """Split ``total`` into integers proportional to ``weights`` (the parts sum to ``total``)."""
+    whole = sum(weights) or 1
+    parts, running, given = [], 0, 0
+    for weight in weights:
+        running += weight
+        target = round(total * running / whole)
+        parts.append(target - given)
+        given = target
+    return parts
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic companies, tenders, expenses, payments, paper entries "
+        "and project records for load testing. Rows are written with bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=200)
+        parser.add_argument('--tenders', type=int, default=5000)
+        parser.add_argument('--expenses', type=int, default=200000)
+        parser.add_argument('--payments', type=int, default=40000)
+        parser.add_argument('--papers', type=int, default=1000)
+        parser.add_argument('--projects', type=int, default=3000)
+        parser.add_argument('--days', type=int, default=5 * 365,
+                            help="Length of the history to generate, ending today (default: 1825).")
+        parser.add_argument('--seed', type=int, default=42,
+                            help="Random seed; the same seed produces the same data (default: 42).")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows per bulk_create batch (default: 5000).")
+        parser.add_argument('--append', action='store_true',
+                            help="Allow seeding a database that already contains tenders.")
+
+    def handle(self, *args, **options):
+        if Tender.objects.exists() and not options['append']:
+            raise CommandError("The database already contains tenders; pass --append to add bench data anyway")
+        if options['companies'] < 1 and options['tenders'] > 0:
+            raise CommandError("--tenders needs at least one company")
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.today = timezone.localdate()
+        self.first_day = self.today - timedelta(days=options['days'])
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            companies = self.step("companies", self.seed_companies, options['companies'])
+            tenders = self.step("tenders", self.seed_tenders, companies, options['tenders'])
+            self.step("expenses and payments", self.seed_ledger, tenders,
+                      options['expenses'], options['payments'])
+            self.step("ledger and payment status", self.refresh)
+            self.step("paper entries", self.seed_papers, options['papers'])
+            self.step("project records", self.seed_projects, companies, options['projects'])
+
+        self.stdout.write(self.style.SUCCESS(f"Seeded bench data in {time.perf_counter() - started:.2f}s"))
+
+    def step(self, label, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        rows = len(result) if isinstance(result, list) else result
+        suffix = f"{rows} rows " if rows is not None else ""
+        self.stdout.write(f"  {label}: {suffix}in {time.perf_counter() - started:.2f}s")
+        return result
+
+    # ----- tracker -----
+
+    def seed_companies(self, count):
+        rnd = self.random
+        companies = [
+            Company(
+                name=f"{rnd.choice(PREFIXES)} {rnd.choice(TRADES)} {rnd.choice(SUFFIXES)}",
+                phone=f"+260 9{rnd.randint(10000000, 79999999)}",
+            )
+            for _ in range(count)
+        ]
+        Company.objects.bulk_create(companies, batch_size=self.batch_size)
+        return companies
+
+    def seed_tenders(self, companies, count):
+        rnd = self.random
+        if not count:
+            return []
+        # a few companies win most of the work
+        weights = [rnd.paretovariate(1.2) for _ in companies]
+        owners = rnd.choices(companies, weights=weights, k=count)
+        offset = Tender.objects.count()
+        span = (self.today - self.first_day).days
+        tenders = []
+        for n, company in enumerate(owners, start=offset + 1):
+            start = self.first_day + timedelta(days=rnd.randint(0, span))
+            tenders.append(Tender(
+                tender_no=f"BENCH/{start.year}/{n:07d}",
+                company=company,
+                client_name=f"{rnd.choice(CLIENTS)} - {rnd.choice(SITES)}",
+                total_value=money(min(rnd.lognormvariate(11.5, 1.0), 5e8)),
+                start_date=start,
+                end_date=start + timedelta(days=rnd.randint(30, 540)),
+            ))
+        Tender.objects.bulk_create(tenders, batch_size=self.batch_size)
+        if tenders[0].pk is None:
+            # backends that cannot return primary keys from bulk inserts
+            pks = dict(Tender.objects.filter(tender_no__in=[t.tender_no for t in tenders])
+                       .values_list('tender_no', 'pk'))
+            for tender in tenders:
+                tender.pk = pks[tender.tender_no]
+        return tenders
+
+    def seed_ledger(self, tenders, expense_count, payment_count):
+        """
+        Walk the calendar one day at a time and book expenses and payments
+        against the tenders running on that day, bigger tenders more often.
+        Rows are written in date order, as they would be in production.
+        """
+        if not tenders:
+            return 0
+        rnd = self.random
+        days = (self.today - self.first_day).days + 1
+        by_start = sorted(tenders, key=lambda t: t.start_date)
+
+        # number of running tenders per day decides how busy that day is
+        running = [0] * (days + 1)
+        for tender in tenders:
+            running[(tender.start_date - self.first_day).days] += 1
+            running[min((tender.end_date - self.first_day).days + 1, days)] -= 1
+        load, level = [], 0
+        for delta in running[:days]:
+            level += delta
+            load.append(level)
+        expenses_per_day = spread(expense_count, load)
+        payments_per_day = spread(payment_count, load)
+
+        categories = [c[0] for c in CATEGORIES]
+        category_weights = [c[1] for c in CATEGORIES]
+        descriptions = {c[0]: c[2] for c in CATEGORIES}
+        category_ids = ExpenseCategory.objects.ids_for(categories)
+
+        pending, active, written, next_start = [], [], 0, 0
+        for offset in range(days):
+            day = self.first_day + timedelta(days=offset)
+            while next_start < len(by_start) and by_start[next_start].start_date <= day:
+                active.append(by_start[next_start])
+                next_start += 1
+            active = [t for t in active if t.end_date >= day]
+            if not active:
+                continue
+            weights = [float(t.total_value) ** 0.5 for t in active]
+
+            for tender in rnd.choices(active, weights=weights, k=expenses_per_day[offset]):
+                category = rnd.choices(categories, weights=category_weights)[0]
+                pending.append(Expense(
+                    tender_id=tender.pk,
+                    category_id=category_ids[category],
+                    description=f"{rnd.choice(descriptions[category])} for {rnd.choice(SITES)} site",
+                    amount=money(min(rnd.lognormvariate(7.6, 1.2), 1e8)),
+                    date=day,
+                ))
+            for tender in rnd.choices(active, weights=weights, k=payments_per_day[offset]):
+                pending.append(Payment(
+                    tender_id=tender.pk,
+                    amount=money(float(tender.total_value) * rnd.uniform(0.05, 0.45)),
+                    date=day,
+                    note=rnd.choice([None, 'Bank transfer', 'Cheque', 'Mobile money']),
+                ))
+            if len(pending) >= self.batch_size:
+                written += len(insert_rows(pending))
+                pending = []
+        if pending:
+            written += len(insert_rows(pending))
+        return written
+
+    def refresh(self):
+        # bulk_create skipped the ledger signals; rebuild everything once
+        rows = TenderLedger.objects.rebuild(batch_size=self.batch_size)
+        MonthlyRollup.objects.rebuild(batch_size=self.batch_size)
+        Tender.objects.all().refresh_payment_status()
+        DataVersion.objects.bump()
+        return rows
+
+    # ----- papers -----
+
+    def seed_papers(self, count):
+        rnd = self.random
+        if not count:
+            return 0
+        # one company per letterhead template so the preview pages render
+        companies = []
+        for slug in PAPER_SLUGS:
+            company, _ = PaperCompany.objects.get_or_create(slug=slug, defaults={
+                'name': slug.replace('_', ' ').title(),
+                'logo': f'logos/{slug}.png',
+                'address': f"Plot {rnd.randint(1, 9999)}, Lusaka",
+                'phone': f"+260 97{rnd.randint(1000000, 9999999)}",
+                'email': f"info@{slug.replace('_', '')}.co.zm",
+            })
+            companies.append(company)
+
+        clients = [
+            PaperClient(name=f"{rnd.choice(CLIENTS)} - {rnd.choice(SITES)}",
+                        phone=f"+260 96{rnd.randint(1000000, 9999999)}")
+            for _ in range(max(1, count // 5))
+        ]
+        PaperClient.objects.bulk_create(clients, batch_size=self.batch_size)
+
+        sequence = {c.pk: PaperEntry.objects.filter(company=c).count() for c in companies}
+        span = (self.today - self.first_day).days
+        entries, item_lists = [], []
+        for _ in range(count):
+            company = rnd.choice(companies)
+            sequence[company.pk] += 1
+            day = self.first_day + timedelta(days=rnd.randint(0, span))
+            items = []
+            for _ in range(rnd.randint(1, 6)):
+                quantity = money(rnd.randint(1, 50))
+                unit_price = money(rnd.lognormvariate(6.5, 1.0))
+                items.append(PaperItem(description=rnd.choice(PAPER_ITEMS), quantity=quantity,
+                                       unit_price=unit_price, amount=quantity * unit_price))
+            subtotal = sum(item.amount for item in items)
+            tax = rnd.choice([Decimal('0'), Decimal('16.00')])
+            tax_amount = (tax / 100 * subtotal).quantize(CENT)
+            entries.append(PaperEntry(
+                company=company,
+                client=rnd.choice(clients),
+                paper_number=f"{company.slug.upper()}/{day.year}/{sequence[company.pk]:04d}",
+                date=day,
+                tax_percentage=tax,
+                subtotal=subtotal,
+                tax_amount=tax_amount,
+                total=subtotal + tax_amount,
+                prepared_by='Bench Seeder',
+            ))
+            item_lists.append(items)
+        PaperEntry.objects.bulk_create(entries, batch_size=self.batch_size)
+
+        items = []
+        for entry, entry_items in zip(entries, item_lists):
+            for item in entry_items:
+                item.entry = entry
+                items.append(item)
+        PaperItem.objects.bulk_create(items, batch_size=self.batch_size)
+        return len(entries) + len(items)
+
+    # ----- projections -----
+
+    def seed_projects(self, companies, count):
+        rnd = self.random
+        if not count:
+            return 0
+        names = sorted({c.name for c in companies}) or ['Bench Company']
+        span = (self.today - self.first_day).days
+        records = []
+        for _ in range(count):
+            day = self.first_day + timedelta(days=rnd.randint(0, span))
+            records.append(ProjectRecord(
+                title=f"{rnd.choice(['Construction', 'Rehabilitation', 'Supply', 'Maintenance'])} "
+                      f"of {rnd.choice(['clinic', 'school', 'road', 'borehole', 'office block'])} "
+                      f"in {rnd.choice(SITES)}",
+                company=rnd.choice(names),
+                customer=rnd.choice(CLIENTS),
+                amount=money(min(rnd.lognormvariate(12.0, 1.1), 5e9)),
+                project_date=day,
+                # bulk_create skips ProjectRecord.save, which normally fills year
+                year=day.year,
+                status=rnd.choices(['WON', 'LOST', 'PENDING'], weights=[40, 35, 25])[0],
+                is_active=rnd.random() > 0.05,
+            ))
+        ProjectRecord.objects.bulk_create(records, batch_size=self.batch_size)
+        return len(records)
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tracker.sqlite import JOURNAL_MODES, journal_mode, set_journal_mode
+
+
+class Command(BaseCommand):
+    help = (
+        "Switch the SQLite database file to SQLITE_JOURNAL_MODE (or --mode). The mode is stored "
+        "in the file, so this is a deploy step rather than something every connection does; "
+        "leaving WAL needs the only connection to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=sorted(JOURNAL_MODES),
+                            help="Journal mode to switch to (default: SQLITE_JOURNAL_MODE).")
+        parser.add_argument('--check', action='store_true',
+                            help="Only report the current mode; exit with an error if it differs.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("sqlite_journal_mode only applies to SQLite databases")
+        wanted = (options['mode'] or settings.SQLITE_JOURNAL_MODE).lower()
+        current = journal_mode()
+        if current == wanted:
+            self.stdout.write(self.style.SUCCESS(f"Journal mode is {current}"))
+            return
+        if options['check']:
+            raise CommandError(f"Journal mode is {current}, expected {wanted}")
+        result = set_journal_mode(wanted)
+        if result != wanted:
+            raise CommandError(f"Journal mode is still {result} (is another connection open?)")
+        self.stdout.write(self.style.SUCCESS(f"Journal mode changed from {current} to {result}"))
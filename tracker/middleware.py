@@ -0,0 +1,181 @@
+"""
+Per-request instrumentation.
+
+QueryTimingMiddleware counts SQL queries and measures database, template
+and overall view time for every request. It reports them in a
+``Server-Timing`` header, which browser dev tools show under Network >
+Timing (only under QUERY_TIMING_HEADER, which defaults to DEBUG, or to
+staff users, since it exposes internal timings), and optionally as one
+structured log line per request. It also
+flags N+1 patterns: the same SQL statement (with different parameters)
+run QUERY_TIMING_REPEAT_THRESHOLD or more times in one request is logged
+as a warning together with the project code that issued it.
+"""
+import contextvars
+import json
+import logging
+import os
+import traceback
+from contextlib import ExitStack
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template import base as template_base
+
+logger = logging.getLogger('tracker.timing')
+
+_current = contextvars.ContextVar('tracker_request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self, repeat_threshold):
+        self.repeat_threshold = repeat_threshold
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.statements = {}
+        self.repeated = {}
+
+    def record_query(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - started
+            self.query_count += 1
+            seen = self.statements.get(sql, 0) + 1
+            self.statements[sql] = seen
+            if seen == self.repeat_threshold:
+                self.repeated[sql] = call_site()
+
+
+def call_site(depth=3):
+    """
+    The innermost project frames (outside Django and this module) that led
+    to the current query, e.g. "tracker/models.py:12 in _ledger <- tracker/admin.py:40 in ...".
+    """
+    base = str(settings.BASE_DIR)
+    sites = []
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if (filename.startswith(base) and 'site-packages' not in filename
+                and not filename.endswith(os.path.join('tracker', 'middleware.py'))):
+            sites.append(f"{os.path.relpath(filename, base)}:{frame.lineno} in {frame.name}")
+            if len(sites) == depth:
+                break
+    return ' <- '.join(sites) or 'unknown'
+
+
+def _instrument_templates():
+    """Wrap Template.render once so outermost template renders are timed."""
+    if getattr(template_base.Template.render, '_tracker_timed', False):
+        return
+    original = template_base.Template.render
+
+    def render(self, context):
+        timings = _current.get()
+        if timings is None:
+            return original(self, context)
+        timings.template_depth += 1
+        started = perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            timings.template_depth -= 1
+            # {% include %} renders nested templates; count only the outermost
+            if timings.template_depth == 0:
+                timings.template_time += perf_counter() - started
+
+    render._tracker_timed = True
+    template_base.Template.render = render
+
+
+class QueryTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.log_requests = getattr(settings, 'QUERY_TIMING_LOG', False)
+        self.repeat_threshold = getattr(settings, 'QUERY_TIMING_REPEAT_THRESHOLD', 5)
+        _instrument_templates()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings(self.repeat_threshold)
+        token = _current.set(timings)
+        started = perf_counter()
+        try:
+            with self.instrument(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, timings, perf_counter() - started, self.show_timings(request))
+
+    async def __acall__(self, request):
+        timings = RequestTimings(self.repeat_threshold)
+        token = _current.set(timings)
+        started = perf_counter()
+        # database connections are per thread and async views query through
+        # sync_to_async, so wrap the connections of that thread
+        stack = await sync_to_async(self.instrument)(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        view_time = perf_counter() - started
+        # request.user loads the session and user from the database
+        show = await sync_to_async(self.show_timings)(request)
+        return self.report(request, response, timings, view_time, show)
+
+    @staticmethod
+    def instrument(timings):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timings.record_query))
+        return stack
+
+    @staticmethod
+    def show_timings(request):
+        """Whether the response to ``request`` carries the Server-Timing header."""
+        if getattr(settings, 'QUERY_TIMING_HEADER', settings.DEBUG):
+            return True
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_staff)
+
+    def report(self, request, response, timings, view_time, show_timings):
+        if show_timings:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings.db_time * 1000:.1f};desc="{timings.query_count} queries"',
+                f'tpl;dur={timings.template_time * 1000:.1f}',
+                f'view;dur={view_time * 1000:.1f}',
+            ])
+
+        for sql, site in timings.repeated.items():
+            logger.warning(
+                "Repeated query (%d times) in %s %s from %s: %s",
+                timings.statements[sql], request.method, request.path, site, sql[:300],
+            )
+
+        if self.log_requests:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': timings.query_count,
+                'db_ms': round(timings.db_time * 1000, 1),
+                'template_ms': round(timings.template_time * 1000, 1),
+                'view_ms': round(view_time * 1000, 1),
+                'repeated_queries': [
+                    {'count': timings.statements[sql], 'call_site': site, 'sql': sql[:300]}
+                    for sql, site in timings.repeated.items()
+                ],
+            }))
+        return response
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+
+def populate_ledger(apps, schema_editor):
+    Tender = apps.get_model('tracker', 'Tender')
+    Expense = apps.get_model('tracker', 'Expense')
+    Payment = apps.get_model('tracker', 'Payment')
+    TenderLedger = apps.get_model('tracker', 'TenderLedger')
+
+    def totals(model):
+        rows = model.objects.order_by().values('tender_id').annotate(total=Sum('amount'), n=Count('id'))
+        return {row['tender_id']: (row['total'], row['n']) for row in rows}
+
+    expenses = totals(Expense)
+    payments = totals(Payment)
+    now = timezone.now()
+    ledgers = []
+    for tender_id in Tender.objects.values_list('id', flat=True):
+        expense_sum, expense_count = expenses.get(tender_id, (0, 0))
+        payment_sum, payment_count = payments.get(tender_id, (0, 0))
+        ledgers.append(TenderLedger(
+            tender_id=tender_id,
+            expense_sum=expense_sum,
+            payment_sum=payment_sum,
+            expense_count=expense_count,
+            payment_count=payment_count,
+            last_activity=now,
+        ))
+    TenderLedger.objects.bulk_create(ledgers, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_alter_expense_amount_alter_tender_total_value_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenderLedger',
+            fields=[
+                ('tender', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to='tracker.tender')),
+                ('expense_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payment_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_count', models.PositiveIntegerField(default=0)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('last_activity', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(populate_ledger, migrations.RunPython.noop),
+    ]
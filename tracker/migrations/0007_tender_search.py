@@ -0,0 +1,84 @@
+from django.db import migrations
+
+# Search row ids: tender rows use 2 * tender.id, expense rows 2 * expense.id + 1
+CREATE_SQL = [
+    """CREATE VIRTUAL TABLE tracker_search USING fts5(
+        tender_id UNINDEXED, tender_no, client_name, company_name, description,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER tracker_search_tender_ai AFTER INSERT ON tracker_tender BEGIN
+        INSERT INTO tracker_search(rowid, tender_id, tender_no, client_name, company_name, description)
+        VALUES (new.id * 2, new.id, new.tender_no, new.client_name,
+                (SELECT name FROM tracker_company WHERE id = new.company_id), '');
+    END""",
+    """CREATE TRIGGER tracker_search_tender_au AFTER UPDATE OF tender_no, client_name, company_id ON tracker_tender BEGIN
+        UPDATE tracker_search
+        SET tender_no = new.tender_no, client_name = new.client_name,
+            company_name = (SELECT name FROM tracker_company WHERE id = new.company_id)
+        WHERE rowid = new.id * 2;
+    END""",
+    """CREATE TRIGGER tracker_search_tender_ad AFTER DELETE ON tracker_tender BEGIN
+        DELETE FROM tracker_search WHERE rowid = old.id * 2;
+    END""",
+    """CREATE TRIGGER tracker_search_company_au AFTER UPDATE OF name ON tracker_company BEGIN
+        UPDATE tracker_search SET company_name = new.name
+        WHERE rowid IN (SELECT id * 2 FROM tracker_tender WHERE company_id = new.id);
+    END""",
+    """CREATE TRIGGER tracker_search_expense_ai AFTER INSERT ON tracker_expense BEGIN
+        INSERT INTO tracker_search(rowid, tender_id, tender_no, client_name, company_name, description)
+        VALUES (new.id * 2 + 1, new.tender_id, '', '', '', COALESCE(new.description, ''));
+    END""",
+    """CREATE TRIGGER tracker_search_expense_au AFTER UPDATE OF description, tender_id ON tracker_expense BEGIN
+        UPDATE tracker_search SET tender_id = new.tender_id, description = COALESCE(new.description, '')
+        WHERE rowid = new.id * 2 + 1;
+    END""",
+    """CREATE TRIGGER tracker_search_expense_ad AFTER DELETE ON tracker_expense BEGIN
+        DELETE FROM tracker_search WHERE rowid = old.id * 2 + 1;
+    END""",
+]
+
+REBUILD_SQL = [
+    """INSERT INTO tracker_search(rowid, tender_id, tender_no, client_name, company_name, description)
+        SELECT t.id * 2, t.id, t.tender_no, t.client_name, c.name, ''
+        FROM tracker_tender t LEFT JOIN tracker_company c ON c.id = t.company_id""",
+    """INSERT INTO tracker_search(rowid, tender_id, tender_no, client_name, company_name, description)
+        SELECT e.id * 2 + 1, e.tender_id, '', '', '', COALESCE(e.description, '')
+        FROM tracker_expense e""",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS tracker_search_tender_ai",
+    "DROP TRIGGER IF EXISTS tracker_search_tender_au",
+    "DROP TRIGGER IF EXISTS tracker_search_tender_ad",
+    "DROP TRIGGER IF EXISTS tracker_search_company_au",
+    "DROP TRIGGER IF EXISTS tracker_search_expense_ai",
+    "DROP TRIGGER IF EXISTS tracker_search_expense_au",
+    "DROP TRIGGER IF EXISTS tracker_search_expense_ad",
+    "DROP TABLE IF EXISTS tracker_search",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; tracker.search falls back to icontains elsewhere
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SQL + REBUILD_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_import_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollup(apps, schema_editor):
+    Expense = apps.get_model('tracker', 'Expense')
+    Payment = apps.get_model('tracker', 'Payment')
+    MonthlyRollup = apps.get_model('tracker', 'MonthlyRollup')
+
+    cells = {}
+
+    def add(company_id, tender_id, category, month, **values):
+        # the tender row and the company and overall rows above it
+        for key in ((company_id, tender_id, category, month), (company_id, None, category, month),
+                    (None, None, category, month)):
+            if key not in cells:
+                cells[key] = MonthlyRollup(company_id=key[0], tender_id=key[1], category=category, month=month)
+            for field, value in values.items():
+                setattr(cells[key], field, getattr(cells[key], field) + value)
+
+    group = ('tender__company_id', 'tender_id')
+    for row in (Expense.objects.order_by().values(*group, 'category', month=TruncMonth('date'))
+                .annotate(total=Sum('amount'), n=Count('id')).iterator()):
+        add(row['tender__company_id'], row['tender_id'], row['category'], row['month'],
+            expense_sum=row['total'], expense_count=row['n'])
+    for row in (Payment.objects.order_by().values(*group, month=TruncMonth('date'))
+                .annotate(total=Sum('amount'), n=Count('id')).iterator()):
+        add(row['tender__company_id'], row['tender_id'], '', row['month'],
+            payment_sum=row['total'], payment_count=row['n'])
+    MonthlyRollup.objects.bulk_create(cells.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_changeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, max_length=255)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('expense_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_count', models.PositiveIntegerField(default=0)),
+                ('payment_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.company')),
+                ('tender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracker.tender')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'month'], name='rollup_company_month_idx'), models.Index(fields=['category', 'month'], name='rollup_category_month_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('tender__isnull', False)), fields=('tender', 'category', 'month'), name='rollup_tender_cell_unique'), models.UniqueConstraint(condition=models.Q(('company__isnull', False), ('tender__isnull', True)), fields=('company', 'category', 'month'), name='rollup_company_cell_unique'), models.UniqueConstraint(condition=models.Q(('company__isnull', True)), fields=('category', 'month'), name='rollup_total_cell_unique')],
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
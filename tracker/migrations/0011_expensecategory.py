@@ -0,0 +1,95 @@
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+search_index = import_module('tracker.migrations.0007_tender_search')
+EXPENSE_TRIGGERS = [sql for sql in search_index.CREATE_SQL if 'ON tracker_expense' in sql]
+
+
+def create_categories(apps, schema_editor):
+    Expense = apps.get_model('tracker', 'Expense')
+    ExpenseCategory = apps.get_model('tracker', 'ExpenseCategory')
+    names = Expense.objects.order_by().values_list('category', flat=True).distinct()
+    ExpenseCategory.objects.bulk_create([ExpenseCategory(name=name) for name in names], batch_size=1000)
+    # one pass over the expenses, each row looking its name up in the unique index
+    Expense.objects.update(category_ref=Subquery(
+        ExpenseCategory.objects.filter(name=OuterRef('category')).values('pk')[:1]
+    ))
+
+
+def restore_category_names(apps, schema_editor):
+    Expense = apps.get_model('tracker', 'Expense')
+    ExpenseCategory = apps.get_model('tracker', 'ExpenseCategory')
+    Expense.objects.update(category=Subquery(
+        ExpenseCategory.objects.filter(pk=OuterRef('category_ref')).values('name')[:1]
+    ))
+
+
+def restore_search_triggers(apps, schema_editor):
+    # SQLite rebuilds the expense table to change the column, which drops
+    # the search index triggers defined on it (see 0007)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in ('ai', 'au', 'ad'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS tracker_search_expense_{name}")
+    for statement in EXPENSE_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_monthlyrollup'),
+    ]
+
+    operations = [
+        # last step when unapplying, after the table rebuilds below
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.CreateModel(
+            name='ExpenseCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'expense categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='category_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT,
+                                    related_name='+', to='tracker.expensecategory'),
+        ),
+        # nullable while both columns exist, so unapplying can re-add it
+        # before restore_category_names fills it in
+        migrations.AlterField(
+            model_name='expense',
+            name='category',
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.RunPython(create_categories, restore_category_names),
+        migrations.RemoveField(
+            model_name='expense',
+            name='category',
+        ),
+        migrations.RenameField(
+            model_name='expense',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT,
+                                    related_name='expenses', to='tracker.expensecategory'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['category', 'date', 'id'], name='expense_category_date_idx'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
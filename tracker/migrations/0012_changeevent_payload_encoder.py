@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:57
+
+import tracker.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_expensecategory'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changeevent',
+            name='payload',
+            field=models.JSONField(default=dict, encoder=tracker.encoders.DecimalJSONEncoder),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:03
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_changeevent_payload_encoder'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='company_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(django.db.models.functions.text.Lower('tender_no'), name='tender_no_lower_idx'),
+        ),
+    ]
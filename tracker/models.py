@@ -1,13 +1,51 @@
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, transaction
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Lower, Round, TruncMonth
+from django.db.models.lookups import LessThan, LessThanOrEqual
 from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
 
+from .encoders import DecimalJSONEncoder
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+class CompanyQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotate every company with tender_total, tender_value_sum,
+        paid_sum and outstanding_amount in a single grouped query.
+
+        Payments come from the TenderLedger rollup, which has at most one
+        row per tender, so joining it does not inflate the other sums.
+        """
+        zero = Value(Decimal('0.00'))
+        return self.annotate(
+            tender_total=Count('tenders'),
+            tender_value_sum=Coalesce(Sum('tenders__total_value'), zero, output_field=MONEY),
+            paid_sum=Coalesce(Sum('tenders__ledger__payment_sum'), zero, output_field=MONEY),
+        ).annotate(
+            outstanding_amount=ExpressionWrapper(F('tender_value_sum') - F('paid_sum'), output_field=MONEY),
+        )
+
+
 class Company(models.Model):
     name = models.CharField(max_length=255)
     address = models.TextField(blank=True, null=True)
     phone = models.CharField(max_length=50, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
 
+    objects = CompanyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # case-insensitive prefix lookups (see search.prefix_search)
+            models.Index(Lower('name'), name='company_name_lower_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -15,6 +53,94 @@ class Company(models.Model):
         return reverse('tracker:company_edit', args=[self.pk])
 
 
+def _sum_subquery(model, field='amount'):
+    """Correlated SUM over ``model`` rows belonging to the outer tender."""
+    rows = (
+        model.objects.filter(tender=OuterRef('pk'))
+        .order_by()
+        .values('tender')
+        .annotate(total=Sum(field))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=MONEY), Value(Decimal('0.00')), output_field=MONEY)
+
+
+def _count_subquery(model):
+    """Correlated COUNT over ``model`` rows belonging to the outer tender."""
+    rows = (
+        model.objects.filter(tender=OuterRef('pk'))
+        .order_by()
+        .values('tender')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(rows), Value(0))
+
+
+def payment_status_for(paid):
+    """The payment_status expression for a tender that has received ``paid``."""
+    return Case(
+        When(LessThanOrEqual(paid, Value(Decimal('0.00'))), then=Value('Pending')),
+        When(LessThan(paid, F('total_value')), then=Value('Partially Paid')),
+        default=Value('Paid'),
+        output_field=models.CharField(),
+    )
+
+
+class TenderQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotate every tender with its money totals in a single query:
+        total_expenses_sum, total_paid_sum, balance_amount, profit_amount,
+        overrun_amount, expense_count and payment_count.
+
+        Totals are read from the TenderLedger rollup (one LEFT JOIN) rather
+        than re-aggregating the expense and payment tables.
+        """
+        zero = Value(Decimal('0.00'))
+        return self.annotate(
+            total_expenses_sum=Coalesce(F('ledger__expense_sum'), zero, output_field=MONEY),
+            total_paid_sum=Coalesce(F('ledger__payment_sum'), zero, output_field=MONEY),
+            expense_count=Coalesce(F('ledger__expense_count'), Value(0)),
+            payment_count=Coalesce(F('ledger__payment_count'), Value(0)),
+        ).annotate(
+            balance_amount=ExpressionWrapper(F('total_value') - F('total_paid_sum'), output_field=MONEY),
+            profit_amount=ExpressionWrapper(F('total_value') - F('total_expenses_sum'), output_field=MONEY),
+            overrun_amount=Case(
+                When(total_expenses_sum__gt=F('total_value'),
+                     then=ExpressionWrapper(F('total_expenses_sum') - F('total_value'), output_field=MONEY)),
+                default=Value(Decimal('0.00')),
+                output_field=MONEY,
+            ),
+        )
+
+    def stale_payment_status(self, from_payments=False):
+        """
+        The tenders whose stored payment_status disagrees with what they
+        have been paid, annotated with the correct ``expected_status``.
+        Paid totals come from the TenderLedger, or with ``from_payments``
+        from summing the payments themselves.
+        """
+        if from_payments:
+            paid = Subquery(
+                Payment.objects.filter(tender=OuterRef('pk')).order_by()
+                .values('tender').annotate(total=Sum('amount')).values('total')
+            )
+        else:
+            paid = Subquery(TenderLedger.objects.filter(tender=OuterRef('pk')).values('payment_sum')[:1])
+        paid = Coalesce(paid, Value(Decimal('0.00')), output_field=MONEY)
+        return self.order_by().annotate(expected_status=payment_status_for(paid)).exclude(
+            payment_status=F('expected_status'))
+
+    def refresh_payment_status(self, from_payments=False):
+        """
+        Bring the stored payment_status of every tender in this queryset up
+        to date with a single UPDATE that only writes the stale rows (see
+        stale_payment_status()). Returns the number of tenders changed.
+        """
+        return self.stale_payment_status(from_payments).update(payment_status=F('expected_status'))
+
+
 class Tender(models.Model):
     PAYMENT_STATUS_CHOICES = [
         ("Pending", "Pending"),
@@ -26,23 +152,49 @@ class Tender(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="tenders")
     client_name = models.CharField(max_length=255)
     total_value = models.DecimalField(max_digits=14, decimal_places=2)
+    # derived from total_value and the payments; the tender and payment save
+    # signals keep it current, so forms and the admin only display it
     payment_status = models.CharField(
         max_length=50,
         choices=PAYMENT_STATUS_CHOICES,
-        default="Pending"
+        default="Pending",
+        editable=False,
     )
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
 
+    objects = TenderQuerySet.as_manager()
+
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            # default ordering and the dashboard date-range filter
+            models.Index(fields=['start_date', 'end_date'], name='tender_start_end_idx'),
+            # status and company filters, each still returned newest first
+            models.Index(fields=['payment_status', 'start_date'], name='tender_status_start_idx'),
+            models.Index(fields=['company', 'start_date'], name='tender_company_start_idx'),
+            # case-insensitive prefix lookups (see search.prefix_search)
+            models.Index(Lower('tender_no'), name='tender_no_lower_idx'),
+        ]
+
+    def _ledger(self):
+        try:
+            return self.ledger
+        except ObjectDoesNotExist:
+            return None
 
     def total_expenses(self):
+        ledger = self._ledger()
+        if ledger is not None:
+            return ledger.expense_sum
         total = self.expenses.aggregate(total=models.Sum('amount'))['total']
         return total or Decimal('0.00')
 
     def total_paid(self):
         """Sum of payments received for this tender"""
+        ledger = self._ledger()
+        if ledger is not None:
+            return ledger.payment_sum
         total = self.payments.aggregate(total=models.Sum('amount'))['total']
         return total or Decimal('0.00')
 
@@ -76,18 +228,63 @@ class Tender(models.Model):
         return reverse('tracker:tender_edit', args=[self.pk])
 
 
+class ExpenseCategoryQuerySet(models.QuerySet):
+    def ids_for(self, names):
+        """Map each of ``names`` to its category id, creating missing categories."""
+        names = set(names)
+        found = dict(self.filter(name__in=names).values_list('name', 'pk'))
+        missing = names - found.keys()
+        if missing:
+            # another writer may create the same name in the meantime
+            self.bulk_create([ExpenseCategory(name=name) for name in missing], ignore_conflicts=True)
+            found.update(self.filter(name__in=missing).values_list('name', 'pk'))
+        return found
+
+    def for_name(self, name):
+        return self.get_or_create(name=name)[0]
+
+
+class ExpenseCategory(models.Model):
+    """Lookup table for expense categories; expenses point at it by id."""
+    name = models.CharField(max_length=255, unique=True)
+
+    objects = ExpenseCategoryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'expense categories'
+
+    def __str__(self):
+        return self.name
+
+
 class Expense(models.Model):
     tender = models.ForeignKey(Tender, on_delete=models.CASCADE, related_name="expenses")
-    category = models.CharField(max_length=255)
+    # indexed through expense_category_date_idx below
+    category = models.ForeignKey(ExpenseCategory, on_delete=models.PROTECT, related_name='expenses',
+                                 db_index=False)
     description = models.TextField(blank=True, null=True)
     amount = models.DecimalField(max_digits=14, decimal_places=2)
     date = models.DateField(auto_now_add=True)
+    # content hash of imported rows, used to skip duplicates on re-import
+    import_hash = models.CharField(max_length=40, unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # keyset pages over (date, id), overall and within one tender
+            models.Index(fields=['date', 'id'], name='expense_date_id_idx'),
+            models.Index(fields=['tender', 'date', 'id'], name='expense_tender_date_idx'),
+            models.Index(fields=['category', 'date', 'id'], name='expense_category_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # keep the TenderLedger update (post_save) in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.category} - {self.amount}"
+        return f"{self.category.name} - {self.amount}"
 
     def get_absolute_url(self):
         return reverse('tracker:expense_edit', args=[self.pk])
@@ -102,9 +299,390 @@ class Payment(models.Model):
     amount = models.DecimalField(max_digits=14, decimal_places=2)
     date = models.DateField(auto_now_add=True)
     note = models.CharField(max_length=255, blank=True, null=True)
+    # content hash of imported rows, used to skip duplicates on re-import
+    import_hash = models.CharField(max_length=40, unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['tender', 'date'], name='payment_tender_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # keep the TenderLedger update (post_save) in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Payment {self.amount} for {self.tender.tender_no}"
+
+
+class TenderLedgerQuerySet(models.QuerySet):
+    def apply(self, tender_id, expense_amount=0, expense_count=0, payment_amount=0, payment_count=0):
+        """
+        Add the given deltas to a tender's ledger row. Falls back to a full
+        rebuild of that row when it does not exist yet.
+        """
+        updated = self.filter(tender_id=tender_id).update(
+            expense_sum=F('expense_sum') + expense_amount,
+            expense_count=F('expense_count') + expense_count,
+            payment_sum=F('payment_sum') + payment_amount,
+            payment_count=F('payment_count') + payment_count,
+            last_activity=timezone.now(),
+        )
+        if not updated:
+            self.rebuild(tender_ids=[tender_id])
+
+    def live_totals(self, tender_ids=None):
+        """Tenders annotated with totals aggregated from the source tables."""
+        tenders = Tender.objects.order_by()
+        if tender_ids is not None:
+            tenders = tenders.filter(pk__in=tender_ids)
+        return tenders.annotate(
+            live_expense_sum=_sum_subquery(Expense),
+            live_payment_sum=_sum_subquery(Payment),
+            live_expense_count=_count_subquery(Expense),
+            live_payment_count=_count_subquery(Payment),
+        )
+
+    def rebuild(self, tender_ids=None, batch_size=1000):
+        """
+        Recompute ledger rows from live aggregates, inserting or updating
+        them in bulk. Returns the number of rows written.
+        """
+        rows = self.live_totals(tender_ids).values_list(
+            'pk', 'live_expense_sum', 'live_payment_sum', 'live_expense_count', 'live_payment_count',
+        )
+        now = timezone.now()
+        ledgers = [
+            TenderLedger(
+                tender_id=pk,
+                expense_sum=expense_sum,
+                payment_sum=payment_sum,
+                expense_count=expense_count,
+                payment_count=payment_count,
+                last_activity=now,
+            )
+            for pk, expense_sum, payment_sum, expense_count, payment_count in rows.iterator()
+        ]
+        self.bulk_create(
+            ledgers,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['tender'],
+            update_fields=['expense_sum', 'payment_sum', 'expense_count', 'payment_count', 'last_activity'],
+        )
+        return len(ledgers)
+
+    def mismatches(self, tender_ids=None):
+        """Primary keys of tenders whose ledger row disagrees with live aggregates."""
+        zero = Value(Decimal('0.00'))
+        # SQLite sums decimals as floating point, so compare at cent precision
+        return (
+            self.live_totals(tender_ids)
+            .annotate(
+                ledger_expense_sum=Round(Coalesce(F('ledger__expense_sum'), zero, output_field=MONEY), 2),
+                ledger_payment_sum=Round(Coalesce(F('ledger__payment_sum'), zero, output_field=MONEY), 2),
+                ledger_expense_count=Coalesce(F('ledger__expense_count'), Value(0)),
+                ledger_payment_count=Coalesce(F('ledger__payment_count'), Value(0)),
+            )
+            .exclude(
+                ledger__isnull=False,
+                ledger_expense_sum=Round(F('live_expense_sum'), 2),
+                ledger_payment_sum=Round(F('live_payment_sum'), 2),
+                ledger_expense_count=F('live_expense_count'),
+                ledger_payment_count=F('live_payment_count'),
+            )
+            .values_list('pk', flat=True)
+        )
+
+
+class TenderLedger(models.Model):
+    """
+    Denormalized per-tender totals, kept in step with Expense and Payment
+    writes by the signal handlers in tracker.signals.
+    """
+    tender = models.OneToOneField(Tender, on_delete=models.CASCADE, primary_key=True, related_name='ledger')
+    expense_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payment_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_count = models.PositiveIntegerField(default=0)
+    payment_count = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+    objects = TenderLedgerQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Ledger for tender {self.tender_id}"
+
+
+ROLLUP_TOTALS = ('expense_sum', 'expense_count', 'payment_sum', 'payment_count')
+
+
+class MonthlyRollupQuerySet(models.QuerySet):
+    def tender_cells(self):
+        return self.filter(tender__isnull=False)
+
+    def company_cells(self):
+        return self.filter(tender__isnull=True, company__isnull=False)
+
+    def total_cells(self):
+        return self.filter(company__isnull=True)
+
+    def apply(self, tender_id, category, day, expense_amount=0, expense_count=0, payment_amount=0, payment_count=0):
+        """
+        Add the given deltas to the tender, company and overall cells for
+        ``category`` in the month of ``day``. Missing cells are rebuilt from
+        the source tables instead, and cells left without rows are removed.
+        """
+        month = day.replace(day=1)
+        company = Tender.objects.filter(pk=tender_id).values('company_id')
+        cells = self.filter(category=category, month=month).filter(
+            Q(tender_id=tender_id) | Q(tender__isnull=True, company_id=Subquery(company)) | Q(company__isnull=True)
+        )
+        updated = cells.update(
+            expense_sum=F('expense_sum') + expense_amount,
+            expense_count=F('expense_count') + expense_count,
+            payment_sum=F('payment_sum') + payment_amount,
+            payment_count=F('payment_count') + payment_count,
+        )
+        if updated < 3:
+            self.rebuild_cell(tender_id, category, month)
+        elif expense_count < 0 or payment_count < 0:
+            cells.filter(expense_count=0, payment_count=0).delete()
+
+    def live_cells(self, expenses, payments):
+        """
+        Unsaved tender-level rows aggregated from the given Expense and
+        Payment querysets, keyed by (company_id, tender_id, category, month).
+        """
+        cells = {}
+
+        def cell(row, category):
+            key = (row['tender__company_id'], row['tender_id'], category, row['month'])
+            if key not in cells:
+                cells[key] = MonthlyRollup(
+                    company_id=key[0], tender_id=key[1], category=category, month=key[3],
+                )
+            return cells[key]
+
+        group = ('tender_id', 'tender__company_id')
+        month = TruncMonth('date')
+        for row in (expenses.order_by().values(*group, 'category__name', month=month)
+                    .annotate(total=Sum('amount'), count=Count('pk')).iterator()):
+            rollup = cell(row, row['category__name'])
+            rollup.expense_sum, rollup.expense_count = row['total'], row['count']
+        for row in (payments.order_by().values(*group, month=month)
+                    .annotate(total=Sum('amount'), count=Count('pk')).iterator()):
+            rollup = cell(row, MonthlyRollup.PAYMENTS)
+            rollup.payment_sum, rollup.payment_count = row['total'], row['count']
+        return cells
+
+    @staticmethod
+    def roll_up(cells):
+        """Company and overall rows summed from tender-level rows, keyed like live_cells()."""
+        upper = {}
+        for (company_id, tender_id, category, month), row in cells.items():
+            for key in ((company_id, None, category, month), (None, None, category, month)):
+                if key not in upper:
+                    upper[key] = MonthlyRollup(company_id=key[0], category=category, month=month)
+                for field in ROLLUP_TOTALS:
+                    setattr(upper[key], field, getattr(upper[key], field) + getattr(row, field))
+        return upper
+
+    def _source(self, tender_ids=None):
+        expenses, payments = Expense.objects.all(), Payment.objects.all()
+        if tender_ids is not None:
+            expenses, payments = expenses.filter(tender_id__in=tender_ids), payments.filter(tender_id__in=tender_ids)
+        return expenses, payments
+
+    def rebuild(self, tender_ids=None, batch_size=1000):
+        """
+        Replace the rows of ``tender_ids`` (all tenders by default) with fresh
+        aggregates and bring the company and overall rows they feed up to
+        date. Returns the number of tender-level rows written.
+        """
+        cells = self.live_cells(*self._source(tender_ids))
+        if tender_ids is None:
+            self.all().delete()
+            self.bulk_create([*cells.values(), *self.roll_up(cells).values()], batch_size=batch_size)
+            return len(cells)
+
+        stale = self.filter(tender_id__in=tender_ids)
+        affected = set(stale.values_list('company_id', 'month').distinct()) | {(key[0], key[3]) for key in cells}
+        stale.delete()
+        self.bulk_create(cells.values(), batch_size=batch_size)
+        self.refresh_upper({company_id for company_id, month in affected}, {month for company_id, month in affected})
+        return len(cells)
+
+    def rebuild_cell(self, tender_id, category, month):
+        following = (month + timedelta(days=32)).replace(day=1)
+        expenses, payments = self._source([tender_id])
+        if category == MonthlyRollup.PAYMENTS:
+            expenses = expenses.none()
+        else:
+            expenses, payments = expenses.filter(category__name=category), payments.none()
+        cells = self.live_cells(
+            expenses.filter(date__gte=month, date__lt=following),
+            payments.filter(date__gte=month, date__lt=following),
+        )
+        self.filter(tender_id=tender_id, category=category, month=month).delete()
+        self.bulk_create(cells.values())
+        company_id = Tender.objects.filter(pk=tender_id).values_list('company_id', flat=True).first()
+        self.refresh_upper({company_id} if company_id else set(), {month})
+
+    def refresh_upper(self, company_ids, months):
+        """
+        Recompute the company rows of ``company_ids`` and the overall rows
+        from the tender rows below them, across the span of ``months``.
+        """
+        if not company_ids or not months:
+            return
+        span = {'month__gte': min(months), 'month__lte': max(months)}
+        sums = {f'sum_{field}': Sum(field) for field in ROLLUP_TOTALS}
+
+        def summed(rows):
+            return [
+                MonthlyRollup(
+                    company_id=row.get('company_id'), category=row['category'], month=row['month'],
+                    **{field: row[f'sum_{field}'] for field in ROLLUP_TOTALS},
+                )
+                for row in rows.annotate(**sums)
+            ]
+
+        self.company_cells().filter(company_id__in=company_ids, **span).delete()
+        self.bulk_create(summed(
+            self.tender_cells().filter(company_id__in=company_ids, **span).values('company_id', 'category', 'month')
+        ))
+        self.total_cells().filter(**span).delete()
+        self.bulk_create(summed(self.company_cells().filter(**span).values('category', 'month')))
+
+    def mismatches(self, tender_ids=None):
+        """
+        (company_id, tender_id, category, month) keys whose stored totals
+        disagree with the source tables. With ``tender_ids`` only those
+        tenders' own rows are checked.
+        """
+        def totals(row):
+            return tuple(getattr(row, field) for field in ROLLUP_TOTALS)
+
+        live = self.live_cells(*self._source(tender_ids))
+        rows = self.all()
+        if tender_ids is None:
+            live.update(self.roll_up(live))
+        else:
+            rows = rows.filter(tender_id__in=tender_ids)
+        live = {key: totals(row) for key, row in live.items()}
+        stored = {(row.company_id, row.tender_id, row.category, row.month): totals(row) for row in rows.iterator()}
+        return sorted(
+            (key for key in live.keys() | stored.keys() if live.get(key) != stored.get(key)),
+            key=lambda key: tuple((value is not None, value) for value in key),
+        )
+
+
+class MonthlyRollup(models.Model):
+    """
+    Expense and payment totals per category and month at three levels:
+    per tender (with its company copied in), per company (tender is null)
+    and over all companies (company is null). Kept in step with writes by
+    tracker.signals; the analytics API reads the coarsest level a query
+    needs, so its cost follows the size of that level rather than the
+    ledger. Rows carry the ExpenseCategory name rather than its id so
+    slices need no join (tracker.signals follows renames). Payments carry
+    no category and are filed under ``PAYMENTS``.
+    """
+    PAYMENTS = ''
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    tender = models.ForeignKey(Tender, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    category = models.CharField(max_length=255, blank=True)
+    month = models.DateField(help_text="First day of the month")
+    expense_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_count = models.PositiveIntegerField(default=0)
+    payment_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payment_count = models.PositiveIntegerField(default=0)
+
+    objects = MonthlyRollupQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tender', 'category', 'month'], condition=Q(tender__isnull=False),
+                name='rollup_tender_cell_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['company', 'category', 'month'], condition=Q(tender__isnull=True, company__isnull=False),
+                name='rollup_company_cell_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['category', 'month'], condition=Q(company__isnull=True),
+                name='rollup_total_cell_unique',
+            ),
+        ]
+        indexes = [
+            # company slices over a month range, at tender or company level
+            models.Index(fields=['company', 'month'], name='rollup_company_month_idx'),
+            models.Index(fields=['category', 'month'], name='rollup_category_month_idx'),
+        ]
+
+    def __str__(self):
+        level = f"tender {self.tender_id}" if self.tender_id else f"company {self.company_id}" if self.company_id else "all"
+        return f"{self.category or 'payments'} {self.month:%Y-%m} for {level}"
+
+
+class DataVersionQuerySet(models.QuerySet):
+    def current(self):
+        """The current data version; 0 before anything has been written."""
+        return self.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    def bump(self):
+        if not self.filter(pk=1).update(version=F('version') + 1):
+            self.get_or_create(pk=1, defaults={'version': 1})
+
+
+class DataVersion(models.Model):
+    """
+    Single-row counter bumped whenever tracker data changes. The JSON APIs
+    build their ETags from it so unchanged data can be answered with a 304.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    objects = DataVersionQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Data version {self.version}"
+
+
+class ChangeEventQuerySet(models.QuerySet):
+    def record(self, kind, payload):
+        event = self.create(kind=kind, payload=payload)
+        # trim old events now and then instead of on every write
+        if event.pk % 500 == 0:
+            cutoff = timezone.now() - timedelta(seconds=settings.LIVE_EVENTS_RETENTION)
+            self.filter(created_at__lt=cutoff).delete()
+        return event
+
+
+class ChangeEvent(models.Model):
+    """
+    A compact description of one tracker write, streamed to open dashboards
+    by the live_events endpoint (see tracker.events). Rows are recorded in
+    the same transaction as the write and kept for LIVE_EVENTS_RETENTION
+    seconds so reconnecting browsers can catch up.
+    """
+    KIND_CHOICES = [
+        ('tender', 'Tender totals changed'),
+        ('tender_removed', 'Tender deleted'),
+        ('expense', 'New expense'),
+        ('status', 'Payment status changed'),
+        ('reload', 'Many rows changed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # rows keep their Decimals and dates (see tracker.serializers)
+    payload = models.JSONField(default=dict, encoder=DecimalJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = ChangeEventQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.kind} event {self.pk}"
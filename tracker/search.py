@@ -0,0 +1,139 @@
+"""
+Full-text search over tenders backed by the SQLite FTS5 table
+``tracker_search`` (see migration 0007).
+
+The table holds one row per tender (rowid = 2 * tender id) carrying the
+tender number, client and company name, plus one row per expense
+(rowid = 2 * expense id + 1) carrying its description. Triggers on the
+tender, company and expense tables keep it in sync, including rows written
+with bulk_create or raw SQL. On other database backends the helpers fall
+back to ``icontains`` filtering.
+
+prefix_search() serves the autocomplete endpoints instead: a prefix is a
+range on an indexed ``LOWER(column)``, which any backend answers from the
+index, where ``LIKE 'abc%'`` would scan the table.
+"""
+import re
+import sys
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+
+from .models import ExpenseCategory
+
+TABLE = 'tracker_search'
+
+REBUILD_SQL = [
+    f"DELETE FROM {TABLE}",
+    f"""INSERT INTO {TABLE}(rowid, tender_id, tender_no, client_name, company_name, description)
+        SELECT t.id * 2, t.id, t.tender_no, t.client_name, c.name, ''
+        FROM tracker_tender t LEFT JOIN tracker_company c ON c.id = t.company_id""",
+    f"""INSERT INTO {TABLE}(rowid, tender_id, tender_no, client_name, company_name, description)
+        SELECT e.id * 2 + 1, e.tender_id, '', '', '', COALESCE(e.description, '')
+        FROM tracker_expense e""",
+    f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')",
+]
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query: every word must match, each as a
+    prefix, so "nam bus" finds "Namwala Bus Station".
+    """
+    words = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_tenders(qs, text):
+    """
+    Restrict a Tender queryset to matches for ``text``.
+    Returns ``(queryset, ranks)``, where ``ranks`` maps tender id to its FTS5
+    rank (lower is better). It is empty when FTS is unavailable.
+    """
+    match = match_expression(text)
+    if not match:
+        return qs, {}
+    if not fts_enabled():
+        return qs.filter(
+            Q(tender_no__icontains=text) | Q(client_name__icontains=text) |
+            Q(company__name__icontains=text) | Q(expenses__description__icontains=text)
+        ).distinct(), {}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT tender_id, MIN(rank) FROM {TABLE} WHERE {TABLE} MATCH %s GROUP BY tender_id",
+            [match],
+        )
+        ranks = dict(cursor.fetchall())
+    qs = qs.filter(pk__in=RawSQL(f"SELECT tender_id FROM {TABLE} WHERE {TABLE} MATCH %s", (match,)))
+    return qs, ranks
+
+
+def search_expenses(qs, text):
+    """
+    Restrict an Expense queryset to expenses whose description matches
+    ``text``, whose tender matches it (number, client or company name), or
+    whose category name contains it.
+    """
+    match = match_expression(text)
+    if not match:
+        return qs
+    categories = Q(category__in=ExpenseCategory.objects.filter(name__icontains=text.strip()).values('pk'))
+    if not fts_enabled():
+        return qs.filter(
+            categories | Q(description__icontains=text) | Q(tender__tender_no__icontains=text) |
+            Q(tender__client_name__icontains=text) | Q(tender__company__name__icontains=text)
+        )
+    # odd rowids are expense rows, even ones tender rows
+    expense_ids = RawSQL(f"SELECT rowid / 2 FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid & 1 = 1", (match,))
+    tender_ids = RawSQL(f"SELECT tender_id FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid & 1 = 0", (match,))
+    return qs.filter(categories | Q(pk__in=expense_ids) | Q(tender_id__in=tender_ids))
+
+
+def rebuild_index():
+    """Repopulate the search table from scratch. Returns the number of rows indexed."""
+    with connection.cursor() as cursor:
+        for statement in REBUILD_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLE}")
+        return cursor.fetchone()[0]
+
+
+def prefix_bounds(prefix):
+    """
+    (low, high) such that exactly the strings starting with ``prefix`` fall
+    in [low, high). high is None when no string sorts above all of them
+    (the prefix is only U+10FFFF characters).
+    """
+    # a trailing U+10FFFF has no successor; bump the character before it
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return prefix, None
+    following = ord(stem[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # lone surrogates cannot be encoded for the database
+        following = 0xE000
+    return prefix, stem[:-1] + chr(following)
+
+
+def prefix_search(qs, field, text):
+    """
+    Restrict ``qs`` to rows whose ``field`` starts with ``text``, ignoring
+    case, ordered by that field. Both the filter and the order read an index
+    on ``Lower(field)`` (see the Company and Tender indexes), so taking the
+    first few matches costs the same however large the table is.
+    """
+    qs = qs.alias(prefix_key=Lower(field)).order_by('prefix_key', 'pk')
+    prefix = (text or '').strip().lower()
+    if prefix:
+        low, high = prefix_bounds(prefix)
+        qs = qs.filter(prefix_key__gte=low)
+        if high is not None:
+            qs = qs.filter(prefix_key__lt=high)
+    return qs
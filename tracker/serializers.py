@@ -0,0 +1,154 @@
+"""
+JSON row shapes shared by the dashboard APIs and the live event stream,
+so a pushed update has exactly the fields of a fetched row.
+
+Rows are built from ``values_list`` tuples rather than model instances and
+keep their Decimals and dates; tracker.encoders turns those into JSON.
+
+The columnar shapes (``?format=columnar``) carry the same fields as
+parallel arrays, one per field: repeated values such as companies are
+dictionary-encoded and the payment status is an index into ``statuses``.
+"""
+from .models import Tender
+
+PAYMENT_STATUSES = [value for value, label in Tender.PAYMENT_STATUS_CHOICES]
+
+
+def tender_row(row):
+    """
+    A ``TENDER_FIELDS`` tuple, read from TenderQuerySet.with_totals(), as
+    the dashboard table expects it.
+    """
+    (pk, tender_no, company_id, client_name, total_value, expenses, paid, balance, profit, overrun,
+     status, start_date, end_date, expense_count, payment_count, company_name) = row
+    return {
+        'id': pk,
+        'tender_no': tender_no,
+        'company': company_name,
+        'company_id': company_id,
+        'client_name': client_name,
+        'total_value': total_value,
+        'total_expenses': expenses,
+        'total_paid': paid,
+        'balance': balance,
+        'profit': profit,
+        'expense_overrun': overrun,
+        # stored; kept current by the tender and payment signals (see also reconcile_payment_status)
+        'payment_status': status,
+        'start_date': start_date,
+        'end_date': end_date,
+        'expense_count': expense_count,
+        'payment_count': payment_count,
+    }
+
+
+def tender_label(tender_no, company_name):
+    """How an expense shows its tender: ``<tender no> - <company>``."""
+    return f"{tender_no} - {company_name}" if company_name else tender_no
+
+
+def expense_rows(rows, tender_labels, category_names):
+    """
+    ``EXPENSE_FIELDS`` tuples as api_expenses rows; ``tender_labels`` and
+    ``category_names`` map the tender and category ids to display text.
+    """
+    return [
+        {
+            'id': pk,
+            'tender_id': tender_id,
+            'tender': tender_labels.get(tender_id, ''),
+            'category': category_names[category_id],
+            'description': description or '',
+            'amount': amount,
+            'date': day,
+        }
+        for pk, day, tender_id, category_id, description, amount in rows
+    ]
+
+
+def expense_row(expense):
+    """expense_rows() for one saved Expense, e.g. for a live event."""
+    tender = expense.tender
+    label = tender_label(tender.tender_no, tender.company.name)
+    row = (expense.pk, expense.date, tender.pk, expense.category_id, expense.description, expense.amount)
+    return expense_rows([row], {tender.pk: label}, {expense.category_id: expense.category.name})[0]
+
+# (column, field) pairs in values_list order; company__name only feeds the
+# dictionary of companies and is not a column of its own
+TENDER_COLUMNS = [
+    ('id', 'id'),
+    ('tender_no', 'tender_no'),
+    ('company', 'company_id'),
+    ('client_name', 'client_name'),
+    ('total_value', 'total_value'),
+    ('total_expenses', 'total_expenses_sum'),
+    ('total_paid', 'total_paid_sum'),
+    ('balance', 'balance_amount'),
+    ('profit', 'profit_amount'),
+    ('expense_overrun', 'overrun_amount'),
+    ('payment_status', 'payment_status'),
+    ('start_date', 'start_date'),
+    ('end_date', 'end_date'),
+    ('expense_count', 'expense_count'),
+    ('payment_count', 'payment_count'),
+]
+TENDER_FIELDS = [name for column, name in TENDER_COLUMNS] + ['company__name']
+
+EXPENSE_FIELDS = ['id', 'date', 'tender_id', 'category_id', 'description', 'amount']
+
+
+def dictionary_encode(values):
+    """(codes, distinct values in first-seen order) for a column of repeated values."""
+    index = {}
+    codes = [index.setdefault(value, len(index)) for value in values]
+    return codes, list(index)
+
+
+def tender_columns(rows):
+    """
+    Columnar form of tender_row() for tuples of ``TENDER_FIELDS`` read from
+    a TenderQuerySet.with_totals(). ``company`` holds indexes into
+    ``companies`` and ``payment_status`` indexes into ``statuses``.
+    """
+    names = [column for column, field in TENDER_COLUMNS]
+    transposed = list(zip(*rows)) or [()] * len(TENDER_FIELDS)
+    columns = dict(zip(names, transposed))
+    company_names = dict(zip(columns['company'], transposed[-1]))
+
+    columns['company'], company_ids = dictionary_encode(columns['company'])
+    status_index = {status: n for n, status in enumerate(PAYMENT_STATUSES)}
+    columns['payment_status'] = [status_index[status] for status in columns['payment_status']]
+    return {
+        'format': 'columnar',
+        'count': len(rows),
+        'columns': {name: list(values) for name, values in columns.items()},
+        'companies': {'id': company_ids, 'name': [company_names[pk] for pk in company_ids]},
+        'statuses': PAYMENT_STATUSES,
+    }
+
+
+def expense_columns(rows, tender_labels, category_names):
+    """
+    Columnar form of expense_rows() for tuples of ``EXPENSE_FIELDS``.
+    ``tender_labels`` and ``category_names`` map the page's tender and
+    category ids to their display text; ``tender`` and ``category`` hold
+    indexes into the ``tenders`` and ``categories`` dictionaries.
+    """
+    transposed = list(zip(*rows)) or [()] * len(EXPENSE_FIELDS)
+    ids, dates, tender_ids, category_ids, descriptions, amounts = transposed
+    tender_codes, tender_keys = dictionary_encode(tender_ids)
+    category_codes, category_keys = dictionary_encode(category_ids)
+    return {
+        'format': 'columnar',
+        'count': len(rows),
+        'columns': {
+            'id': list(ids),
+            'tender': tender_codes,
+            'category': category_codes,
+            'description': [text or '' for text in descriptions],
+            'amount': list(amounts),
+            'date': list(dates),
+        },
+        'tenders': {'id': tender_keys, 'label': [tender_labels[pk] for pk in tender_keys]},
+        'categories': [category_names[pk] for pk in category_keys],
+    }
@@ -0,0 +1,220 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import events, sqlite
+from .models import Company, DataVersion, Expense, ExpenseCategory, MonthlyRollup, Payment, Tender, TenderLedger
+
+
+def _ledger_kwargs(sender, amount, count):
+    """Ledger deltas for adding (count=1) or removing (count=-1) one row."""
+    amount = Decimal(str(amount)) * count
+    if sender is Expense:
+        return {'expense_amount': amount, 'expense_count': count}
+    return {'payment_amount': amount, 'payment_count': count}
+
+
+def _rollup_key(sender, tender_id, date, category=None):
+    """(tender_id, category, day) of the MonthlyRollup cell a row belongs to."""
+    return tender_id, category if sender is Expense else MonthlyRollup.PAYMENTS, date
+
+
+def _rollup_cell(sender, instance):
+    category = instance.category.name if sender is Expense else None
+    return _rollup_key(sender, instance.tender_id, instance.date, category)
+
+
+def _forget_cached_ledger(instance):
+    # a Tender object held by the caller would otherwise keep serving the
+    # pre-write ledger totals (e.g. add_payment -> update_payment_status)
+    if type(instance).tender.is_cached(instance):
+        instance.tender._state.fields_cache.pop('ledger', None)
+
+
+def _refresh_payment_status(tender_ids):
+    """Store the payment_status a payment write leaves ``tender_ids`` with, announcing each change."""
+    stale = list(Tender.objects.filter(pk__in=tender_ids).stale_payment_status())
+    if not stale:
+        return
+    Tender.objects.filter(pk__in=[tender.pk for tender in stale]).refresh_payment_status()
+    for tender in stale:
+        previous, tender.payment_status = tender.payment_status, tender.expected_status
+        events.status_changed(tender, previous)
+
+
+def _deleted_directly(sender, origin):
+    """True unless the row is going away as part of a tender/company cascade."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is sender
+
+
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=Payment)
+def remember_previous_amount(sender, instance, **kwargs):
+    instance._ledger_previous = None
+    if instance.pk and not instance._state.adding:
+        fields = ['tender_id', 'amount', 'date'] + (['category__name'] if sender is Expense else [])
+        instance._ledger_previous = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Payment)
+def apply_save_to_ledger(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_ledger_previous', None)
+    touched = {instance.tender_id}
+    if previous is not None:
+        old_tender_id, old_amount, *old_cell = previous
+        TenderLedger.objects.apply(old_tender_id, **_ledger_kwargs(sender, old_amount, -1))
+        MonthlyRollup.objects.apply(
+            *_rollup_key(sender, old_tender_id, *old_cell), **_ledger_kwargs(sender, old_amount, -1)
+        )
+        touched.add(old_tender_id)
+    TenderLedger.objects.apply(instance.tender_id, **_ledger_kwargs(sender, instance.amount, 1))
+    MonthlyRollup.objects.apply(
+        *_rollup_cell(sender, instance), **_ledger_kwargs(sender, instance.amount, 1)
+    )
+    _forget_cached_ledger(instance)
+
+    if not raw:
+        if sender is Payment:
+            _refresh_payment_status(touched)
+        events.tenders_changed(touched)
+        if created and sender is Expense:
+            events.expense_added(instance)
+
+
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Payment)
+def apply_delete_to_ledger(sender, instance, origin=None, **kwargs):
+    # the ledger row is cascaded away together with its tender
+    if _deleted_directly(sender, origin):
+        TenderLedger.objects.apply(instance.tender_id, **_ledger_kwargs(sender, instance.amount, -1))
+        MonthlyRollup.objects.apply(
+            *_rollup_cell(sender, instance), **_ledger_kwargs(sender, instance.amount, -1)
+        )
+        _forget_cached_ledger(instance)
+        if sender is Payment:
+            _refresh_payment_status([instance.tender_id])
+        events.tenders_changed([instance.tender_id])
+
+
+@receiver(post_save, sender=Tender)
+def create_ledger(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        TenderLedger.objects.create(tender=instance)
+
+
+@receiver(post_save, sender=Tender)
+def move_rollup_to_company(sender, instance, created, raw=False, **kwargs):
+    # the rollup copies the tender's company; follow a reassignment
+    if created:
+        return
+    moved = MonthlyRollup.objects.filter(tender=instance).exclude(company_id=instance.company_id)
+    previous = set(moved.values_list('company_id', 'month').distinct())
+    if previous:
+        moved.update(company_id=instance.company_id)
+        MonthlyRollup.objects.refresh_upper(
+            {company_id for company_id, month in previous} | {instance.company_id},
+            {month for company_id, month in previous},
+        )
+
+
+@receiver(pre_delete, sender=Tender)
+def remember_rollup_months(sender, instance, **kwargs):
+    instance._rollup_months = set(MonthlyRollup.objects.filter(tender=instance).values_list('month', flat=True))
+
+
+@receiver(post_delete, sender=Tender)
+def refresh_rollup_after_delete(sender, instance, **kwargs):
+    # the tender's own rows cascaded away; the company and overall rows
+    # above them (also after a company delete) are summed again
+    MonthlyRollup.objects.refresh_upper({instance.company_id}, getattr(instance, '_rollup_months', set()))
+
+
+@receiver(pre_save, sender=ExpenseCategory)
+def remember_previous_category_name(sender, instance, **kwargs):
+    instance._previous_name = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_name = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=ExpenseCategory)
+def rename_rollup_category(sender, instance, **kwargs):
+    # the rollup is keyed by category name; follow a rename
+    previous = getattr(instance, '_previous_name', None)
+    if previous is not None and previous != instance.name:
+        MonthlyRollup.objects.filter(category=previous).update(category=instance.name)
+
+
+@receiver(pre_save, sender=Tender)
+def store_payment_status(sender, instance, raw=False, **kwargs):
+    # payment_status is derived, not edited: a changed total_value can move
+    # it as much as a payment can (payments update it in _refresh_payment_status)
+    if raw:
+        return
+    if instance._state.adding:
+        instance.payment_status = 'Pending'
+    else:
+        instance._state.fields_cache.pop('ledger', None)
+        instance.update_payment_status()
+
+
+# ----- Live events (see tracker.events) -----
+
+@receiver(pre_save, sender=Tender)
+def remember_previous_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if settings.LIVE_EVENTS_ENABLED and instance.pk and not instance._state.adding:
+        instance._previous_status = (
+            sender.objects.filter(pk=instance.pk).values_list('payment_status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Tender)
+def record_tender_event(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    events.tenders_changed([instance.pk])
+    previous = getattr(instance, '_previous_status', None)
+    if previous is not None and previous != instance.payment_status:
+        events.status_changed(instance, previous)
+
+
+@receiver(post_delete, sender=Tender)
+def record_tender_removed(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(sender, origin):
+        events.tender_removed(instance.pk)
+
+
+@receiver(post_delete, sender=Company)
+def record_company_removed(sender, instance, **kwargs):
+    # its tenders went with it; cheaper for clients to refetch
+    events.reload('company deleted')
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Tender)
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=ExpenseCategory)
+@receiver(post_save, sender=Payment)
+def bump_data_version_on_save(sender, **kwargs):
+    DataVersion.objects.bump()
+
+
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Tender)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Payment)
+def bump_data_version_on_delete(sender, origin=None, **kwargs):
+    # one bump for the object the user deleted, not one per cascaded row
+    if _deleted_directly(sender, origin):
+        DataVersion.objects.bump()
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    sqlite.apply_profile(connection, settings.SQLITE_PROFILE)
@@ -0,0 +1,118 @@
+"""
+SQLite connection profile and maintenance.
+
+apply_profile() runs the PRAGMAs in ``settings.SQLITE_PROFILE`` on every
+new SQLite connection (from the ``connection_created`` receiver in
+tracker.signals). The defaults in settings relax fsyncs to WAL checkpoints
+and wait for a busy lock instead of failing with "database is locked".
+Together with CONN_MAX_AGE, which under WSGI can keep connections (and
+their page cache) across requests, this is the profile for running the
+tracker on one SQLite file with several workers.
+
+The journal mode is different: WAL, which stops readers and the writer
+blocking each other, is stored in the database file itself. It is switched
+once, explicitly, by ``manage.py sqlite_journal_mode`` (set_journal_mode()),
+never by merely connecting, and ``manage.py check --deploy`` warns while
+the file is not in ``settings.SQLITE_JOURNAL_MODE``.
+
+optimize() is the periodic maintenance run by ``manage.py optimize_db``.
+"""
+import re
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection as default_connection
+
+from .search import TABLE as SEARCH_TABLE
+
+# per-connection settings; journal_mode is persistent and set separately
+PRAGMAS = {'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store'}
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+VALUE = re.compile(r'-?\d+|[A-Za-z]+')
+
+# the journal mode Django leaves a new database in, for comparisons (see bench_sqlite)
+DJANGO_JOURNAL_MODE = 'DELETE'
+
+
+def check_profile(profile):
+    for name, value in profile.items():
+        if name == 'journal_mode':
+            raise ImproperlyConfigured(
+                "SQLITE_PROFILE: journal_mode is stored in the database file; "
+                "set SQLITE_JOURNAL_MODE and run manage.py sqlite_journal_mode"
+            )
+        if name not in PRAGMAS:
+            raise ImproperlyConfigured(f"SQLITE_PROFILE: unsupported PRAGMA {name!r}")
+        if not VALUE.fullmatch(str(value)):
+            raise ImproperlyConfigured(f"SQLITE_PROFILE: invalid value {value!r} for {name}")
+
+
+def apply_profile(connection, profile):
+    """Run ``PRAGMA name = value`` for each entry of ``profile`` on a SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    check_profile(profile)
+    # straight to the driver: these are not part of any request's queries
+    raw = connection.connection
+    for name, value in profile.items():
+        raw.execute(f"PRAGMA {name} = {value}")
+
+
+def journal_mode(connection=default_connection):
+    """The database file's journal mode, lowercase (e.g. 'wal')."""
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        return cursor.fetchone()[0].lower()
+
+
+def set_journal_mode(mode, connection=default_connection):
+    """
+    Switch the database file to journal ``mode``; it stays in that mode for
+    every later connection. Takes an exclusive lock, and leaving WAL needs
+    the only connection to the file. Returns the mode now in effect.
+    """
+    if str(mode).upper() not in JOURNAL_MODES:
+        raise ValueError(f"unknown journal mode {mode!r}")
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA journal_mode = {str(mode).upper()}")
+        return cursor.fetchone()[0].lower()
+
+
+def current_profile(connection=default_connection):
+    """The live value of every PRAGMA the profile manages, and the journal mode."""
+    with connection.cursor() as cursor:
+        values = {}
+        for name in sorted(PRAGMAS | {'journal_mode'}):
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            # e.g. mmap_size has no value for an in-memory database
+            values[name] = row[0] if row else None
+        return values
+
+
+def optimize(full=False, connection=default_connection):
+    """
+    Refresh the query planner's statistics and tidy the WAL and search index.
+
+    By default this is ``PRAGMA optimize``, which only re-analyzes tables
+    whose statistics are missing or stale, with a row limit per index so it
+    stays cheap on large tables. ``full`` runs a complete ANALYZE instead.
+    Returns the steps run, with their durations in seconds.
+    """
+    steps = [('analyze', 'ANALYZE')] if full else [
+        ('analysis_limit', 'PRAGMA analysis_limit = 1000'),
+        ('optimize', 'PRAGMA optimize'),
+    ]
+    steps += [
+        ('search_index', f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"),
+        # fold the WAL back into the database file and shrink it
+        ('wal_checkpoint', 'PRAGMA wal_checkpoint(TRUNCATE)'),
+    ]
+    timings = []
+    with connection.cursor() as cursor:
+        for name, sql in steps:
+            started = time.perf_counter()
+            cursor.execute(sql)
+            cursor.fetchall()
+            timings.append((name, time.perf_counter() - started))
+    return timings
@@ -0,0 +1,111 @@
+"""
+Static files with hashed names and precompressed variants.
+
+CompressedManifestStaticFilesStorage is Django's ManifestStaticFilesStorage
+(``collectstatic`` copies every file to a name containing a hash of its
+content and rewrites CSS references to match) that also writes ``.br`` and
+``.gz`` siblings of each compressible file, at the highest compression
+levels since this happens once per deploy. ``manifest_strict`` is off, so a
+file missing from the manifest is hashed on the fly, and one that was never
+collected is linked by its plain name, instead of failing the page that
+links to it.
+
+serve() sends those files: the precompressed variant the client accepts,
+and, for hashed names, a year-long immutable Cache-Control, since a changed
+file gets a new name.
+"""
+import mimetypes
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import STATIC_QUALITY, accepted_encodings, available_encodings, compress, is_compressible
+
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+# ManifestStaticFilesStorage inserts the first 12 hex digits of an MD5
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def content_type(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+    # a compressed copy must save at least this fraction to be kept
+    min_saving = 0.05
+
+    def url(self, name, force=False):
+        try:
+            return super().url(name, force)
+        except ValueError:
+            # not collected (yet): link the plain name rather than fail the page
+            return FileSystemStorage.url(self, name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        written = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if not isinstance(processed, Exception) and hashed_name:
+                written.update((name, hashed_name))
+        if dry_run:
+            return
+        for name in sorted(written):
+            self.compress_file(name)
+
+    def compress_file(self, name):
+        if not is_compressible(content_type(name)):
+            return
+        with self.open(name) as original:
+            data = original.read()
+        for encoding in available_encodings():
+            target = name + SUFFIXES[encoding]
+            if self.exists(target):
+                self.delete(target)
+            compressed = compress(data, encoding, quality=STATIC_QUALITY)
+            if len(compressed) <= len(data) * (1 - self.min_saving):
+                self._save(target, ContentFile(compressed))
+
+
+def serve(request, path):
+    """A file under STATIC_ROOT, precompressed when possible, with long cache lifetimes for hashed names."""
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    if not fullpath.is_file() or fullpath.suffix in ('.br', '.gz') and fullpath.with_suffix('').is_file():
+        raise Http404(path)
+
+    stat = fullpath.stat()
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    mimetype = content_type(fullpath.name)
+    variant, encoding = fullpath, None
+    if is_compressible(mimetype):
+        for candidate in accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING')):
+            compressed = fullpath.with_name(fullpath.name + SUFFIXES[candidate])
+            if compressed.is_file():
+                variant, encoding = compressed, candidate
+                break
+
+    response = FileResponse(variant.open('rb'), content_type=mimetype)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if is_compressible(mimetype):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    # unhashed names can change in place: let browsers keep them only briefly
+    response['Cache-Control'] = IMMUTABLE if HASHED_NAME.search(path) else 'public, max-age=60'
+    return response
@@ -1,3 +1,1694 @@
-from django.test import TestCase
+import gzip
+import json
+import re
+import sys
+import tempfile
+import threading
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+import brotli
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from papers.models import PaperEntry
+from projections.models import ProjectRecord
+
+from .aio import run_concurrently
+from .checks import check_journal_mode
+from .compression import CompressionMiddleware, accepted_encodings
+from .encoders import ENCODERS
+from .events import MAX_TENDER_EVENTS, tenders_changed
+from .forms import TenderForm
+from .middleware import QueryTimingMiddleware
+from .models import ChangeEvent, Company, DataVersion, ExpenseCategory, MonthlyRollup, Tender, Expense, Payment, TenderLedger
+from .pagination import EstimatedCountPaginator, paginate_by_date
+from .search import match_expression, prefix_bounds, prefix_search
+from .sqlite import apply_profile, current_profile, journal_mode, set_journal_mode
+from .staticfiles import serve as serve_static
+from .views import live_updates_enabled
+
+
+def expense_category(name):
+    return ExpenseCategory.objects.for_name(name)
+
+
+def make_tender(company, tender_no, total_value, expenses=(), payments=()):
+    tender = Tender.objects.create(
+        tender_no=tender_no,
+        company=company,
+        client_name=f"Client {tender_no}",
+        total_value=Decimal(total_value),
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 12, 31),
+    )
+    for amount in expenses:
+        Expense.objects.create(tender=tender, category=expense_category('Materials'), amount=Decimal(amount))
+    for amount in payments:
+        Payment.objects.create(tender=tender, amount=Decimal(amount))
+    return tender
+
+
+class ApiTendersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        cls.over = make_tender(cls.company, 'T-1', '100.00', expenses=['80.00', '50.00'], payments=['40.00'])
+        cls.paid = make_tender(cls.company, 'T-2', '200.00', expenses=['20.00'], payments=['150.00', '50.00'])
+        cls.empty = make_tender(cls.company, 'T-3', '300.00')
+
+    def fetch(self, **params):
+        response = self.client.get(reverse('tracker:api_tenders'), params)
+        self.assertEqual(response.status_code, 200)
+        return {t['tender_no']: t for t in response.json()['tenders']}
+
+    def test_computed_fields(self):
+        rows = self.fetch()
+
+        over = rows['T-1']
+        self.assertEqual(over['total_expenses'], 130.0)
+        self.assertEqual(over['total_paid'], 40.0)
+        self.assertEqual(over['balance'], 60.0)
+        self.assertEqual(over['profit'], -30.0)
+        self.assertEqual(over['expense_overrun'], 30.0)
+        self.assertEqual(over['payment_status'], 'Partially Paid')
+        self.assertEqual(over['expense_count'], 2)
+        self.assertEqual(over['payment_count'], 1)
+
+        self.assertEqual(rows['T-2']['payment_status'], 'Paid')
+        self.assertEqual(rows['T-2']['expense_overrun'], 0.0)
+
+        empty = rows['T-3']
+        self.assertEqual(empty['total_expenses'], 0.0)
+        self.assertEqual(empty['total_paid'], 0.0)
+        self.assertEqual(empty['payment_status'], 'Pending')
+        self.assertEqual(empty['expense_count'], 0)
+
+    def test_query_count_is_constant(self):
+        # one query for the ETag data version, one for the tenders
+        with self.assertNumQueries(2):
+            self.fetch()
+
+        for i in range(10):
+            make_tender(self.company, f'X-{i}', '10.00', expenses=['1.00'], payments=['1.00'])
+
+        with self.assertNumQueries(2):
+            rows = self.fetch()
+        self.assertEqual(len(rows), 13)
+
+
+class ApiTendersByCompanyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Company.objects.create(name='Acme')
+        cls.beta = Company.objects.create(name='Beta')
+        cls.idle = Company.objects.create(name='Idle')
+        make_tender(cls.acme, 'A-1', '100.00', expenses=['150.00'], payments=['100.00'])
+        make_tender(cls.acme, 'A-2', '100.00', expenses=['20.00'], payments=['10.00'])
+        make_tender(cls.beta, 'B-1', '50.00', expenses=['70.00'])
+
+    def fetch(self, **params):
+        response = self.client.get(reverse('tracker:api_tenders_by_company'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_rollup(self):
+        with self.assertNumQueries(3):
+            data = self.fetch()
+        self.assertEqual(data['labels'], ['Acme', 'Beta', 'Idle'])
+        self.assertEqual(data['values'], [200.0, 50.0, 0.0])
+        self.assertEqual(data['paids'], [110.0, 0.0, 0.0])
+        self.assertEqual(data['expenses'], [170.0, 70.0, 0.0])
+        self.assertEqual(data['profits'], [30.0, -20.0, 0.0])
+        # overrun is summed per tender, not derived from company totals
+        self.assertEqual(data['overruns'], [50.0, 20.0, 0.0])
+
+    def test_top_n_folds_remainder_into_others(self):
+        data = self.fetch(top=1)
+        self.assertEqual(data['labels'], ['Acme', 'Others'])
+        self.assertEqual(data['values'], [200.0, 50.0])
+        self.assertEqual(data['overruns'], [50.0, 20.0])
+
+    def test_invalid_top(self):
+        response = self.client.get(reverse('tracker:api_tenders_by_company'), {'top': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TenderLedgerTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme')
+        self.tender = make_tender(self.company, 'L-1', '100.00')
+        self.other = make_tender(self.company, 'L-2', '100.00')
+
+    def ledger(self, tender):
+        return TenderLedger.objects.get(tender=tender)
+
+    def test_created_with_tender(self):
+        ledger = self.ledger(self.tender)
+        self.assertEqual(ledger.expense_sum, 0)
+        self.assertEqual(ledger.payment_count, 0)
+
+    def test_tracks_create_update_delete(self):
+        expense = Expense.objects.create(tender=self.tender, category=expense_category('Fuel'), amount=Decimal('30.00'))
+        Payment.objects.create(tender=self.tender, amount=Decimal('25.00'))
+        ledger = self.ledger(self.tender)
+        self.assertEqual((ledger.expense_sum, ledger.expense_count), (Decimal('30.00'), 1))
+        self.assertEqual((ledger.payment_sum, ledger.payment_count), (Decimal('25.00'), 1))
+
+        expense.amount = Decimal('45.00')
+        expense.save()
+        self.assertEqual(self.ledger(self.tender).expense_sum, Decimal('45.00'))
+
+        expense.tender = self.other
+        expense.save()
+        self.assertEqual(self.ledger(self.tender).expense_count, 0)
+        self.assertEqual(self.ledger(self.other).expense_sum, Decimal('45.00'))
+
+        expense.delete()
+        self.assertEqual(self.ledger(self.other).expense_count, 0)
+        self.assertEqual(list(TenderLedger.objects.mismatches()), [])
+
+    def test_add_payment_view_updates_status(self):
+        response = self.client.post(reverse('tracker:add_payment'), {'tender': self.tender.pk, 'amount': '40'})
+        self.assertEqual(response.status_code, 200)
+        self.tender.refresh_from_db()
+        self.assertEqual(self.tender.payment_status, 'Partially Paid')
+        self.assertEqual(self.tender.total_paid(), Decimal('40.00'))
+
+    def test_tender_delete_cascades(self):
+        Expense.objects.create(tender=self.tender, category=expense_category('Fuel'), amount=Decimal('5.00'))
+        self.tender.delete()
+        self.assertFalse(TenderLedger.objects.filter(tender_id=self.tender.pk).exists())
+
+    def test_rebuild_repairs_drift(self):
+        Expense.objects.create(tender=self.tender, category=expense_category('Fuel'), amount=Decimal('10.00'))
+        TenderLedger.objects.filter(tender=self.tender).update(expense_sum=Decimal('999.00'), last_activity=None)
+        TenderLedger.objects.filter(tender=self.other).delete()
+        self.assertCountEqual(TenderLedger.objects.mismatches(), [self.tender.pk, self.other.pk])
+
+        started = timezone.now()
+        call_command('rebuild_ledger', stdout=StringIO())
+
+        self.assertEqual(self.ledger(self.tender).expense_sum, Decimal('10.00'))
+        self.assertEqual(list(TenderLedger.objects.mismatches()), [])
+        # existing rows get the timestamp too, not just the inserted ones
+        for tender in (self.tender, self.other):
+            self.assertGreaterEqual(self.ledger(tender).last_activity, started)
+
+    def test_verify_only_reports_drift(self):
+        TenderLedger.objects.filter(tender=self.tender).update(payment_count=3)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_ledger', verify_only=True, stdout=StringIO())
+
+
+class ConditionalApiTests(TestCase):
+    urls = ['api_tenders', 'api_summary', 'api_tenders_by_company', 'api_expenses']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        cls.tender = make_tender(cls.company, 'E-1', '100.00', expenses=['10.00'])
+
+    def test_not_modified_without_running_the_view(self):
+        for name in self.urls:
+            url = reverse(f'tracker:{name}')
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertIn('no-cache', first['Cache-Control'])
+
+            with self.assertNumQueries(1):
+                again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(again.status_code, 304)
+
+    def test_etag_depends_on_filters(self):
+        url = reverse('tracker:api_tenders')
+        plain = self.client.get(url)['ETag']
+        filtered = self.client.get(url, {'company': self.company.pk})['ETag']
+        self.assertNotEqual(plain, filtered)
+
+    def test_writes_change_the_etag(self):
+        url = reverse('tracker:api_tenders')
+        etag = self.client.get(url)['ETag']
+
+        version = DataVersion.objects.current()
+        Payment.objects.create(tender=self.tender, amount=Decimal('5.00'))
+        self.assertEqual(DataVersion.objects.current(), version + 1)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_cascade_delete_bumps_once(self):
+        version = DataVersion.objects.current()
+        self.company.delete()
+        self.assertEqual(DataVersion.objects.current(), version + 1)
+
+
+class ExpenseExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Company.objects.create(name='Acme')
+        cls.beta = Company.objects.create(name='Beta')
+        cls.tender = make_tender(cls.acme, 'X-1', '100.00', expenses=['10.00', '20.00'])
+        make_tender(cls.beta, 'X-2', '100.00', expenses=['5.00'])
+        Expense.objects.filter(amount=Decimal('10.00')).update(date=date(2024, 3, 1))
+
+    def export(self, **params):
+        response = self.client.get(reverse('tracker:expense_export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        lines = self.export(format='csv').splitlines()
+        self.assertEqual(lines[0], 'id,date,tender_id,tender_no,company,category,description,amount')
+        self.assertEqual(len(lines), 4)
+
+    def test_ndjson_with_filters(self):
+        body = self.export(format='ndjson', company=self.acme.pk, date_from='2025-01-01')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r['amount'] for r in rows], ['20.00'])
+        self.assertEqual(rows[0]['tender_no'], 'X-1')
+        self.assertEqual(rows[0]['company'], 'Acme')
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('tracker:expense_export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_malformed_dates(self):
+        for params in ({'date_from': '2020-13-45'}, {'date_from': 'abc'}, {'date_to': '2025-02-30'}):
+            with self.subTest(**params):
+                response = self.client.get(reverse('tracker:expense_export'), params)
+                self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        cls.tender = make_tender(cls.company, 'P-1', '1000.00', expenses=['1.00'] * 7)
+        # several rows share a date so the id tie-breaker matters
+        for i, expense in enumerate(Expense.objects.order_by('id')):
+            Expense.objects.filter(pk=expense.pk).update(date=date(2025, 1, 1 + i // 3))
+        cls.expected = list(Expense.objects.order_by('-date', '-id').values_list('id', flat=True))
+
+    def walk(self, per_page):
+        seen, cursor = [], None
+        while True:
+            page = paginate_by_date(Expense.objects.all(), cursor=cursor, per_page=per_page)
+            seen.extend(e.id for e in page)
+            if not page.has_next:
+                return seen, page
+            cursor = page.next_cursor
+
+    def test_forward_walk_covers_every_row_once(self):
+        seen, _ = self.walk(per_page=2)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_prior_page(self):
+        first = paginate_by_date(Expense.objects.all(), per_page=3)
+        second = paginate_by_date(Expense.objects.all(), cursor=first.next_cursor, per_page=3)
+        back = paginate_by_date(Expense.objects.all(), cursor=second.prev_cursor, per_page=3)
+        self.assertEqual([e.id for e in back], [e.id for e in first])
+        self.assertFalse(first.has_previous)
+        self.assertTrue(second.has_previous)
+
+    def test_api_expenses_pages(self):
+        url = reverse('tracker:api_expenses')
+        first = self.client.get(url, {'limit': 4}).json()
+        self.assertEqual([e['id'] for e in first['expenses']], self.expected[:4])
+        rest = self.client.get(url, {'limit': 4, 'cursor': first['next_cursor']}).json()
+        self.assertEqual([e['id'] for e in rest['expenses']], self.expected[4:])
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_api_expenses_rejects_bad_cursor(self):
+        response = self.client.get(reverse('tracker:api_expenses'), {'cursor': 'nonsense'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_expenses_rejects_malformed_dates(self):
+        for name in ('api_expenses', 'api_expenses_async'):
+            for params in ({'date_from': '2020-13-45'}, {'date_to': 'abc'}):
+                with self.subTest(name, **params):
+                    response = self.client.get(reverse(f'tracker:{name}'), params)
+                    self.assertEqual(response.status_code, 400)
+                    key = next(iter(params))
+                    self.assertEqual(response.json(), {'error': f'Invalid {key}: expected YYYY-MM-DD'})
+
+    def test_expense_list_totals(self):
+        response = self.client.get(reverse('tracker:expense_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['expense_count'], 7)
+        self.assertEqual(response.context['total_amount'], Decimal('7.00'))
+        self.assertEqual(len(response.context['expenses']), 7)
+
+        response = self.client.get(reverse('tracker:expense_list'), {'date_from': '2025-01-03'})
+        self.assertEqual(response.context['expense_count'], 1)
+
+    def test_expense_list_ignores_malformed_dates(self):
+        response = self.client.get(reverse('tracker:expense_list'),
+                                   {'date_from': '2020-13-45', 'date_to': '2025-01-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['filter_errors'], ['Invalid date_from: expected YYYY-MM-DD'])
+        self.assertContains(response, 'Invalid date_from')
+        # the valid filter still applies
+        self.assertEqual(response.context['expense_count'], 3)
+        self.assertEqual(response.context['date_from'], '')
+        self.assertNotIn('date_from', response.context['filter_query'])
+
+
+class ImportLedgerTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme')
+        self.tender = make_tender(self.company, 'I-1', '100.00')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = Path(self.tmp.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def test_csv_import_is_idempotent(self):
+        path = self.write('rows.csv', (
+            "kind,tender,amount,date,category,description,note\n"
+            "expense,I-1,30.00,2024-05-01,Fuel,Diesel,\n"
+            "payment,I-1,100.00,2024-05-02,,,Final\n"
+            "expense,NOPE,1.00,2024-05-01,Fuel,,\n"
+        ))
+        out, err = StringIO(), StringIO()
+        call_command('import_ledger', path, stdout=out, stderr=err)
+        self.assertIn('2 created', out.getvalue())
+        self.assertIn("unknown tender 'NOPE'", err.getvalue())
+
+        expense = Expense.objects.get(tender=self.tender)
+        self.assertEqual(expense.date, date(2024, 5, 1))
+        self.tender.refresh_from_db()
+        self.assertEqual(self.tender.payment_status, 'Paid')
+        self.assertEqual(self.tender.total_expenses(), Decimal('30.00'))
+        self.assertEqual(list(TenderLedger.objects.mismatches()), [])
+
+        out = StringIO()
+        call_command('import_ledger', path, stdout=out, stderr=StringIO())
+        self.assertIn('0 created, 2 duplicates skipped', out.getvalue())
+        self.assertEqual(Expense.objects.count(), 1)
+
+    def test_jsonl_dry_run_writes_nothing(self):
+        path = self.write('rows.jsonl', json.dumps(
+            {'kind': 'payment', 'tender': self.tender.pk, 'amount': '5', 'date': '2024-01-01'}) + '\n')
+        out = StringIO()
+        call_command('import_ledger', path, dry_run=True, stdout=out)
+        self.assertIn('1 valid, 0 invalid', out.getvalue())
+        self.assertFalse(Payment.objects.exists())
+
+    def test_strict_aborts(self):
+        path = self.write('rows.csv', "kind,tender,amount\nrefund,I-1,1\n")
+        with self.assertRaises(CommandError):
+            call_command('import_ledger', path, strict=True, stdout=StringIO())
+
+    def test_strict_abort_keeps_committed_batches_consistent(self):
+        path = self.write('rows.csv', (
+            "kind,tender,amount,date\n"
+            "payment,I-1,100.00,2024-05-02\n"
+            "refund,I-1,1,2024-05-03\n"
+        ))
+        with self.assertRaises(CommandError):
+            call_command('import_ledger', path, strict=True, batch_size=1, stdout=StringIO())
+        self.tender.refresh_from_db()
+        self.assertEqual(self.tender.payment_status, 'Paid')
+        self.assertEqual(self.tender.ledger.payment_sum, Decimal('100.00'))
+        self.assertEqual(list(TenderLedger.objects.mismatches()), [])
+
+
+class ApiBatchTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme')
+        self.a = make_tender(self.company, 'B-1', '100.00')
+        self.b = make_tender(self.company, 'B-2', '50.00')
+
+    def post(self, body):
+        return self.client.post(reverse('tracker:api_batch'), json.dumps(body), content_type='application/json')
+
+    def test_mixed_batch(self):
+        response = self.post({
+            'items': [
+                {'kind': 'expense', 'tender': 'B-1', 'amount': '30.00', 'category': 'Fuel', 'date': '2024-02-01'},
+                {'kind': 'payment', 'tender': self.b.pk, 'amount': '50.00'},
+                {'kind': 'payment', 'tender': 'missing', 'amount': '1.00'},
+            ],
+            'payments': [{'tender': 'B-1', 'amount': '10.00'}],
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertFalse(data['success'])
+        self.assertEqual(data['created'], 3)
+        self.assertEqual([r['status'] for r in data['results']], ['created', 'created', 'error', 'created'])
+        self.assertEqual(Expense.objects.get(pk=data['results'][0]['id']).date, date(2024, 2, 1))
+
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.assertEqual(self.a.payment_status, 'Partially Paid')
+        self.assertEqual(self.b.payment_status, 'Paid')
+        self.assertEqual(self.a.total_expenses(), Decimal('30.00'))
+        self.assertEqual(list(TenderLedger.objects.mismatches()), [])
+
+    def test_repeated_items_are_kept_unless_skipping_duplicates(self):
+        item = {'kind': 'payment', 'tender': 'B-1', 'amount': '5.00', 'date': '2024-01-01'}
+        self.assertEqual(self.post({'items': [item, item]}).json()['created'], 2)
+
+        data = self.post({'items': [item, item], 'skip_duplicates': True}).json()
+        self.assertEqual([r['status'] for r in data['results']], ['created', 'duplicate'])
+        data = self.post({'items': [item], 'skip_duplicates': True}).json()
+        self.assertEqual(data['results'][0]['status'], 'duplicate')
+
+    def test_rejects_bad_payloads(self):
+        self.assertEqual(self.post({}).status_code, 400)
+        response = self.client.post(reverse('tracker:api_batch'), 'nope', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('tracker:api_batch')).status_code, 405)
+        for key in ('items', 'expenses', 'payments'):
+            self.assertEqual(self.post({key: 5}).status_code, 400)
+            self.assertEqual(self.post({key: {'kind': 'payment'}}).status_code, 400)
+
+    def test_overlong_fields_fail_only_their_item(self):
+        data = self.post({'items': [
+            {'kind': 'expense', 'tender': 'B-1', 'amount': '1.00', 'category': 'x' * 256},
+            {'kind': 'payment', 'tender': 'B-1', 'amount': '1.00', 'note': 'n' * 256},
+            {'kind': 'payment', 'tender': 'B-1', 'amount': '2.00', 'note': 12},
+        ]}).json()
+        self.assertEqual([r['status'] for r in data['results']], ['error', 'error', 'created'])
+        self.assertEqual(data['results'][0]['error'], 'category is longer than 255 characters')
+        self.assertEqual(data['results'][1]['error'], 'note is longer than 255 characters')
+        self.assertEqual(Payment.objects.get().note, '12')
+
+    def test_non_object_entries_keep_their_index(self):
+        data = self.post({
+            'expenses': [42, {'tender': 'B-1', 'amount': '3.00', 'category': 'Fuel'}],
+            'payments': ['x', {'tender': 'B-2', 'amount': '4.00'}],
+        }).json()
+        self.assertEqual(
+            [(r['index'], r['status'], r.get('kind') or r['error']) for r in data['results']],
+            [(0, 'error', 'expected an object'), (1, 'created', 'expense'),
+             (2, 'error', 'expected an object'), (3, 'created', 'payment')],
+        )
+
+
+class TenderSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Company.objects.create(name='Acme Roofing')
+        cls.zed = Company.objects.create(name='Zed Supplies')
+        cls.bus = make_tender(cls.acme, 'NTC/BS/1', '10.00')
+        cls.road = make_tender(cls.zed, 'RDA/22', '10.00')
+        Expense.objects.create(tender=cls.road, category=expense_category('Fuel'), amount=1, description='Diesel for graders')
+
+    def search(self, q):
+        response = self.client.get(reverse('tracker:api_tenders'), {'q': q})
+        return [t['tender_no'] for t in response.json()['tenders']]
+
+    def test_prefix_matches_each_field(self):
+        self.assertEqual(self.search('ntc'), ['NTC/BS/1'])
+        self.assertEqual(self.search('Client RDA'), ['RDA/22'])
+        self.assertEqual(self.search('roof'), ['NTC/BS/1'])
+        self.assertEqual(self.search('grader'), ['RDA/22'])
+        self.assertEqual(self.search('nothing'), [])
+
+    def test_index_follows_writes(self):
+        self.zed.name = 'Northern Haulage'
+        self.zed.save()
+        self.assertEqual(self.search('haulage'), ['RDA/22'])
+
+        self.road.expenses.all().delete()
+        self.assertEqual(self.search('diesel'), [])
+
+        self.bus.client_name = 'Ministry of Transport'
+        self.bus.save()
+        self.assertEqual(self.search('ministry'), ['NTC/BS/1'])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM tracker_search")
+        self.assertEqual(self.search('roof'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('roof'), ['NTC/BS/1'])
+
+    def test_admin_search(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:tracker_tender_changelist'), {'q': 'diesel'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t.pk for t in response.context['cl'].result_list], [self.road.pk])
+
+    def test_match_expression(self):
+        self.assertEqual(match_expression('nam "bus'), '"nam"* "bus"*')
+        self.assertEqual(match_expression('  '), '')
+
+
+class QueryTimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        for i in range(6):
+            make_tender(cls.company, f'Q-{i}', '10.00')
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('tracker:api_tenders'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="2 queries"')
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('view;dur=', timing)
+
+    @override_settings(QUERY_TIMING_HEADER=False)
+    def test_header_only_for_staff_unless_enabled(self):
+        url = reverse('tracker:api_tenders')
+        self.assertNotIn('Server-Timing', self.client.get(url))
+        self.client.force_login(User.objects.create_user('clerk', password='pw'))
+        self.assertNotIn('Server-Timing', self.client.get(url))
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        self.assertIn('Server-Timing', self.client.get(url))
+
+    @override_settings(QUERY_TIMING_HEADER=False)
+    async def test_header_only_for_staff_under_asgi(self):
+        url = reverse('tracker:api_tenders_async')
+        self.assertNotIn('Server-Timing', await self.async_client.get(url))
+        staff = await User.objects.acreate_user('staff', password='pw', is_staff=True)
+        await self.async_client.aforce_login(staff)
+        self.assertIn('Server-Timing', await self.async_client.get(url))
+
+    def test_template_time_is_measured(self):
+        response = self.client.get(reverse('tracker:expense_list'))
+        duration = float(re.search(r'tpl;dur=([\d.]+)', response['Server-Timing']).group(1))
+        self.assertGreater(duration, 0)
+
+    def test_repeated_queries_are_reported_with_call_site(self):
+        def view(request):
+            # __str__ reads tender.company: one query per tender
+            return HttpResponse(', '.join(str(tender) for tender in Tender.objects.all()))
+
+        with self.assertLogs('tracker.timing', 'WARNING') as logs:
+            response = QueryTimingMiddleware(view)(RequestFactory().get('/tenders/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Repeated query', logs.output[0])
+        self.assertIn('tracker/tests.py', '\n'.join(logs.output))
+
+    def test_no_report_for_constant_query_views(self):
+        with self.assertNoLogs('tracker.timing', 'WARNING'):
+            self.client.get(reverse('tracker:api_tenders'))
+
+
+class BenchCommandTests(TestCase):
+    def seed(self, **options):
+        call_command(
+            'seed_bench', companies=5, tenders=30, expenses=400, payments=60, papers=6, projects=20,
+            days=120, stdout=StringIO(), **options,
+        )
+
+    def test_seed_bench(self):
+        self.seed()
+        self.assertEqual(Company.objects.count(), 5)
+        self.assertEqual(Tender.objects.count(), 30)
+        self.assertEqual(Expense.objects.count(), 400)
+        self.assertEqual(Payment.objects.count(), 60)
+        self.assertEqual(PaperEntry.objects.count(), 6)
+        self.assertEqual(ProjectRecord.objects.filter(year__gt=2000).count(), 20)
+        # rows fall inside their tender's window and the rollups are in step
+        for expense in Expense.objects.select_related('tender')[:50]:
+            self.assertTrue(expense.tender.start_date <= expense.date <= expense.tender.end_date)
+        self.assertEqual(list(TenderLedger.objects.mismatches()), [])
+        for tender in Tender.objects.all():
+            before = tender.payment_status
+            tender.update_payment_status()
+            self.assertEqual(tender.payment_status, before)
+
+    def test_seed_bench_refuses_populated_database(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.seed(append=True)
+        self.assertEqual(Tender.objects.count(), 60)
+
+    def test_bench_endpoints_report(self):
+        self.seed()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'report.json'
+            call_command('bench_endpoints', repeat=3, warmup=0, only=['api_'], output=output, stdout=StringIO())
+            report = json.loads(output.read_text())
+        self.assertEqual(report['rows']['tenders'], 30)
+        result = report['endpoints']['api_tenders']
+        self.assertEqual(result['status'], 200)
+        self.assertEqual(result['queries'], 2)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertGreater(result['peak_memory_kb'], 0)
+        self.assertNotIn('dashboard', report['endpoints'])
+
+    def test_bench_payloads_report(self):
+        self.seed()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'report.json'
+            call_command('bench_payloads', repeat=1, expense_limit=50, output=output, stdout=StringIO())
+            report = json.loads(output.read_text())
+        results, requests = report['results'], report['requests']
+        self.assertLess(results['api_tenders:columnar']['bytes'], results['api_tenders:values+json']['bytes'])
+        self.assertGreater(results['api_expenses:models']['serialize_ms_per_10k'], 0)
+        self.assertEqual(results['api_expenses:models']['rows'], results['api_expenses:values+json']['rows'])
+        self.assertLess(requests['api_tenders?format=columnar']['bytes'],
+                        requests['api_tenders?format=rows']['bytes'])
+
+    def test_bench_transfer_report(self):
+        self.seed()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'report.json'
+            call_command('bench_transfer', repeat=1, only=['api_tenders?columnar'], output=output,
+                         stdout=StringIO())
+            result = json.loads(output.read_text())['endpoints']['api_tenders?columnar']
+        self.assertEqual(result['gzip']['content_encoding'], 'gzip')
+        self.assertLess(result['gzip']['bytes'], result['identity']['bytes'])
+        self.assertLess(result['gzip']['slow-3g_ms'], result['identity']['slow-3g_ms'])
+
+
+@override_settings(LIVE_EVENTS_ENABLED=True, LIVE_EVENTS_MAX_DURATION=0, LIVE_EVENTS_POLL_INTERVAL=0)
+class LiveEventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Acme')
+        cls.tender = make_tender(cls.company, 'L-1', '100.00')
+        cls.mark = ChangeEvent.objects.order_by('-pk').first().pk
+        Expense.objects.create(tender=cls.tender, category=expense_category('Fuel'), amount=Decimal('30.00'))
+
+    def events_after(self, pk):
+        return list(ChangeEvent.objects.filter(pk__gt=pk).order_by('pk').values_list('kind', 'payload'))
+
+    def test_expense_write_records_totals_and_row(self):
+        (kind, tender), (kind2, expense) = self.events_after(self.mark)
+        self.assertEqual((kind, kind2), ('tender', 'expense'))
+        self.assertEqual(tender['id'], self.tender.pk)
+        self.assertEqual(tender['total_expenses'], 30.0)
+        self.assertEqual(expense['amount'], 30.0)
+        self.assertEqual(expense['tender'], 'L-1 - Acme')
+
+    def test_status_change(self):
+        mark = ChangeEvent.objects.order_by('-pk').first().pk
+        self.client.post(reverse('tracker:add_payment'), {'tender': self.tender.pk, 'amount': '40'})
+        status = [payload for kind, payload in self.events_after(mark) if kind == 'status']
+        self.assertEqual(status, [{
+            'id': self.tender.pk, 'tender_no': 'L-1', 'previous': 'Pending', 'payment_status': 'Partially Paid',
+        }])
+
+    def test_delete_and_bulk_events(self):
+        mark = ChangeEvent.objects.order_by('-pk').first().pk
+        tender_id = self.tender.pk
+        tenders_changed(range(1, MAX_TENDER_EVENTS + 2))
+        self.tender.delete()
+        self.assertEqual(
+            self.events_after(mark),
+            [('reload', {'tenders': MAX_TENDER_EVENTS + 1}), ('tender_removed', {'id': tender_id})],
+        )
+
+    async def stream(self, **headers):
+        response = await self.async_client.get(reverse('tracker:live_events'), headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+    async def test_stream_resumes_after_last_event_id(self):
+        body = await self.stream(**{'Last-Event-ID': str(self.mark)})
+        self.assertIn(f'id: {self.mark + 1}\nevent: tender\ndata: {{"id":{self.tender.pk},', body)
+        self.assertIn('event: expense\n', body)
+        self.assertNotIn(f'id: {self.mark}\n', body)
+
+    async def test_new_stream_starts_at_newest_event(self):
+        body = await self.stream()
+        self.assertEqual(body, 'retry: 3000\n\n')
+
+    async def test_off_by_default_and_under_wsgi(self):
+        url = reverse('tracker:live_events')
+        with self.settings(LIVE_EVENTS_ENABLED=False):
+            self.assertEqual((await self.async_client.get(url)).status_code, 204)
+        # the sync test client goes through the WSGI handler
+        self.assertEqual((await sync_to_async(self.client.get)(url)).status_code, 204)
+        self.assertFalse(live_updates_enabled(RequestFactory().get('/')))
+
+    def test_disabled_writes_record_nothing(self):
+        mark = ChangeEvent.objects.order_by('-pk').first().pk
+        with self.settings(LIVE_EVENTS_ENABLED=False), self.assertNumQueries(0):
+            tenders_changed([self.tender.pk])
+        with self.settings(LIVE_EVENTS_ENABLED=False):
+            Expense.objects.create(tender=self.tender, category=expense_category('Fuel'), amount=Decimal('5.00'))
+            self.client.post(reverse('tracker:add_payment'), {'tender': self.tender.pk, 'amount': '200'})
+            self.tender.delete()
+        self.assertEqual(self.events_after(mark), [])
+
+    async def test_pruned_events_ask_client_to_reload(self):
+        await ChangeEvent.objects.filter(pk__lte=self.mark).adelete()
+        body = await self.stream(**{'Last-Event-ID': '0'})
+        self.assertTrue(body.startswith('event: reload\ndata: {"reason":"expired"}'))
+
+
+class AsyncApiTests(TestCase):
+    pairs = [
+        ('api_tenders', {}),
+        ('api_tenders', {'q': 'acme', 'status': 'Partially Paid'}),
+        ('api_tenders_by_company', {'top': 1}),
+        ('api_summary', {}),
+        ('api_expenses', {'limit': 1}),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        acme = Company.objects.create(name='Acme')
+        other = Company.objects.create(name='Other')
+        make_tender(acme, 'A-1', '100.00', expenses=['80.00', '50.00'], payments=['40.00'])
+        make_tender(other, 'O-1', '300.00', expenses=['20.00'], payments=['300.00'])
+
+    async def test_same_payload_as_sync_views(self):
+        for name, params in self.pairs:
+            with self.subTest(name=name, params=params):
+                sync = await sync_to_async(self.client.get)(reverse(f'tracker:{name}'), params)
+                response = await self.async_client.get(reverse(f'tracker:{name}_async'), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), sync.json())
+                self.assertEqual(response['ETag'].split('-')[0], sync['ETag'].split('-')[0])
+
+    async def test_not_modified(self):
+        url = reverse('tracker:api_summary_async')
+        first = await self.async_client.get(url)
+        self.assertIn('no-cache', first['Cache-Control'])
+        again = await self.async_client.get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    async def test_server_timing_counts_async_queries(self):
+        response = await self.async_client.get(reverse('tracker:api_tenders_async'))
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    async def test_bad_parameters(self):
+        response = await self.async_client.get(reverse('tracker:api_expenses_async'), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RunConcurrentlyTests(TransactionTestCase):
+    def test_outside_a_transaction_each_query_gets_its_own_connection(self):
+        make_tender(Company.objects.create(name='Acme'), 'C-1', '10.00', expenses=['4.00'])
+        seen = []
+
+        def query(model):
+            def run():
+                seen.append(threading.get_ident())
+                return model.objects.count()
+            return run
+
+        self.assertEqual(async_to_sync(run_concurrently)(query(Tender), query(Expense)), [1, 1])
+        self.assertNotIn(threading.get_ident(), seen)
+
+
+class AsgiBenchTests(TransactionTestCase):
+    def test_bench_asgi_report(self):
+        make_tender(Company.objects.create(name='Acme'), 'B-1', '10.00', expenses=['4.00'])
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'asgi.json'
+            call_command('bench_asgi', concurrency=[1, 2], duration=0.2, wsgi_workers=1,
+                         output=output, stdout=StringIO())
+            report = json.loads(output.read_text())
+        self.assertEqual(report['mode'], 'in-process')
+        self.assertEqual(
+            [(r['deployment'], r['concurrency']) for r in report['results']],
+            [('wsgi', 1), ('asgi', 1), ('wsgi', 2), ('asgi', 2)],
+        )
+        for result in report['results']:
+            self.assertGreater(result['requests'], 0)
+            self.assertEqual(result['errors'], 0)
+
+    def test_bench_asgi_needs_both_urls(self):
+        with self.assertRaises(CommandError):
+            call_command('bench_asgi', wsgi_url='http://localhost:8000', stdout=StringIO())
+
+
+class SqliteProfileTests(TestCase):
+    def test_new_connections_get_the_profile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = connection.copy()
+            database.settings_dict = {**connection.settings_dict, 'NAME': str(Path(tmp) / 'profile.sqlite3')}
+            try:
+                profile = current_profile(database)
+                # connecting never rewrites the file's journal mode
+                self.assertFalse(Path(tmp, 'profile.sqlite3-wal').exists())
+                self.assertEqual(set_journal_mode('WAL', database), 'wal')
+                self.assertEqual(journal_mode(database), 'wal')
+            finally:
+                database.close()
+        self.assertEqual(profile['journal_mode'], 'delete')
+        self.assertEqual(profile['synchronous'], 1)
+        self.assertEqual(profile['busy_timeout'], 5000)
+        self.assertEqual(profile['cache_size'], -65536)
+
+    def test_rejects_unknown_pragmas_and_values(self):
+        with self.assertRaises(ImproperlyConfigured):
+            apply_profile(connection, {'writable_schema': 'ON'})
+        with self.assertRaises(ImproperlyConfigured):
+            apply_profile(connection, {'cache_size': '1; DROP TABLE tracker_tender'})
+        with self.assertRaises(ImproperlyConfigured):
+            apply_profile(connection, {'journal_mode': 'WAL'})
+
+    def test_journal_mode_is_a_deploy_step(self):
+        # the test database lives in memory, so it can never be in WAL mode
+        warnings = check_journal_mode(None)
+        self.assertEqual([warning.id for warning in warnings], ['tracker.W001'])
+        with self.assertRaisesMessage(CommandError, 'expected wal'):
+            call_command('sqlite_journal_mode', check=True, stdout=StringIO())
+        out = StringIO()
+        call_command('sqlite_journal_mode', mode='MEMORY', stdout=out)
+        self.assertIn('Journal mode is memory', out.getvalue())
+
+
+class SqliteMaintenanceTests(TransactionTestCase):
+    # both checkpoint or copy the database, which cannot happen inside a test transaction
+    def test_optimize_db(self):
+        out = StringIO()
+        call_command('optimize_db', stdout=out)
+        self.assertIn('optimize', out.getvalue())
+        call_command('optimize_db', full=True, stdout=out)
+        self.assertIn('analyze', out.getvalue())
+
+    def test_bench_sqlite_report(self):
+        make_tender(Company.objects.create(name='Acme'), 'S-1', '10.00')
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'sqlite.json'
+            call_command('bench_sqlite', readers=1, writers=1, duration=0.3, output=output, stdout=StringIO())
+            report = json.loads(output.read_text())
+        self.assertEqual(set(report['results']), {'django-defaults', 'configured'})
+        for result in report['results'].values():
+            self.assertGreater(result['writer']['ops'], 0)
+            self.assertGreater(result['reader']['ops'], 0)
+        # the benchmark works on copies
+        self.assertEqual(Expense.objects.count(), 0)
+
+
+class MonthlyRollupTests(TestCase):
+    def setUp(self):
+        self.acme = Company.objects.create(name='Acme')
+        self.globex = Company.objects.create(name='Globex')
+        self.tender = make_tender(self.acme, 'R-1', '1000.00')
+        self.other = make_tender(self.globex, 'R-2', '1000.00')
+
+    def add_expense(self, tender, category, amount, day):
+        expense = Expense.objects.create(tender=tender, category=expense_category(category), amount=Decimal(amount))
+        # date is auto_now_add; move it by saving again
+        expense.date = day
+        expense.save()
+        return expense
+
+    def cells(self, rows=None):
+        return {
+            (row.tender_id, row.category, row.month.isoformat()): (row.expense_sum, row.expense_count,
+                                                                   row.payment_sum, row.payment_count)
+            for row in (rows if rows is not None else MonthlyRollup.objects.tender_cells())
+        }
+
+    def test_tracks_create_update_delete(self):
+        fuel = self.add_expense(self.tender, 'Fuel', '30.00', date(2025, 1, 10))
+        self.add_expense(self.tender, 'Fuel', '20.00', date(2025, 1, 20))
+        payment = Payment.objects.create(tender=self.tender, amount=Decimal('50.00'))
+        payment.date = date(2025, 2, 3)
+        payment.save()
+        self.assertEqual(self.cells(), {
+            (self.tender.pk, 'Fuel', '2025-01-01'): (Decimal('50.00'), 2, 0, 0),
+            (self.tender.pk, '', '2025-02-01'): (0, 0, Decimal('50.00'), 1),
+        })
+
+        fuel.category, fuel.date, fuel.tender = expense_category('Labour'), date(2025, 3, 1), self.other
+        fuel.save()
+        self.assertEqual(self.cells()[(self.tender.pk, 'Fuel', '2025-01-01')], (Decimal('20.00'), 1, 0, 0))
+        self.assertEqual(self.cells()[(self.other.pk, 'Labour', '2025-03-01')], (Decimal('30.00'), 1, 0, 0))
+
+        # the company and overall rows above moved with it
+        self.assertEqual(MonthlyRollup.objects.company_cells().get(category='Labour').company, self.globex)
+        self.assertEqual(self.cells(MonthlyRollup.objects.total_cells()), {
+            (None, 'Fuel', '2025-01-01'): (Decimal('20.00'), 1, 0, 0),
+            (None, 'Labour', '2025-03-01'): (Decimal('30.00'), 1, 0, 0),
+            (None, '', '2025-02-01'): (0, 0, Decimal('50.00'), 1),
+        })
+
+        fuel.delete()
+        self.assertNotIn((self.other.pk, 'Labour', '2025-03-01'), self.cells())
+        self.assertFalse(MonthlyRollup.objects.filter(category='Labour').exists())
+        self.assertEqual(MonthlyRollup.objects.mismatches(), [])
+
+    def test_tender_and_company_deletes(self):
+        self.add_expense(self.tender, 'Fuel', '30.00', date(2025, 1, 10))
+        self.add_expense(self.other, 'Fuel', '5.00', date(2025, 1, 11))
+        self.tender.delete()
+        self.assertEqual(MonthlyRollup.objects.total_cells().get().expense_sum, Decimal('5.00'))
+        self.globex.delete()
+        self.assertFalse(MonthlyRollup.objects.exists())
+
+    def test_follows_tender_to_another_company(self):
+        self.add_expense(self.tender, 'Fuel', '30.00', date(2025, 1, 10))
+        self.tender.company = self.globex
+        self.tender.save()
+        self.assertEqual(MonthlyRollup.objects.tender_cells().get().company, self.globex)
+        self.assertEqual(MonthlyRollup.objects.company_cells().get().company, self.globex)
+        self.assertEqual(MonthlyRollup.objects.mismatches(), [])
+
+    def test_bulk_import_and_backfill(self):
+        csv_text = (
+            "kind,tender,amount,date,category\n"
+            "expense,R-1,10.00,2024-11-02,Fuel\n"
+            "expense,R-1,15.00,2024-11-20,Fuel\n"
+            "payment,R-2,40.00,2024-12-01,\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'rows.csv'
+            path.write_text(csv_text)
+            call_command('import_ledger', str(path), stdout=StringIO())
+        self.assertEqual(self.cells()[(self.tender.pk, 'Fuel', '2024-11-01')], (Decimal('25.00'), 2, 0, 0))
+        self.assertEqual(MonthlyRollup.objects.mismatches(), [])
+
+        MonthlyRollup.objects.all().delete()
+        call_command('rebuild_rollup', stdout=StringIO())
+        self.assertEqual(len(self.cells()), 2)
+        MonthlyRollup.objects.update(expense_count=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollup', verify_only=True, stdout=StringIO())
+
+
+class ApiAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Company.objects.create(name='Acme')
+        globex = Company.objects.create(name='Globex')
+        cls.tender = make_tender(cls.acme, 'A-1', '1000.00', expenses=['10.00', '5.00'], payments=['40.00'])
+        make_tender(globex, 'G-1', '1000.00', expenses=['7.00'])
+        Expense.objects.create(tender=cls.tender, category=expense_category('Fuel'), amount=Decimal('3.00'))
+
+    def get(self, **params):
+        return self.client.get(reverse('tracker:api_analytics'), params)
+
+    def test_slices_and_drills_down(self):
+        data = self.get(group='company', order='expense').json()
+        self.assertEqual([(r['company'], r['expense_total']) for r in data['rows']], [('Acme', 18.0), ('Globex', 7.0)])
+        self.assertEqual(data['totals']['payment_total'], 40.0)
+
+        # data version (ETag), rows, totals
+        with self.assertNumQueries(3):
+            data = self.get(group='category,month', company=self.acme.pk).json()
+        month = timezone.localdate().strftime('%Y-%m')
+        self.assertEqual(
+            [(r['category'], r['month'], r['expense_count'], r['payment_count']) for r in data['rows']],
+            [(None, month, 0, 1), ('Fuel', month, 1, 0), ('Materials', month, 2, 0)],
+        )
+        self.assertFalse(data['truncated'])
+
+        data = self.get(group='tender', category='Materials', limit=1).json()
+        self.assertEqual(len(data['rows']), 1)
+        self.assertTrue(data['truncated'])
+        self.assertEqual(data['totals']['expense_total'], 22.0)
+
+    def test_rejects_bad_parameters(self):
+        for params in ({'group': 'colour'}, {'group': 'month,month'}, {'month_from': '2025-13'},
+                       {'company': 'x'}, {'order': 'name'}):
+            self.assertEqual(self.get(**params).status_code, 400, params)
+
+
+class TenderAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Company.objects.create(name='Acme')
+        cls.loss = make_tender(cls.acme, 'T-LOSS', '100.00', expenses=['150.00'], payments=['20.00'])
+        cls.gain = make_tender(cls.acme, 'T-GAIN', '1000.00', expenses=['100.00'])
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:tracker_tender_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as few:
+            self.changelist()
+        globex = Company.objects.create(name='Globex')
+        for i in range(20):
+            make_tender(globex, f'G-{i}', '10.00', expenses=['1.00'], payments=['1.00'])
+        with self.assertNumQueries(len(few.captured_queries)):
+            response = self.changelist()
+        self.assertEqual(len(response.context['cl'].result_list), 22)
+
+    def test_columns_read_annotations_and_sort(self):
+        response = self.changelist()
+        columns = response.context['cl'].list_display
+        self.assertContains(response, '$150.00')
+        self.assertContains(response, '$-50.00')
+        ordered = self.changelist(o=str(columns.index('profit_display'))).context['cl'].result_list
+        self.assertEqual([t.tender_no for t in ordered], ['T-LOSS', 'T-GAIN'])
+        ordered = self.changelist(o=f"-{columns.index('total_expenses_display')}").context['cl'].result_list
+        self.assertEqual([t.tender_no for t in ordered], ['T-LOSS', 'T-GAIN'])
+
+    def test_change_and_add_forms(self):
+        response = self.client.get(reverse('admin:tracker_tender_change', args=[self.loss.pk]))
+        self.assertContains(response, '-50.0%')
+        response = self.client.get(reverse('admin:tracker_tender_add'))
+        self.assertEqual(response.status_code, 200)
+
+
+class CompanyAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Company.objects.create(name='Acme')
+        cls.zenith = Company.objects.create(name='zenith works')
+        Company.objects.create(name='4 Corners')
+        make_tender(cls.acme, 'A-1', '1000.00', payments=['300.00'])
+        make_tender(cls.acme, 'A-2', '500.00', expenses=['50.00'], payments=['100.00', '100.00'])
+        make_tender(cls.zenith, 'Z-1', '2000000.00')
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:tracker_company_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return [company.name for company in response.context['cl'].result_list]
+
+    def test_totals(self):
+        acme = Company.objects.with_totals().get(pk=self.acme.pk)
+        self.assertEqual(acme.tender_total, 2)
+        self.assertEqual(acme.tender_value_sum, Decimal('1500.00'))
+        self.assertEqual(acme.paid_sum, Decimal('500.00'))
+        self.assertEqual(acme.outstanding_amount, Decimal('1000.00'))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as few:
+            self.changelist()
+        for i in range(20):
+            make_tender(Company.objects.create(name=f'Co {i}'), f'C-{i}', '10.00', payments=['1.00'])
+        with self.assertNumQueries(len(few.captured_queries)):
+            self.assertEqual(len(self.changelist()), 23)
+
+    def test_sorting_and_filters(self):
+        response = self.client.get(reverse('admin:tracker_company_changelist'))
+        columns = response.context['cl'].list_display
+        self.assertContains(response, '$1,000.00')
+        self.assertEqual(self.changelist(o=f"-{columns.index('outstanding')}"),
+                         ['zenith works', 'Acme', '4 Corners'])
+        self.assertEqual(self.changelist(o=str(columns.index('tender_count'))),
+                         ['4 Corners', 'zenith works', 'Acme'])
+
+        self.assertEqual(self.changelist(name_range='A-F'), ['Acme'])
+        self.assertEqual(self.changelist(name_range='S-Z'), ['zenith works'])
+        self.assertEqual(self.changelist(name_range='other'), ['4 Corners'])
+        self.assertEqual(self.changelist(tender_value='none'), ['4 Corners'])
+        self.assertEqual(self.changelist(tender_value='under-100k'), ['Acme'])
+        self.assertEqual(self.changelist(tender_value='over-1m'), ['zenith works'])
+
+    def test_delete_action(self):
+        response = self.client.post(reverse('admin:tracker_company_changelist'), {
+            'action': 'delete_selected', '_selected_action': [self.acme.pk], 'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Company.objects.filter(pk=self.acme.pk).exists())
+
+
+class ExpenseCategoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tender = make_tender(Company.objects.create(name='Acme'), 'C-1', '1000.00')
+
+    def test_form_takes_category_names(self):
+        response = self.client.post(reverse('tracker:expense_add'), {
+            'tender': self.tender.pk, 'category': ' Fuel ', 'amount': '12.50',
+        })
+        self.assertEqual(response.status_code, 302)
+        expense = Expense.objects.get()
+        self.assertEqual(expense.category.name, 'Fuel')
+
+        response = self.client.post(reverse('tracker:expense_edit', args=[expense.pk]), {
+            'tender': self.tender.pk, 'category': 'Fuel', 'amount': '15.00',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ExpenseCategory.objects.count(), 1)
+        response = self.client.get(reverse('tracker:expense_edit', args=[expense.pk]))
+        self.assertContains(response, 'value="Fuel"')
+
+    def test_invalid_form_creates_no_category(self):
+        response = self.client.post(reverse('tracker:expense_add'), {
+            'tender': self.tender.pk, 'category': 'Fuel', 'amount': 'lots',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ExpenseCategory.objects.exists())
+
+    def test_ids_for_creates_missing_names(self):
+        fuel = expense_category('Fuel')
+        ids = ExpenseCategory.objects.ids_for(['Fuel', 'Labour', 'Labour'])
+        self.assertEqual(ids['Fuel'], fuel.pk)
+        self.assertEqual(set(ExpenseCategory.objects.values_list('name', flat=True)), {'Fuel', 'Labour'})
+
+    def test_rename_follows_into_rollup(self):
+        fuel = expense_category('Fuel')
+        Expense.objects.create(tender=self.tender, category=fuel, amount=Decimal('5.00'))
+        fuel.name = 'Diesel'
+        fuel.save()
+        self.assertEqual(set(MonthlyRollup.objects.values_list('category', flat=True)), {'Diesel'})
+        self.assertEqual(MonthlyRollup.objects.mismatches(), [])
+        self.assertEqual(self.client.get(reverse('tracker:api_expenses')).json()['expenses'][0]['category'],
+                         'Diesel')
+
+
+class ExpenseAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        tender = make_tender(Company.objects.create(name='Acme'), 'E-1', '1000.00')
+        fuel, labour = expense_category('Fuel'), expense_category('Labour')
+        for day, category in [(date(2024, 12, 30), fuel), (date(2025, 1, 5), labour), (date(2025, 2, 7), fuel)]:
+            expense = Expense.objects.create(tender=tender, category=category, amount=Decimal('10.00'))
+            Expense.objects.filter(pk=expense.pk).update(date=day)
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def changelist(self, **params):
+        response = self.client.get(reverse('admin:tracker_expense_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_period_drill_down(self):
+        response = self.changelist()
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+        self.assertContains(response, '?period=2024')
+        self.assertNotContains(response, '?period=2025-01')
+        response = self.changelist(period='2025')
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+        self.assertContains(response, '?period=2025-02')
+        self.assertNotContains(response, '?period=2025-03')
+        response = self.changelist(period='2025-01')
+        self.assertEqual([e.category.name for e in response.context['cl'].result_list], ['Labour'])
+        self.assertEqual(len(self.changelist(period='2025-13').context['cl'].result_list), 3)
+
+    def test_out_of_range_periods_are_ignored(self):
+        for period in ('0000', '9999', '0000-01', '9999-12'):
+            with self.subTest(period=period):
+                self.assertEqual(len(self.changelist(period=period).context['cl'].result_list), 3)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as few:
+            self.changelist()
+        make_tender(Company.objects.create(name='Globex'), 'G-1', '10.00', expenses=['1.00'] * 20)
+        with self.assertNumQueries(len(few.captured_queries)):
+            self.changelist()
+
+    def test_category_filter_and_change_form(self):
+        fuel = ExpenseCategory.objects.get(name='Fuel')
+        response = self.changelist(category__id__exact=fuel.pk)
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+        expense = Expense.objects.first()
+        response = self.client.get(reverse('admin:tracker_expense_change', args=[expense.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_search(self):
+        other = make_tender(Company.objects.create(name='Globex'), 'G-7', '10.00', expenses=['1.00'])
+        Expense.objects.filter(tender=other).update(description='Diesel for graders')
+
+        def found(term):
+            return sorted(e.tender.tender_no for e in self.changelist(q=term).context['cl'].result_list)
+
+        self.assertEqual(found('diesel'), ['G-7'])
+        self.assertEqual(found('E-1'), ['E-1', 'E-1', 'E-1'])
+        self.assertEqual(found('labo'), ['E-1'])
+        self.assertEqual(found('globex'), ['G-7'])
+
+    def test_estimated_count(self):
+        with patch.object(EstimatedCountPaginator, 'count_limit', 2):
+            cl = self.changelist().context['cl']
+            # unfiltered: the highest id, not a COUNT
+            self.assertEqual(cl.result_count, Expense.objects.order_by('-pk').first().pk)
+            self.assertIsNone(cl.full_result_count)
+            # filtered: counted, but only up to the limit
+            self.assertEqual(self.changelist(period='2025').context['cl'].result_count, 2)
+            self.assertEqual(self.changelist(q='E-1').context['cl'].result_count, 2)
+
+
+class DashboardBootstrapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        acme = Company.objects.create(name='Acme')
+        globex = Company.objects.create(name='Globex')
+        Company.objects.create(name='Initech')
+        make_tender(acme, 'B-1', '1000.00', expenses=['100.00'], payments=['1000.00'])
+        make_tender(acme, 'B-2', '500.00', expenses=['700.00'], payments=['50.00'])
+        make_tender(globex, 'B-3', '250.00', expenses=['20.00'])
+        Tender.objects.refresh_payment_status()
+
+    def test_matches_the_separate_apis(self):
+        with self.assertNumQueries(4):
+            data = self.client.get(reverse('tracker:api_bootstrap')).json()
+        self.assertEqual(data['summary'], self.client.get(reverse('tracker:api_summary')).json())
+        self.assertEqual(data['chart'], self.client.get(reverse('tracker:api_tenders_by_company'), {'top': 20}).json())
+        self.assertEqual(data['tenders'], self.client.get(reverse('tracker:api_tenders')).json()['tenders'])
+        self.assertEqual(data['tenders_total'], 3)
+        self.assertEqual(data['summary']['status_counts'], {'Pending': 1, 'Partially_Paid': 1, 'Paid': 1})
+
+    def test_first_page_only(self):
+        with patch('tracker.views.BOOTSTRAP_TENDERS', 2):
+            data = self.client.get(reverse('tracker:api_bootstrap')).json()
+        self.assertEqual(len(data['tenders']), 2)
+        self.assertEqual(data['tenders_total'], 3)
+        self.assertEqual(data['summary']['total_tenders'], 3)
+
+
+def decode_columns(payload, dictionaries):
+    """Rebuild row objects from a columnar payload, resolving dictionary-encoded columns."""
+    columns = dict(payload['columns'])
+    for column, values in dictionaries.items():
+        columns[column] = [values[code] for code in columns[column]]
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+class ColumnarApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        acme = Company.objects.create(name='Acme')
+        globex = Company.objects.create(name='Globex')
+        make_tender(acme, 'C-1', '100.00', expenses=['80.00', '50.00'], payments=['40.00'])
+        make_tender(globex, 'C-2', '200.00', expenses=['20.00'], payments=['200.00'])
+        make_tender(acme, 'C-3', '300.00')
+        tender = Tender.objects.get(tender_no='C-2')
+        Expense.objects.create(tender=tender, category=expense_category('Travel'), amount=Decimal('5.00'),
+                               description='taxi')
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_tenders_match_rows(self):
+        with self.assertNumQueries(2):
+            payload = self.get('tracker:api_tenders', format='columnar')
+        self.assertEqual(payload['count'], 3)
+        self.assertEqual(payload['companies']['name'], ['Acme', 'Globex'])
+        self.assertEqual(payload['statuses'], ['Pending', 'Partially Paid', 'Paid'])
+        companies = payload['companies']
+        tenders = decode_columns(payload, {'company': companies['name'], 'payment_status': payload['statuses']})
+        for tender, code in zip(tenders, payload['columns']['company']):
+            tender['company_id'] = companies['id'][code]
+        self.assertEqual(tenders, self.get('tracker:api_tenders')['tenders'])
+
+    def test_search_keeps_rank_order(self):
+        rows = self.get('tracker:api_tenders', q='Globex')['tenders']
+        payload = self.get('tracker:api_tenders', q='Globex', format='columnar')
+        self.assertEqual(payload['columns']['tender_no'], [row['tender_no'] for row in rows])
+
+    def test_expenses_match_rows(self):
+        # the page plus one lookup each for tender labels and category names
+        with self.assertNumQueries(4):
+            payload = self.get('tracker:api_expenses', format='columnar', limit=3)
+        rows = self.get('tracker:api_expenses', limit=3)
+        self.assertEqual(payload['next_cursor'], rows['next_cursor'])
+        expenses = decode_columns(payload, {'tender': payload['tenders']['label'],
+                                            'category': payload['categories']})
+        expected = [{key: value for key, value in row.items() if key != 'tender_id'} for row in rows['expenses']]
+        self.assertEqual(expenses, expected)
+        self.assertEqual(
+            [payload['tenders']['id'][code] for code in payload['columns']['tender']],
+            [row['tender_id'] for row in rows['expenses']],
+        )
+
+    def test_empty_page(self):
+        payload = self.get('tracker:api_expenses', format='columnar', date_from='2099-01-01')
+        self.assertEqual(payload['count'], 0)
+        self.assertEqual(payload['columns']['id'], [])
+        self.assertEqual(payload['categories'], [])
+        self.assertEqual(self.get('tracker:api_tenders', format='columnar', company=0)['columns']['tender_no'], [])
+
+    def test_async_views_match(self):
+        for name in ('api_tenders', 'api_expenses'):
+            self.assertEqual(self.get(f'tracker:{name}_async', format='columnar'),
+                             self.get(f'tracker:{name}', format='columnar'))
+
+    def test_invalid_format(self):
+        for name in ('api_tenders', 'api_expenses', 'api_tenders_async', 'api_expenses_async'):
+            response = self.client.get(reverse(f'tracker:{name}'), {'format': 'xml'})
+            self.assertEqual(response.status_code, 400)
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(name='Acme')
+        for i in range(20):
+            make_tender(company, f'Z-{i}', '100.00', expenses=['10.00'])
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br'), ['br', 'gzip'])
+        self.assertEqual(accepted_encodings('br;q=0.5, gzip'), ['gzip', 'br'])
+        self.assertEqual(accepted_encodings('*'), ['br', 'gzip'])
+        self.assertEqual(accepted_encodings('*, br;q=0'), ['gzip'])
+        self.assertEqual(accepted_encodings('identity'), [])
+        self.assertEqual(accepted_encodings(None), [])
+        self.assertEqual(accepted_encodings('gzip', offered=('gzip',)), ['gzip'])
+
+    def get(self, encoding, **params):
+        return self.client.get(reverse('tracker:api_tenders'), params, HTTP_ACCEPT_ENCODING=encoding)
+
+    def test_negotiation(self):
+        plain = self.get('identity')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.get('gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+
+        response = self.get('gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+        self.assertFalse(self.get('gzip;q=0').has_header('Content-Encoding'))
+
+    def test_weak_etag_still_matches(self):
+        response = self.get('br')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        again = self.client.get(reverse('tracker:api_tenders'), HTTP_ACCEPT_ENCODING='br',
+                                HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_streamed_export(self):
+        url = reverse('tracker:expense_export')
+        plain = b''.join(self.client.get(url, HTTP_ACCEPT_ENCODING='identity').streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), plain)
+
+    def test_skips_event_streams_and_binary_formats(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br, gzip')
+        for content_type in ('text/event-stream', 'application/pdf', 'image/png'):
+            response = middleware.process_response(request, HttpResponse(b'x' * 1000, content_type=content_type))
+            self.assertFalse(response.has_header('Content-Encoding'), content_type)
+        small = middleware.process_response(request, HttpResponse(b'x' * 100, content_type='text/html'))
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_html_gets_padded_gzip_not_brotli(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        html = b'<p>' + b'x' * 1000 + b'</p>'
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br, gzip')
+        sizes = set()
+        for _ in range(5):
+            response = middleware.process_response(request, HttpResponse(html, content_type='text/html; charset=utf-8'))
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.content), html)
+            sizes.add(len(response.content))
+        # the random padding varies the length from one response to the next
+        self.assertGreater(len(sizes), 1)
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br')
+        response = middleware.process_response(request, HttpResponse(html, content_type='text/html'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        source, self.root = Path(tmp.name) / 'src', Path(tmp.name) / 'root'
+        (source / 'img').mkdir(parents=True)
+        (source / 'img' / 'logo.png').write_bytes(b'\x89PNG' + bytes(200))
+        (source / 'site.css').write_text('body { background: url("img/logo.png"); }\n' * 50)
+        (source / 'tiny.js').write_text('1')
+        settings = override_settings(
+            STATIC_ROOT=self.root, STATICFILES_DIRS=[source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.manifest = json.loads((self.root / 'staticfiles.json').read_text())['paths']
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        css = self.manifest['site.css']
+        self.assertRegex(css, r'^site\.[0-9a-f]{12}\.css$')
+        self.assertIn(self.manifest['img/logo.png'], (self.root / css).read_text())
+        self.assertEqual(brotli.decompress((self.root / f'{css}.br').read_bytes()), (self.root / css).read_bytes())
+        self.assertEqual(gzip.decompress((self.root / f'{css}.gz').read_bytes()), (self.root / css).read_bytes())
+        # images are already compressed; a one-byte script would only grow
+        self.assertFalse((self.root / f"{self.manifest['img/logo.png']}.gz").exists())
+        self.assertFalse((self.root / f"{self.manifest['tiny.js']}.br").exists())
+
+    def serve(self, path, encoding='br, gzip'):
+        return serve_static(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=encoding), path)
+
+    def test_serves_precompressed_variant_with_immutable_caching(self):
+        css = self.manifest['site.css']
+        response = self.serve(css)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), (self.root / css).read_bytes())
+
+        self.assertEqual(self.serve(css, 'gzip')['Content-Encoding'], 'gzip')
+        self.assertFalse(self.serve(css, 'identity').has_header('Content-Encoding'))
+        self.assertEqual(self.serve('site.css')['Cache-Control'], 'public, max-age=60')
+
+    def test_missing_and_outside_files(self):
+        for path in ('missing.css', '../src/site.css', f"{self.manifest['site.css']}.br"):
+            with self.assertRaises(Http404):
+                self.serve(path)
+
+
+class PaymentStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        acme = Company.objects.create(name='Acme')
+        cls.pending = make_tender(acme, 'S-1', '100.00')
+        cls.partial = make_tender(acme, 'S-2', '100.00', payments=['40.00'])
+        cls.paid = make_tender(acme, 'S-3', '100.00', payments=['60.00', '40.00'])
+
+    def statuses(self):
+        return dict(Tender.objects.order_by('tender_no').values_list('tender_no', 'payment_status'))
+
+    @override_settings(LIVE_EVENTS_ENABLED=True)
+    def test_payment_writes_store_the_status(self):
+        self.assertEqual(self.statuses(), {'S-1': 'Pending', 'S-2': 'Partially Paid', 'S-3': 'Paid'})
+        payment = Payment.objects.create(tender=self.partial, amount=Decimal('60.00'))
+        self.assertEqual(self.statuses()['S-2'], 'Paid')
+        status = ChangeEvent.objects.filter(kind='status').get().payload
+        self.assertEqual((status['previous'], status['payment_status']), ('Partially Paid', 'Paid'))
+
+        payment.delete()
+        self.assertEqual(self.statuses()['S-2'], 'Partially Paid')
+
+    def test_refresh_is_one_update_of_stale_rows(self):
+        Tender.objects.update(payment_status='Pending')
+        with self.assertNumQueries(1):
+            self.assertEqual(Tender.objects.refresh_payment_status(), 2)
+        self.assertEqual(self.statuses(), {'S-1': 'Pending', 'S-2': 'Partially Paid', 'S-3': 'Paid'})
+        with self.assertNumQueries(1):
+            self.assertEqual(Tender.objects.refresh_payment_status(from_payments=True), 0)
+
+    def test_reconcile_command(self):
+        Tender.objects.update(payment_status='Paid')
+        # a drifted ledger: only summing the payments gets S-2 right
+        TenderLedger.objects.filter(tender=self.partial).update(payment_sum=Decimal('100.00'))
+        out = StringIO()
+        call_command('reconcile_payment_status', dry_run=True, stdout=out)
+        self.assertIn('2 tender(s) would change: 1 to Partially Paid, 1 to Pending', out.getvalue())
+        self.assertEqual(set(self.statuses().values()), {'Paid'})
+
+        call_command('reconcile_payment_status', from_ledger=True, stdout=StringIO())
+        self.assertEqual(self.statuses()['S-2'], 'Paid')
+        version = DataVersion.objects.current()
+        call_command('reconcile_payment_status', stdout=StringIO())
+        self.assertEqual(self.statuses(), {'S-1': 'Pending', 'S-2': 'Partially Paid', 'S-3': 'Paid'})
+        self.assertNotEqual(DataVersion.objects.current(), version)
+
+    def test_admin_action(self):
+        Tender.objects.update(payment_status='Paid')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.post(reverse('admin:tracker_tender_changelist'), {
+            'action': 'reconcile_payment_status',
+            '_selected_action': [self.pending.pk, self.paid.pk],
+        }, follow=True)
+        self.assertContains(response, 'Payment status updated on 1 of 2 tender(s).')
+        self.assertEqual(self.statuses(), {'S-1': 'Pending', 'S-2': 'Paid', 'S-3': 'Paid'})
+
+    @override_settings(LIVE_EVENTS_ENABLED=True)
+    def test_total_value_edits_recompute_the_status(self):
+        # S-3 is paid 100 in full; raising its value leaves it partly paid
+        response = self.client.post(reverse('tracker:tender_edit', args=[self.paid.pk]), {
+            'tender_no': 'S-3', 'company': self.paid.company_id, 'client_name': 'Client S-3',
+            'total_value': '1000.00', 'payment_status': 'Paid',
+        })
+        self.assertEqual(response.status_code, 302)
+        rows = self.client.get(reverse('tracker:api_tenders')).json()['tenders']
+        self.assertEqual({row['tender_no']: row['payment_status'] for row in rows}['S-3'], 'Partially Paid')
+
+        tender = Tender.objects.get(pk=self.partial.pk)
+        tender.total_value = Decimal('40.00')
+        tender.save()
+        self.assertEqual(self.statuses()['S-2'], 'Paid')
+        self.assertEqual(ChangeEvent.objects.filter(kind='status').order_by('-pk').first().payload['payment_status'],
+                         'Paid')
+
+    def test_status_is_not_editable(self):
+        self.assertNotIn('payment_status', TenderForm().fields)
+        self.assertEqual(Tender.objects.create(tender_no='S-4', company=self.paid.company, client_name='C',
+                                               total_value=Decimal('5.00'), payment_status='Paid').payment_status,
+                         'Pending')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.get(reverse('admin:tracker_tender_change', args=[self.paid.pk]))
+        self.assertNotContains(response, 'name="payment_status"')
+
+    def test_apis_read_the_stored_status(self):
+        Tender.objects.filter(pk=self.pending.pk).update(payment_status='Paid')
+        rows = self.client.get(reverse('tracker:api_tenders')).json()['tenders']
+        self.assertEqual({row['tender_no']: row['payment_status'] for row in rows}['S-1'], 'Paid')
+        summary = self.client.get(reverse('tracker:api_summary')).json()
+        self.assertEqual(summary['status_counts'], {'Pending': 0, 'Partially_Paid': 1, 'Paid': 2})
+
+
+class EncoderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        acme = Company.objects.create(name='Acme')
+        cls.tender = make_tender(acme, 'E-1', '1234.50', payments=['0.10'])
+        expense = Expense.objects.create(tender=cls.tender, category=expense_category('Fuel'), amount=Decimal('19.99'))
+        Expense.objects.filter(pk=expense.pk).update(date=date(2024, 2, 29))
+
+    def test_encoders_agree(self):
+        data = {'amount': Decimal('1234.50'), 'small': Decimal('0.10'), 'day': date(2024, 2, 29),
+                'none': None, 'rows': [(1, 'a')]}
+        documents = {name: json.loads(encoder(data)) for name, encoder in ENCODERS.items()}
+        self.assertEqual(documents['json'], {'amount': 1234.5, 'small': 0.1, 'day': '2024-02-29',
+                                             'none': None, 'rows': [[1, 'a']]})
+        for name, document in documents.items():
+            self.assertEqual(document, documents['json'], name)
+
+    def test_apis_send_numbers_and_iso_dates(self):
+        tender = self.client.get(reverse('tracker:api_tenders')).json()['tenders'][0]
+        self.assertEqual((tender['total_value'], tender['total_paid'], tender['balance']), (1234.5, 0.1, 1234.4))
+        self.assertEqual(tender['start_date'], self.tender.start_date.isoformat())
+        expense = self.client.get(reverse('tracker:api_expenses')).json()['expenses'][0]
+        self.assertEqual((expense['amount'], expense['date'], expense['tender']), (19.99, '2024-02-29', 'E-1 - Acme'))
+
+    def test_event_payloads_store_numbers(self):
+        with self.settings(LIVE_EVENTS_ENABLED=True):
+            tenders_changed([self.tender.pk])
+        payload = ChangeEvent.objects.filter(kind='tender').order_by('-pk').first().payload
+        self.assertEqual((payload['total_value'], payload['total_paid']), (1234.5, 0.1))
+
+    def test_projections_records_api(self):
+        ProjectRecord.objects.create(title='Bridge', company='Acme', customer='City', amount=Decimal('500.25'),
+                                     project_date=date(2024, 5, 1), status='WON')
+        ProjectRecord.objects.create(title='Road', company='Acme', customer='City', amount=Decimal('100.00'),
+                                     project_date=date(2024, 6, 1), status='LOST')
+        url = reverse('projections:api_records')
+        with self.assertNumQueries(3):
+            data = self.client.get(url, {'year': 2024}).json()
+        self.assertEqual([row['title'] for row in data['records']], ['Road', 'Bridge'])
+        self.assertEqual(data['records'][1]['amount'], 500.25)
+        self.assertEqual((data['total_won'], data['total_lost']), (500.25, 100.0))
+        self.assertEqual(data['company_totals'], [{'company': 'Acme', 'total': 500.25}])
+        self.assertEqual(self.client.get(url, {'status': 'WON'}).json()['records'][0]['project_date'], '2024-05-01')
+        self.assertEqual(self.client.get(url, {'year': 'x'}).status_code, 400)
+
+        response = self.client.get(reverse('projections:dashboardpro'))
+        self.assertContains(response, '<script id="company-chart-data" type="application/json">'
+                                      '{"labels": ["Acme"], "data": [500.25]}</script>', html=False)
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Company.objects.create(name='Acme Roads')
+        cls.apex = Company.objects.create(name='apex Works')
+        cls.globex = Company.objects.create(name='Globex')
+        cls.t1 = make_tender(cls.acme, 'TN-100', '10.00')
+        cls.t2 = make_tender(cls.apex, 'tn-101', '10.00')
+        cls.t3 = make_tender(cls.acme, 'TX-200', '10.00')
+
+    def results(self, name, **params):
+        response = self.client.get(reverse(f'tracker:autocomplete_{name}'), params)
+        self.assertEqual(response.status_code, 200)
+        return [(row['id'], row['label']) for row in response.json()['results']]
+
+    def test_prefix_matches_ignore_case(self):
+        self.assertEqual(self.results('tenders', q='tn-1'),
+                         [(self.t1.pk, 'TN-100 - Acme Roads'), (self.t2.pk, 'tn-101 - apex Works')])
+        self.assertEqual(self.results('tenders', q=' TN-10', company=self.apex.pk), [(self.t2.pk, 'tn-101 - apex Works')])
+        self.assertEqual(self.results('tenders', q='N-1'), [])
+        self.assertEqual([label for pk, label in self.results('companies', q='A')], ['Acme Roads', 'apex Works'])
+        self.assertEqual(len(self.results('companies', limit=2)), 2)
+        self.assertEqual(len(self.results('tenders')), 3)
+
+    def test_prefix_ending_in_the_last_code_point(self):
+        top = chr(sys.maxunicode)
+        self.assertEqual(prefix_bounds(f'a{top}'), (f'a{top}', 'b'))
+        self.assertEqual(prefix_bounds(top * 2), (top * 2, None))
+        self.assertEqual(prefix_bounds('\ud7ff'), ('\ud7ff', '\ue000'))
+        edge = Company.objects.create(name=f'Acme{top}')
+        self.assertEqual(self.results('companies', q=f'acme{top}'), [(edge.pk, edge.name)])
+        self.assertEqual(self.results('companies', q=top), [])
+
+    def test_bad_parameters(self):
+        url = reverse('tracker:autocomplete_tenders')
+        self.assertEqual(self.client.get(url, {'limit': '0'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'company': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('tracker:autocomplete_companies'), {'limit': '-1'}).status_code, 400)
+
+    def test_lookups_use_the_lower_indexes(self):
+        plan = prefix_search(Tender.objects.all(), 'tender_no', 'tn').values_list('pk')[:20].explain()
+        self.assertIn('tender_no_lower_idx', plan)
+        plan = prefix_search(Company.objects.all(), 'name', 'ac').values_list('pk')[:20].explain()
+        self.assertIn('company_name_lower_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_form_pages_do_not_load_the_choices(self):
+        pages = [reverse('tracker:expense_add'), reverse('tracker:tender_add'),
+                 reverse('tracker:expense_list'), reverse('tracker:expense_list') + f'?tender={self.t1.pk}']
+        counts = []
+        for url in pages:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            counts.append(len(queries.captured_queries))
+        for n in range(20):
+            make_tender(Company.objects.create(name=f'Extra {n}'), f'E-{n}', '1.00')
+        for url, count in zip(pages, counts):
+            with self.assertNumQueries(count):
+                response = self.client.get(url)
+            self.assertNotContains(response, 'E-19')
+            self.assertContains(response, 'data-autocomplete-url')
+
+    def test_widgets_show_and_submit_the_current_choice(self):
+        expense = Expense.objects.create(tender=self.t2, category=expense_category('Fuel'), amount=Decimal('5.00'))
+        response = self.client.get(reverse('tracker:expense_edit', args=[expense.pk]))
+        self.assertContains(response, f'<input type="hidden" name="tender" id="id_tender" value="{self.t2.pk}">',
+                            html=False)
+        self.assertContains(response, 'value="tn-101 - apex Works"')
+        self.assertContains(response, '<label for="id_tender_text"', html=False)
+        self.assertContains(response, 'js/autocomplete.js')
+
+        response = self.client.get(reverse('tracker:expense_list'), {'company': self.acme.pk, 'tender': self.t1.pk})
+        self.assertContains(response, 'value="Acme Roads"')
+        self.assertContains(response, 'data-autocomplete-forward="company"')
+        self.assertContains(response, 'Tender: TN-100 - Acme Roads')
+
+        response = self.client.post(reverse('tracker:expense_edit', args=[expense.pk]), {
+            'tender': self.t3.pk, 'category': 'Fuel', 'amount': '6.00',
+        })
+        self.assertEqual(response.status_code, 302)
+        expense.refresh_from_db()
+        self.assertEqual(expense.tender, self.t3)
+        response = self.client.post(reverse('tracker:expense_edit', args=[expense.pk]), {
+            'tender': '999999', 'category': 'Fuel', 'amount': '6.00',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors['tender'])
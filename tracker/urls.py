@@ -23,13 +23,26 @@ urlpatterns = [
     path('expense/<int:pk>/edit/', views.expense_edit, name='expense_edit'),
     path('expense/<int:pk>/delete/', views.expense_delete, name='expense_delete'),
     path('expenses/', views.expense_list, name='expense_list'),
+    path('expenses/export/', views.expense_export, name='expense_export'),
 
     # Payments (simple add endpoint used by add_payment view)
     path('payment/add/', views.add_payment, name='add_payment'),
+    path('api/batch/', views.api_batch, name='api_batch'),
 
     # API endpoints consumed by the dashboard JS
     path('api/tenders/', views.api_tenders, name='api_tenders'),
     path('api/tenders_by_company/', views.api_tenders_by_company, name='api_tenders_by_company'),
     path('api/summary/', views.api_summary, name='api_summary'),
+    path('api/bootstrap/', views.api_bootstrap, name='api_bootstrap'),
     path('api/expenses/', views.api_expenses, name='api_expenses'),
+    path('api/analytics/', views.api_analytics, name='api_analytics'),
+    path('api/events/', views.live_events, name='live_events'),
+    path('api/autocomplete/tenders/', views.autocomplete_tenders, name='autocomplete_tenders'),
+    path('api/autocomplete/companies/', views.autocomplete_companies, name='autocomplete_companies'),
+
+    # async variants of the dashboard APIs, for ASGI deployments
+    path('api/async/tenders/', views.api_tenders_async, name='api_tenders_async'),
+    path('api/async/tenders_by_company/', views.api_tenders_by_company_async, name='api_tenders_by_company_async'),
+    path('api/async/summary/', views.api_summary_async, name='api_summary_async'),
+    path('api/async/expenses/', views.api_expenses_async, name='api_expenses_async'),
 ]
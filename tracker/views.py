@@ -1,31 +1,55 @@
 # tracker/views.py
+from datetime import date, datetime
 from decimal import Decimal
+from functools import wraps
+import csv
+import hashlib
 import json
 
-from django.core.paginator import Paginator
-from django.db.models import Sum, Count, Q
-from django.http import JsonResponse, HttpResponseBadRequest
+from asgiref.sync import sync_to_async
+from django.db.models import Q, Sum, Count
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.decorators.http import require_POST
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.html import json_script
+from django.utils.http import quote_etag, urlencode
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_POST
 from django.contrib import messages
-
-from .models import Company, Tender, Expense, Payment
+from django.db import transaction
+
+from .models import (
+    Company, DataVersion, MonthlyRollup, Tender, TenderLedger, Expense, ExpenseCategory, Payment,
+)
+from . import events
+from .aio import run_concurrently
+from .bulk import RowError, build_row, insert_rows, refresh_tenders, resolve_tenders
+from .pagination import InvalidCursor, paginate_by_date
+from .search import prefix_search, search_tenders
+from .encoders import DecimalJSONEncoder, json_response
+from .serializers import (
+    EXPENSE_FIELDS, TENDER_FIELDS, expense_columns, expense_rows, tender_columns, tender_label, tender_row,
+)
 from .forms import CompanyForm, TenderForm, ExpenseForm
+from .widgets import company_picker, tender_picker
 
 
 # ---------- Pages ----------
 
 def dashboard(request):
     """
-    Main dashboard page. JS fetches the live data from API endpoints,
-    so we only send minimal context for server-side rendering (companies list).
+    Main dashboard page. The bootstrap payload (summary, chart and first
+    page of tenders) is embedded as JSON, so first paint needs no API
+    requests; the JS refetches from the APIs when filters change.
     """
-    companies = Company.objects.all().order_by('name')
-    # Optionally provide a few tenders for initial render, but JS will fetch fresh data.
-    tenders = Tender.objects.select_related('company').all()[:25]
+    bootstrap = bootstrap_payload()
     return render(request, 'tracker/dashboard.html', {
-        'companies': companies,
-        'tenders': tenders,
+        'live_updates': live_updates_enabled(request),
+        'companies': bootstrap.pop('companies'),
+        # the json_script filter would send Decimals as strings
+        'bootstrap_script': json_script(bootstrap, 'dashboard-bootstrap', encoder=DecimalJSONEncoder),
     })
 
 
@@ -74,9 +98,8 @@ def tender_edit(request, pk):
     if request.method == 'POST':
         form = TenderForm(request.POST, instance=tender)
         if form.is_valid():
-            t = form.save()
-            t.update_payment_status()
-            t.save()
+            # payment_status is recomputed on save
+            form.save()
             messages.success(request, 'Tender updated successfully!')
             return redirect('tracker:dashboard')
     else:
@@ -181,15 +204,114 @@ def add_payment(request):
     except Exception:
         return HttpResponseBadRequest('Invalid amount')
 
+    # the payment signals store the tender's new payment_status
     Payment.objects.create(tender=tender, amount=amt)
-    # Optionally update tender payment_status
-    tender.update_payment_status()
-    tender.save()
     return JsonResponse({'success': True, 'message': 'Payment recorded'})
 
 
+# ----- Batch writes -----
+
+BATCH_LIMIT = 5000
+
+
+@require_POST
+def api_batch(request):
+    """
+    Record many expenses and/or payments in one request.
+    Expects a JSON body such as::
+
+        {"items": [{"kind": "expense", "tender": "T-1", "amount": "120.00",
+                    "date": "2025-03-01", "category": "Fuel", "description": "..."},
+                   {"kind": "payment", "tender": 12, "amount": "500", "note": "EFT"}],
+         "skip_duplicates": false}
+
+    "expenses" and "payments" lists (without "kind") are accepted as well.
+    Valid items are written in one transaction with bulk_create; each touched
+    tender's ledger and payment_status are refreshed once. Returns one result
+    per item, in request order.
+    """
+    try:
+        body = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return HttpResponseBadRequest('Invalid JSON')
+    if not isinstance(body, dict):
+        return HttpResponseBadRequest('Expected a JSON object')
+
+    for key in ('items', 'expenses', 'payments'):
+        if not isinstance(body.get(key) or [], list):
+            return HttpResponseBadRequest(f'"{key}" must be a list')
+    # non-objects stay in place, so every entry gets a result at its own index
+    items = list(body.get('items') or [])
+    for key, kind in (('expenses', 'expense'), ('payments', 'payment')):
+        items += [dict(item, kind=kind) if isinstance(item, dict) else item for item in body.get(key) or []]
+    if not items:
+        return HttpResponseBadRequest('No items')
+    if len(items) > BATCH_LIMIT:
+        return HttpResponseBadRequest(f'At most {BATCH_LIMIT} items per request')
+    skip_duplicates = bool(body.get('skip_duplicates'))
+
+    tenders = resolve_tenders(
+        str(item.get('tender') or item.get('tender_no') or '').strip()
+        for item in items if isinstance(item, dict)
+    )
+
+    results = []
+    objs = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise RowError('expected an object')
+            obj = build_row(item, tenders)
+        except RowError as exc:
+            results.append({'index': index, 'status': 'error', 'error': str(exc)})
+            continue
+        if not skip_duplicates:
+            obj.import_hash = None
+        objs.append(obj)
+        results.append({'index': index, 'kind': obj._meta.model_name, 'obj': obj})
+
+    with transaction.atomic():
+        written = {id(obj) for obj in insert_rows(objs)}
+        refresh_tenders({obj.tender_id for obj in objs if id(obj) in written})
+
+    for result in results:
+        obj = result.pop('obj', None)
+        if obj is None:
+            continue
+        if id(obj) in written:
+            result.update(status='created', id=obj.pk)
+        else:
+            result['status'] = 'duplicate'
+
+    return JsonResponse({
+        'success': not any(r['status'] == 'error' for r in results),
+        'created': len(written),
+        'results': results,
+    })
+
+
 # ---------- APIs consumed by frontend ----------
 
+RESPONSE_FORMATS = ('rows', 'columnar')
+
+
+def data_etag(request, *args, **kwargs):
+    """
+    ETag for the JSON APIs: the global data version plus the endpoint and
+    its query string. A matching If-None-Match is answered with a 304
+    before the view runs any of its aggregate queries.
+    """
+    params = sorted(request.GET.lists())
+    key = f"{request.path}?{params!r}".encode()
+    return f"{DataVersion.objects.current()}-{hashlib.md5(key).hexdigest()[:16]}"
+
+
+def conditional_api(view):
+    # no-cache: browsers may keep the body but must revalidate every time
+    return cache_control(no_cache=True)(etag(data_etag)(view))
+
+
+@conditional_api
 def api_tenders(request):
     """
     Return tenders with computed fields:
@@ -199,199 +321,727 @@ def api_tenders(request):
       - profit
       - expense_overrun
     Supports filters: company, status, date_from, date_to, q
-    """
-    qs = Tender.objects.select_related('company').all()
-
-    company_id = request.GET.get('company')
-    status = request.GET.get('status')
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    q = request.GET.get('q')
-
-    if company_id:
-        qs = qs.filter(company_id=company_id)
-    if status:
-        qs = qs.filter(payment_status=status)
-    if date_from:
-        qs = qs.filter(start_date__gte=date_from)
-    if date_to:
-        qs = qs.filter(end_date__lte=date_to)
-    if q:
-        qs = qs.filter(Q(tender_no__icontains=q) | Q(client_name__icontains=q) | Q(company__name__icontains=q))
-
-    data = []
-    for tender in qs:
-        total_expenses = tender.total_expenses()
-        total_paid = tender.total_paid()
-        balance = (tender.total_value or Decimal('0.00')) - total_paid
-        profit = (tender.total_value or Decimal('0.00')) - total_expenses
-        expense_overrun = tender.expense_overrun()
-
-        # Update dynamic payment_status (do not save unless you want persistence here)
-        tender.update_payment_status()
-
-        data.append({
-            'id': tender.id,
-            'tender_no': tender.tender_no,
-            'company': tender.company.name if tender.company else '',
-            'company_id': tender.company.id if tender.company else None,
-            'client_name': tender.client_name,
-            'total_value': float(tender.total_value or 0),
-            'total_expenses': float(total_expenses),
-            'total_paid': float(total_paid),
-            'balance': float(balance),
-            'profit': float(profit),
-            'expense_overrun': float(expense_overrun),
-            'payment_status': tender.payment_status,
-            'start_date': tender.start_date.isoformat() if tender.start_date else None,
-            'end_date': tender.end_date.isoformat() if tender.end_date else None,
-            'expense_count': tender.expenses.count(),
-            'payment_count': tender.payments.count(),
-        })
-
-    return JsonResponse({'tenders': data})
-
+    ``format=columnar`` returns parallel arrays per field instead of one
+    object per tender (see tracker.serializers).
 
+    All totals are annotated in the database, so the endpoint runs a
+    single query regardless of how many tenders match, and rows are read
+    as tuples rather than model instances.
+    """
+    fmt = response_format(request.GET)
+    if fmt is None:
+        return HttpResponseBadRequest('Invalid format')
+    qs = filter_tenders(Tender.objects.with_totals(), request.GET)
+    ranks = {}
+    if request.GET.get('q'):
+        qs, ranks = search_tenders(qs, request.GET['q'])
+    return json_response(tenders_payload(ranked(qs.values_list(*TENDER_FIELDS), ranks), fmt))
+
+
+def tenders_payload(rows, fmt):
+    """The api_tenders body for TENDER_FIELDS rows."""
+    if fmt == 'columnar':
+        return tender_columns(rows)
+    return {'tenders': [tender_row(row) for row in rows]}
+
+
+def response_format(params):
+    """The ``format`` parameter of the list APIs: rows (default) or columnar; None if invalid."""
+    fmt = params.get('format') or 'rows'
+    return fmt if fmt in RESPONSE_FORMATS else None
+
+
+def ranked(rows, ranks):
+    """``values_list`` rows, best full-text matches first when searching."""
+    rows = list(rows)
+    if ranks:
+        # sort is stable, so ties keep date order
+        rows.sort(key=lambda row: ranks.get(row[0], 0))
+    return rows
+
+
+def filter_tenders(qs, params):
+    """Apply the company/status/date filters of api_tenders."""
+    if params.get('company'):
+        qs = qs.filter(company_id=params['company'])
+    if params.get('status'):
+        qs = qs.filter(payment_status=params['status'])
+    if params.get('date_from'):
+        qs = qs.filter(start_date__gte=params['date_from'])
+    if params.get('date_to'):
+        qs = qs.filter(end_date__lte=params['date_to'])
+    return qs
+
+
+@conditional_api
 def api_tenders_by_company(request):
     """
     Aggregated per-company totals used for charting.
     Returns arrays: labels, values (tender sum), paids (payments sum), expenses, profits, overruns
+
+    Optional ``top=N`` keeps the N companies with the highest tender value
+    and folds the remainder into a single "Others" bucket.
     """
-    companies = Company.objects.all().order_by('name')
+    try:
+        top = int(request.GET.get('top') or 0)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid top')
+    return JsonResponse(company_chart(company_rollup(), company_names(), top))
+
+
+def company_rollup():
+    """Per-company sums of tender value, payments, expenses and overruns, keyed by company id."""
+    return {
+        row['company_id']: row
+        for row in Tender.objects.with_totals()
+        .order_by()
+        .values('company_id')
+        .annotate(
+            value=Sum('total_value'),
+            paid=Sum('total_paid_sum'),
+            expense=Sum('total_expenses_sum'),
+            overrun=Sum('overrun_amount'),
+        )
+    }
+
+
+def company_names():
+    return list(Company.objects.order_by('name').values_list('id', 'name'))
 
-    labels = []
-    values = []
-    paids = []
-    expenses = []
-    profits = []
-    overruns = []
 
-    for c in companies:
-        # totals per company
-        tv = Tender.objects.filter(company=c).aggregate(total=Sum('total_value'))['total'] or Decimal('0.00')
-        te = Expense.objects.filter(tender__company=c).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        tp = Payment.objects.filter(tender__company=c).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+def company_chart(rollup, names, top=0):
+    """The api_tenders_by_company payload built from company_rollup() and company_names()."""
+    zero = Decimal('0.00')
+    rows = []
+    for company_id, name in names:
+        totals = rollup.get(company_id, {})
+        rows.append({
+            'label': name,
+            'value': totals.get('value') or zero,
+            'paid': totals.get('paid') or zero,
+            'expense': totals.get('expense') or zero,
+            'overrun': totals.get('overrun') or zero,
+        })
 
+    if 0 < top < len(rows):
+        ranked = sorted(rows, key=lambda r: r['value'], reverse=True)
+        kept, rest = ranked[:top], ranked[top:]
+        others = {'label': 'Others'}
+        for key in ('value', 'paid', 'expense', 'overrun'):
+            others[key] = sum((r[key] for r in rest), zero)
+        # keep the alphabetical order of the chart, with Others last
+        rows = sorted(kept, key=lambda r: r['label']) + [others]
+
+    return {
+        'labels': [r['label'] for r in rows],
+        'values': [float(r['value']) for r in rows],
+        'paids': [float(r['paid']) for r in rows],
+        'expenses': [float(r['expense']) for r in rows],
         # profit as value - expenses
-        profit = (tv or Decimal('0.00')) - (te or Decimal('0.00'))
+        'profits': [float(r['value'] - r['expense']) for r in rows],
+        # company-level overrun: sum of per-tender overruns
+        'overruns': [float(r['overrun']) for r in rows],
+    }
 
-        # company-level overrun: sum of tender.expense_overrun()
-        overrun = Decimal('0.00')
-        for t in Tender.objects.filter(company=c):
-            overrun += t.expense_overrun()
 
-        labels.append(c.name)
-        values.append(float(tv))
-        paids.append(float(tp))
-        expenses.append(float(te))
-        profits.append(float(profit))
-        overruns.append(float(overrun))
+@conditional_api
+def api_summary(request):
+    return JsonResponse(summary_payload(*(query() for query in SUMMARY_QUERIES)))
 
-    return JsonResponse({
-        'labels': labels,
-        'values': values,
-        'paids': paids,
-        'expenses': expenses,
-        'profits': profits,
-        'overruns': overruns,
-    })
 
+def _tender_totals():
+    return Tender.objects.aggregate(
+        count=Count('pk'),
+        value=Sum('total_value'),
+        pending=Count('pk', filter=Q(payment_status='Pending')),
+        partially_paid=Count('pk', filter=Q(payment_status='Partially Paid')),
+        paid=Count('pk', filter=Q(payment_status='Paid')),
+    )
 
-def api_summary(request):
-    total_tenders = Tender.objects.count()
-    total_companies = Company.objects.count()
-    total_expenses = Expense.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    total_tender_value = Tender.objects.aggregate(total=Sum('total_value'))['total'] or Decimal('0.00')
-    total_paid = Payment.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    total_profit = (total_tender_value or Decimal('0.00')) - (total_expenses or Decimal('0.00'))
-
-    status_counts = {
-        'Pending': Tender.objects.filter(payment_status='Pending').count(),
-        'Partially_Paid': Tender.objects.filter(payment_status='Partially Paid').count(),
-        'Paid': Tender.objects.filter(payment_status='Paid').count(),
-    }
 
-    return JsonResponse({
-        'total_tenders': total_tenders,
+def _company_count():
+    return Company.objects.count()
+
+
+def _expense_total():
+    return Expense.objects.aggregate(total=Sum('amount'))['total']
+
+
+def _payment_total():
+    return Payment.objects.aggregate(total=Sum('amount'))['total']
+
+
+# independent of each other, so the async view runs them concurrently
+SUMMARY_QUERIES = (_tender_totals, _company_count, _expense_total, _payment_total)
+
+
+def summary_payload(tenders, total_companies, total_expenses, total_paid):
+    total_expenses = total_expenses or Decimal('0.00')
+    total_tender_value = tenders['value'] or Decimal('0.00')
+    total_paid = total_paid or Decimal('0.00')
+    total_profit = total_tender_value - total_expenses
+
+    return {
+        'total_tenders': tenders['count'],
         'total_companies': total_companies,
         'total_expenses': float(total_expenses),
         'total_tender_value': float(total_tender_value),
         'total_paid': float(total_paid),
         'total_profit': float(total_profit),
-        'status_counts': status_counts
-    })
+        'status_counts': {
+            'Pending': tenders['pending'],
+            'Partially_Paid': tenders['partially_paid'],
+            'Paid': tenders['paid'],
+        },
+    }
 
 
+# ----- Dashboard bootstrap -----
+
+BOOTSTRAP_TENDERS = 100
+
+
+@conditional_api
+def api_bootstrap(request):
+    """
+    Everything the dashboard shows on first paint, in one response: the
+    api_summary payload, the api_tenders_by_company?top=20 chart and the
+    first BOOTSTRAP_TENDERS rows of api_tenders (``tenders_total`` says how
+    many there are in all).
+    """
+    payload = bootstrap_payload()
+    payload.pop('companies')
+    return json_response(payload)
+
+
+def dashboard_rollup():
+    """Tender count and money sums per (company, payment status), in one grouped query."""
+    return list(
+        Tender.objects.with_totals()
+        .order_by()
+        .values('company_id', 'payment_status')
+        .annotate(
+            count=Count('pk'),
+            value=Sum('total_value'),
+            paid=Sum('total_paid_sum'),
+            expense=Sum('total_expenses_sum'),
+            overrun=Sum('overrun_amount'),
+        )
+    )
+
+
+def bootstrap_payload():
+    """
+    The api_bootstrap payload plus the (id, name) company list. Summary,
+    status counts and chart are all folded from one dashboard_rollup() pass
+    instead of each endpoint aggregating the tender table again.
+    """
+    zero = Decimal('0.00')
+    groups = dashboard_rollup()
+    names = company_names()
+
+    rollup = {}
+    for row in groups:
+        totals = rollup.setdefault(row['company_id'], dict.fromkeys(('value', 'paid', 'expense', 'overrun'), zero))
+        for key in totals:
+            totals[key] += row[key] or zero
+
+    def count(status=None):
+        return sum(row['count'] for row in groups if status is None or row['payment_status'] == status)
+
+    tender_totals = {
+        'count': count(),
+        'value': sum((totals['value'] for totals in rollup.values()), zero),
+        'pending': count('Pending'),
+        'partially_paid': count('Partially Paid'),
+        'paid': count('Paid'),
+    }
+    summary = summary_payload(
+        tender_totals,
+        len(names),
+        sum((totals['expense'] for totals in rollup.values()), zero),
+        sum((totals['paid'] for totals in rollup.values()), zero),
+    )
+    tenders = Tender.objects.with_totals().values_list(*TENDER_FIELDS)[:BOOTSTRAP_TENDERS]
+    return {
+        'summary': summary,
+        'chart': company_chart(rollup, names, top=20),
+        'tenders': [tender_row(row) for row in tenders],
+        'tenders_total': tender_totals['count'],
+        'companies': names,
+    }
+
+
+@conditional_api
 def api_expenses(request):
-    qs = Expense.objects.select_related('tender__company').order_by('-date')[:1000]
-    expenses = []
-
-    for e in qs:
-        if e.tender and e.tender.company:
-            tender_display = f"{e.tender.tender_no} - {e.tender.company.name}"
-        elif e.tender:
-            tender_display = e.tender.tender_no
-        else:
-            tender_display = ""
-
-        expenses.append({
-            'id': e.id,
-            'tender_id': e.tender.id if e.tender else None,
-            'tender': tender_display,
-            'category': e.category,
-            'description': e.description or '',
-            'amount': float(e.amount),
-            'date': e.date.isoformat(),
-        })
+    """
+    Newest-first expenses, one keyset page at a time.
+    Supports the expense_list filters plus ``cursor`` and ``limit`` (max 1000);
+    follow ``next_cursor`` / ``prev_cursor`` from the response to page.
+    ``format=columnar`` returns parallel arrays per field.
+    A malformed date filter gets a 400 with a JSON ``error``.
+    """
+    if response_format(request.GET) is None:
+        return HttpResponseBadRequest('Invalid format')
+    try:
+        return json_response(expenses_payload(request.GET))
+    except InvalidDateFilter as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    except (ValueError, InvalidCursor):
+        return HttpResponseBadRequest('Invalid cursor or limit')
 
-    return JsonResponse({'expenses': expenses})
 
+def expenses_payload(params):
+    """
+    One api_expenses page. Raises InvalidDateFilter, InvalidCursor or
+    ValueError for bad parameters.
+
+    The page is plain tuples from the expense table (so the (date, id)
+    index drives the scan), then one lookup each for the labels of the
+    page's tenders and categories.
+    """
+    limit = min(int(params.get('limit') or 1000), 1000)
+    page = paginate_by_date(
+        filter_expenses(Expense.objects.values_list(*EXPENSE_FIELDS, named=True), params),
+        cursor=params.get('cursor'),
+        per_page=max(limit, 1),
+    )
+    labels = expense_labels(page.rows)
+    if response_format(params) == 'columnar':
+        body = expense_columns(page.rows, *labels)
+    else:
+        body = {'expenses': expense_rows(page.rows, *labels)}
+    return {
+        **body,
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    }
+
+
+def expense_labels(rows):
+    """({tender id: label}, {category id: name}) for EXPENSE_FIELDS rows."""
+    # an empty pk__in runs no query, so an empty page stays a single query
+    tenders = Tender.objects.filter(pk__in={row.tender_id for row in rows})
+    labels = {
+        pk: tender_label(tender_no, company)
+        for pk, tender_no, company in tenders.values_list('pk', 'tender_no', 'company__name')
+    }
+    names = dict(ExpenseCategory.objects.filter(pk__in={row.category_id for row in rows})
+                 .values_list('pk', 'name'))
+    return labels, names
+
+
+# group-by dimensions of api_analytics -> MonthlyRollup columns they select
+ANALYTICS_DIMENSIONS = {
+    'company': ('company_id', 'company__name'),
+    'tender': ('tender_id', 'tender__tender_no'),
+    'category': ('category',),
+    'month': ('month',),
+}
+ANALYTICS_ORDER = {'expense': '-expense_total', 'payment': '-payment_total'}
+ANALYTICS_MAX_ROWS = 5000
+
+
+@conditional_api
+def api_analytics(request):
+    """
+    Expense and payment totals sliced by company, tender, category and/or
+    month, read from the MonthlyRollup table so the cost follows the number
+    of rollup rows at the level the query needs, not the ledger size.
+
+      group       comma-separated dimensions (default: month)
+      company, tender, category, month_from, month_to (YYYY-MM)
+                  narrow the slice; drill down by adding a filter and a
+                  finer dimension
+      order       expense or payment: largest totals first (default: by
+                  the dimensions)
+      limit       rows to return (default and max 5000)
+
+    Payments have no category: they group under a null category and a
+    category filter leaves them out.
+    """
+    params = request.GET
+    group = (params.get('group') or 'month').split(',')
+    if any(name not in ANALYTICS_DIMENSIONS for name in group) or len(set(group)) != len(group):
+        return HttpResponseBadRequest('Invalid group')
+    if params.get('order', '') not in ('', *ANALYTICS_ORDER):
+        return HttpResponseBadRequest('Invalid order')
+    # read the coarsest level of the rollup that can answer the query
+    if 'tender' in group or params.get('tender'):
+        cells = MonthlyRollup.objects.tender_cells()
+    elif 'company' in group or params.get('company'):
+        cells = MonthlyRollup.objects.company_cells()
+    else:
+        cells = MonthlyRollup.objects.total_cells()
+    try:
+        cells = filter_rollup(cells, params)
+        limit = max(min(int(params.get('limit') or ANALYTICS_MAX_ROWS), ANALYTICS_MAX_ROWS), 0)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid filter or limit')
+
+    totals = {
+        'expense_total': Sum('expense_sum'), 'expense_count': Sum('expense_count'),
+        'payment_total': Sum('payment_sum'), 'payment_count': Sum('payment_count'),
+    }
+    columns = [column for name in group for column in ANALYTICS_DIMENSIONS[name]]
+    ordering = [ANALYTICS_ORDER[params['order']]] if params.get('order') else []
+    rows = list(cells.values(*columns).annotate(**totals).order_by(*ordering, *columns)[:limit + 1])
+    overall = cells.aggregate(**totals)
+
+    def dimensions(row):
+        out = {}
+        if 'company' in group:
+            out.update(company_id=row['company_id'], company=row['company__name'])
+        if 'tender' in group:
+            out.update(tender_id=row['tender_id'], tender_no=row['tender__tender_no'])
+        if 'category' in group:
+            out['category'] = row['category'] or None
+        if 'month' in group:
+            out['month'] = row['month'].strftime('%Y-%m')
+        return out
+
+    def figures(row):
+        return {
+            'expense_total': float(row['expense_total'] or 0),
+            'expense_count': row['expense_count'] or 0,
+            'payment_total': float(row['payment_total'] or 0),
+            'payment_count': row['payment_count'] or 0,
+        }
+
+    return JsonResponse({
+        'group': group,
+        'rows': [{**dimensions(row), **figures(row)} for row in rows[:limit]],
+        'truncated': len(rows) > limit,
+        'totals': figures(overall),
+    })
+
+
+def filter_rollup(qs, params):
+    """Apply the api_analytics filters. Raises ValueError for malformed values."""
+    if params.get('company'):
+        qs = qs.filter(company_id=int(params['company']))
+    if params.get('tender'):
+        qs = qs.filter(tender_id=int(params['tender']))
+    if 'category' in params:
+        qs = qs.filter(category=params['category'])
+    if params.get('month_from'):
+        qs = qs.filter(month__gte=datetime.strptime(params['month_from'], '%Y-%m').date())
+    if params.get('month_to'):
+        qs = qs.filter(month__lte=datetime.strptime(params['month_to'], '%Y-%m').date())
+    return qs
+
+
+# ----- Autocomplete -----
+
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+
+def autocomplete_limit(params):
+    """The ``limit`` parameter (default 20, max 50), or None if it is not a positive number."""
+    limit = params.get('limit') or str(AUTOCOMPLETE_LIMIT)
+    if not limit.isdigit() or int(limit) < 1:
+        return None
+    return min(int(limit), AUTOCOMPLETE_MAX_LIMIT)
+
+
+@conditional_api
+def autocomplete_tenders(request):
+    """
+    Tenders whose number starts with ``q`` (ignoring case), as
+    ``{'results': [{'id', 'label'}]}`` for the tender pickers. ``company``
+    narrows them to one company; ``limit`` caps the results.
+    """
+    limit = autocomplete_limit(request.GET)
+    if limit is None:
+        return HttpResponseBadRequest('Invalid limit')
+    tenders = Tender.objects.all()
+    if request.GET.get('company'):
+        if not request.GET['company'].isdigit():
+            return HttpResponseBadRequest('Invalid company')
+        tenders = tenders.filter(company_id=request.GET['company'])
+    rows = prefix_search(tenders, 'tender_no', request.GET.get('q')).values_list(
+        'pk', 'tender_no', 'company__name')[:limit]
+    return json_response({
+        'results': [{'id': pk, 'label': tender_label(tender_no, company)} for pk, tender_no, company in rows],
+    })
+
+
+@conditional_api
+def autocomplete_companies(request):
+    """Companies whose name starts with ``q`` (ignoring case), shaped like autocomplete_tenders."""
+    limit = autocomplete_limit(request.GET)
+    if limit is None:
+        return HttpResponseBadRequest('Invalid limit')
+    rows = prefix_search(Company.objects.all(), 'name', request.GET.get('q')).values_list('pk', 'name')[:limit]
+    return json_response({'results': [{'id': pk, 'label': name} for pk, name in rows]})
+
+
+# ----- Async API (served through expense_tracker/asgi.py) -----
+#
+# Same responses as the views above. Under ASGI a request waiting on the
+# database does not hold a worker thread, and independent aggregates are
+# run concurrently (see tracker.aio).
+
+def async_conditional_api(view):
+    """conditional_api for async views: the data version lookup is awaited."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        response, tag = None, None
+        if request.method in ('GET', 'HEAD'):
+            tag = quote_etag(await sync_to_async(data_etag)(request, *args, **kwargs))
+            response = get_conditional_response(request, etag=tag)
+        if response is None:
+            response = await view(request, *args, **kwargs)
+            if tag and not response.has_header('ETag'):
+                response['ETag'] = tag
+        patch_cache_control(response, no_cache=True)
+        return response
+    return wrapper
+
+
+@async_conditional_api
+async def api_tenders_async(request):
+    fmt = response_format(request.GET)
+    if fmt is None:
+        return HttpResponseBadRequest('Invalid format')
+    qs = filter_tenders(Tender.objects.with_totals(), request.GET)
+    ranks = {}
+    if request.GET.get('q'):
+        qs, ranks = await sync_to_async(search_tenders)(qs, request.GET['q'])
+
+    rows = [row async for row in qs.values_list(*TENDER_FIELDS)]
+    return json_response(tenders_payload(ranked(rows, ranks), fmt))
+
+
+@async_conditional_api
+async def api_tenders_by_company_async(request):
+    try:
+        top = int(request.GET.get('top') or 0)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid top')
+    rollup, names = await run_concurrently(company_rollup, company_names)
+    return JsonResponse(company_chart(rollup, names, top))
+
+
+@async_conditional_api
+async def api_summary_async(request):
+    return JsonResponse(summary_payload(*await run_concurrently(*SUMMARY_QUERIES)))
+
+
+@async_conditional_api
+async def api_expenses_async(request):
+    if response_format(request.GET) is None:
+        return HttpResponseBadRequest('Invalid format')
+    try:
+        # the page query and its label lookups run as one unit on the request's connection
+        return json_response(await sync_to_async(expenses_payload)(request.GET))
+    except InvalidDateFilter as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    except (ValueError, InvalidCursor):
+        return HttpResponseBadRequest('Invalid cursor or limit')
+
+
+# ----- Live updates -----
+
+def live_updates_enabled(request):
+    """LIVE_EVENTS_ENABLED, for requests served through ASGI only (see settings)."""
+    return settings.LIVE_EVENTS_ENABLED and isinstance(request, ASGIRequest)
+
+
+async def live_events(request):
+    """
+    Server-Sent Events stream of tracker changes (see tracker.events).
+    Browsers resume from the Last-Event-ID header when they reconnect;
+    ``last_event_id`` in the query string does the same for other clients.
+    When live updates are off, or the request came through WSGI, where each
+    open stream would hold a worker, it answers 204, which tells
+    EventSource not to reconnect.
+    """
+    if not live_updates_enabled(request):
+        return HttpResponse(status=204)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return HttpResponseBadRequest('Invalid Last-Event-ID')
+
+    response = StreamingHttpResponse(events.stream(last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 # ----- Expense list page with basic filtering & pagination -----
 
-def expense_list(request):
-    companies = Company.objects.all().order_by('name')
-    tenders_qs = Tender.objects.select_related('company').order_by('-start_date')
+EXPENSE_FILTERS = ('company', 'tender', 'date_from', 'date_to')
+DATE_FILTERS = ('date_from', 'date_to')
 
-    qs = Expense.objects.select_related('tender__company').order_by('-date')
 
-    company_id = request.GET.get('company')
-    tender_id = request.GET.get('tender')
+class InvalidDateFilter(ValueError):
+    """A date_from/date_to filter that is not a YYYY-MM-DD date."""
 
-    selected_company_name = None
-    selected_tender_name = None
 
-    if company_id:
-        qs = qs.filter(tender__company_id=company_id)
-        tenders_qs = tenders_qs.filter(company_id=company_id)
-        try:
-            selected_company_name = Company.objects.get(pk=company_id).name
-        except Company.DoesNotExist:
-            selected_company_name = None
+def filter_date(params, key):
+    """params[key] as a date, or None when it is unset. Raises InvalidDateFilter."""
+    value = params.get(key)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidDateFilter(f'Invalid {key}: expected YYYY-MM-DD') from None
+
 
-    if tender_id:
-        qs = qs.filter(tender_id=tender_id)
+def filter_expenses(qs, params):
+    """
+    Apply the company/tender/date filters shared by the expense list and
+    export. Raises InvalidDateFilter for a malformed date.
+    """
+    date_from, date_to = (filter_date(params, key) for key in DATE_FILTERS)
+    if params.get('company'):
+        qs = qs.filter(tender__company_id=params['company'])
+    if params.get('tender'):
+        qs = qs.filter(tender_id=params['tender'])
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
+
+
+def expense_totals(params):
+    """
+    (total amount, row count) for the filtered expenses. Without date
+    filters this reads the TenderLedger rollup; otherwise it runs one
+    combined SUM/COUNT over the expense table.
+    """
+    if params.get('date_from') or params.get('date_to'):
+        totals = filter_expenses(Expense.objects.all(), params).aggregate(
+            total=Sum('amount'), count=Count('id'))
+    else:
+        ledgers = TenderLedger.objects.all()
+        if params.get('company'):
+            ledgers = ledgers.filter(tender__company_id=params['company'])
+        if params.get('tender'):
+            ledgers = ledgers.filter(tender_id=params['tender'])
+        totals = ledgers.aggregate(total=Sum('expense_sum'), count=Sum('expense_count'))
+    return totals['total'] or Decimal('0.00'), totals['count'] or 0
+
+
+def expense_list(request):
+    # a malformed date filter is dropped and reported rather than failing the page
+    params = request.GET.copy()
+    filter_errors = []
+    for key in DATE_FILTERS:
         try:
-            selected_tender_name = Tender.objects.get(pk=tender_id).tender_no
-        except Tender.DoesNotExist:
-            selected_tender_name = None
+            filter_date(params, key)
+        except InvalidDateFilter as exc:
+            del params[key]
+            filter_errors.append(str(exc))
+
+    qs = filter_expenses(
+        # prefetch rather than join, so the (date, id) index drives the page scan
+        Expense.objects.prefetch_related('tender__company', 'category').order_by('-date'),
+        params,
+    )
+
+    company_id = params.get('company')
+    tender_id = params.get('tender')
+
+    # typeahead pickers rather than every company and tender as an option;
+    # each looks up only the label of its current value
+    company_input = company_picker(attrs={'id': 'company', 'class': 'form-control', 'placeholder': 'All companies'})
+    tender_input = tender_picker(forward='company',
+                                 attrs={'id': 'tender', 'class': 'form-control', 'placeholder': 'All tenders'})
 
-    paginator = Paginator(qs, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    try:
+        page = paginate_by_date(qs, cursor=params.get('cursor'), per_page=25)
+    except InvalidCursor:
+        page = paginate_by_date(qs, per_page=25)
 
-    total_amount = qs.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    total_amount, expense_count = expense_totals(params)
 
     context = {
         'title': 'All Expenses',
-        'companies': companies,
-        'tenders': tenders_qs,
-        'expenses': page_obj,
+        'company_input': company_input.render('company', company_id),
+        'tender_input': tender_input.render('tender', tender_id),
+        'autocomplete_media': company_input.media,
+        'expenses': page,
         'total_amount': total_amount,
-        'selected_company': int(company_id) if company_id else None,
-        'selected_tender': int(tender_id) if tender_id else None,
-        'selected_company_name': selected_company_name,
-        'selected_tender_name': selected_tender_name,
+        'expense_count': expense_count,
+        'selected_company_name': company_input.choice_label(company_id),
+        'selected_tender_name': tender_input.choice_label(tender_id),
+        'date_from': params.get('date_from', ''),
+        'date_to': params.get('date_to', ''),
+        'filter_errors': filter_errors,
+        'filter_query': urlencode({k: params[k] for k in EXPENSE_FILTERS if params.get(k)}),
     }
     return render(request, 'tracker/expense_list.html', context)
+
+
+# ----- Streaming export -----
+
+class Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+EXPORT_FIELDS = ('id', 'date', 'tender_id', 'tender__tender_no', 'tender__company__name',
+                 'category__name', 'description', 'amount')
+EXPORT_HEADER = ('id', 'date', 'tender_id', 'tender_no', 'company', 'category', 'description', 'amount')
+
+
+def expense_export(request):
+    """
+    Stream every expense matching the expense_list filters as CSV or
+    NDJSON (?format=csv|ndjson). Rows are read from the database in
+    chunks, so memory use stays flat however many expenses match.
+    """
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return HttpResponseBadRequest('Unsupported format')
+    try:
+        expenses = filter_expenses(Expense.objects.all(), request.GET)
+    except InvalidDateFilter as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    rows = (
+        expenses
+        .order_by('-date', '-id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=2000)
+    )
+
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+
+        def stream():
+            yield writer.writerow(EXPORT_HEADER)
+            for pk, day, tender_id, tender_no, company, category, description, amount in rows:
+                yield writer.writerow((pk, day.isoformat(), tender_id, tender_no, company,
+                                       category, description or '', amount))
+
+        content_type = 'text/csv'
+    else:
+        def stream():
+            for pk, day, tender_id, tender_no, company, category, description, amount in rows:
+                yield json.dumps({
+                    'id': pk,
+                    'date': day.isoformat(),
+                    'tender_id': tender_id,
+                    'tender_no': tender_no,
+                    'company': company,
+                    'category': category,
+                    'description': description or '',
+                    'amount': str(amount),
+                }) + '\n'
+
+        content_type = 'application/x-ndjson'
+
+    response = StreamingHttpResponse(stream(), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="expenses.{fmt}"'
+    return response
@@ -0,0 +1,85 @@
+"""
+Typeahead form widgets.
+
+AutocompleteInput replaces a <select> of every tender or company: it
+renders a text box that asks an autocomplete endpoint for matches as the
+user types (static/js/autocomplete.js) and a hidden input holding the
+chosen pk, which is what the form submits. The choices are never loaded,
+so a page costs at most one query, for the label of the current value.
+"""
+from django import forms
+from django.urls import reverse_lazy
+
+from .models import Company, Tender
+from .serializers import tender_label
+
+
+class AutocompleteInput(forms.Widget):
+    """
+    ``url`` is an endpoint answering ``?q=`` with ``{'results': [{'id', 'label'}]}``
+    and ``labels`` a queryset of (pk, label parts) rows, joined by
+    ``label_for``. ``forward`` names another field of the form whose value
+    is sent along as a query parameter of the same name.
+    """
+    template_name = 'tracker/widgets/autocomplete.html'
+
+    class Media:
+        js = ['js/autocomplete.js']
+
+    def __init__(self, url, labels, label_for=str, forward=None, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+        self.labels = labels
+        self.label_for = label_for
+        self.forward = forward
+        self._label_cache = {}
+
+    def __deepcopy__(self, memo):
+        # each form gets its own copy; labels are cached per form, not per process
+        obj = super().__deepcopy__(memo)
+        obj._label_cache = {}
+        return obj
+
+    def choice_label(self, value):
+        """The label of the choice with pk ``value``, or '' for none or an unknown pk."""
+        value = str(value or '')
+        if not value.isdigit():
+            return ''
+        if value not in self._label_cache:
+            row = self.labels.filter(pk=value).first()
+            self._label_cache[value] = self.label_for(*row[1:]) if row else ''
+        return self._label_cache[value]
+
+    def id_for_label(self, id_):
+        # labels point at the visible text box
+        return f'{id_}_text' if id_ else id_
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        widget = context['widget']
+        text_attrs = dict(widget['attrs'])
+        hidden_id = text_attrs.pop('id', None) or f'id_{name}'
+        widget.update(
+            hidden_id=hidden_id,
+            label=self.choice_label(value),
+            url=str(self.url),
+            forward=self.forward,
+            text={'attrs': {**text_attrs, 'id': self.id_for_label(hidden_id)}},
+        )
+        return context
+
+
+def tender_picker(forward=None, attrs=None):
+    return AutocompleteInput(
+        reverse_lazy('tracker:autocomplete_tenders'),
+        Tender.objects.values_list('pk', 'tender_no', 'company__name'),
+        label_for=tender_label, forward=forward, attrs=attrs,
+    )
+
+
+def company_picker(attrs=None):
+    return AutocompleteInput(
+        reverse_lazy('tracker:autocomplete_companies'),
+        Company.objects.values_list('pk', 'name'),
+        attrs=attrs,
+    )